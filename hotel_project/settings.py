@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -68,6 +69,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'reservasi_backend.middleware.ProfilingMiddleware',
+    'reservasi_backend.middleware.PageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -150,6 +153,36 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Berkas counter bersama untuk invalidasi cache antar worker (di-mmap setiap proses);
+# semua worker di satu host harus menunjuk ke berkas yang sama
+INVALIDATION_BUS_PATH = Path(tempfile.gettempdir()) / 'hotel_project-invalidation.bin'
+
+# Token Bearer untuk feed ketersediaan channel manager (/channel/availability/); kosong = feed mati
+CHANNEL_FEED_TOKEN = None
+
+# Pemanasan cache (manage.py warm_cache dan hook warmup.warm_worker setelah fork)
+WARMUP_WORKERS = 4
+WARMUP_TOP_HOTELS = 20
+
+# Cache halaman utuh untuk GET anonim (beranda, daftar, pencarian, detail hotel)
+# PAGE_CACHE_SECONDS: umur segar; 0 mematikan middleware
+# PAGE_CACHE_STALE_SECONDS: setelahnya halaman lama masih dikirim sambil dibangun ulang di belakang
+PAGE_CACHE_SECONDS = 60
+PAGE_CACHE_STALE_SECONDS = 600
+PAGE_CACHE_BACKGROUND = True
+
+# Lama hold kamar untuk tamu daftar tunggu sebelum dilepas oleh manage.py expire_waitlist_offers
+WAITLIST_HOLD_MINUTES = 60
+
+# Profiling per request (mati secara default)
+# PROFILING_SAMPLE_RATE: porsi request yang diprofil, mis. 0.01 untuk 1%
+# PROFILING_TOKEN: request dengan header PROFILING_HEADER bernilai token ini selalu diprofil
+PROFILING_SAMPLE_RATE = 0.0
+PROFILING_TOKEN = None
+PROFILING_HEADER = 'X-Profile'
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_MAX_FILES = 50
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -174,6 +207,16 @@ JAZZMIN_SETTINGS = {
         "auth.Group": "fas fa-users",
     },
 
+    # Tautan tambahan di sidebar
+    "custom_links": {
+        "reservasi_backend": [{
+            "name": "Analitik Okupansi",
+            "url": "admin:reservasi_backend_reservation_analytics",
+            "icon": "fas fa-chart-line",
+            "permissions": ["reservasi_backend.view_reservation"],
+        }],
+    },
+
     # UI tweaks opsional
     "login_logo": None,
     "show_ui_builder": False,
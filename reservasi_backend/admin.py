@@ -1,8 +1,119 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
-from .models import UserProfile, Hotel, HotelGallery, RoomType, Facility, Room, Reservation, Payment, Review
+import csv
+import operator
+from datetime import timedelta
+from functools import reduce
+from itertools import chain
+from django.db import transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+from django.utils.text import smart_split, unescape_string_literal
+from django.utils.http import urlencode
+from django.contrib.admin.utils import lookup_spawns_duplicates
+from django.contrib.admin.views.main import PAGE_VAR, SEARCH_VAR
+from django.utils import timezone
+from .models import (
+    UserProfile, Hotel, HotelGallery, RoomType, RoomTypeInventory, Facility, Room, Booking, Reservation, Payment, Review,
+    ArchivedReservation, ArchivedPayment, DailyHotelStats, StatementLine, WaitlistEntry, RoomRate,
+    HotelSimilarity,
+)
+from .inventory import release_many
+from .stats import record_status_change
+from .analytics import summary, daily_rows
+from .forms import AnalyticsForm, HotelAdminForm
+from .gallery import upload_gallery_images
+from .search import bump_catalog_version
+from .paginators import EstimatedCountPaginator
+from .reconciliation import mark_payments_paid
+from .waitlist import freed_ranges, match_on_commit
+
+# ======================
+# Changelist Tabel Besar
+# ======================
+class HotelListFilter(admin.SimpleListFilter):
+    # Filter langsung ke kolom hotel_id hasil denormalisasi, tanpa join kamar
+    title = _("Hotel")
+    parameter_name = 'hotel'
+    field_name = 'hotel_id'
+
+    def lookups(self, request, model_admin):
+        return Hotel.objects.order_by('name').values_list('pk', 'name')
+
+    def queryset(self, request, queryset):
+        if self.value() and self.value().isdigit():
+            return queryset.filter(**{self.field_name: self.value()})
+        return queryset
+
+
+class ArchivedHotelListFilter(HotelListFilter):
+    field_name = 'room__hotel_id'
+
+
+class EstimatedCountMixin:
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Halaman setelah halaman yang diminta yang tetap dihitung, untuk navigasi "berikutnya"
+    count_pages_ahead = 10
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        paginator = super().get_paginator(request, queryset, per_page, orphans, allow_empty_first_page)
+        page = request.GET.get(PAGE_VAR, '')
+        if page.isdigit():
+            paginator.exact_limit = max(paginator.exact_limit, (int(page) + self.count_pages_ahead) * per_page + 1)
+        return paginator
+
+
+class BoundedSearchMixin:
+    # Pencarian bertahap: ID persis dan awalan di tabel kecil, LIKE hanya untuk field yang tidak tercakup
+    search_prefix_lookups = {}
+    search_id_limit = 200
+
+    def covered_search_fields(self, request):
+        # Field pencarian yang sudah dijawab lookup awalan, mis. room__hotel__name oleh (Hotel, 'name')
+        covered = {(model._meta.model_name, lookup) for model, lookup in self.search_prefix_lookups.values()}
+        return {field for field in self.get_search_fields(request) if tuple(field.split('__')[-2:]) in covered}
+
+    def like_search(self, fields, term):
+        # Sama dengan pencarian bawaan: tiap kata harus cocok di salah satu field
+        condition = Q()
+        for bit in smart_split(term):
+            if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+                bit = unescape_string_literal(bit)
+            condition &= reduce(operator.or_, (Q(**{f'{field}__icontains': bit}) for field in fields))
+        return condition
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        matches = Q(pk=term) if term.isdigit() else Q()
+        prefix_hit = truncated = False
+        for field, (model, lookup) in self.search_prefix_lookups.items():
+            ids = list(
+                model.objects.filter(**{f'{lookup}__istartswith': term}).values_list('pk', flat=True)[:self.search_id_limit]
+            )
+            if len(ids) >= self.search_id_limit:
+                # Awalan terlalu umum: daftar id terpotong, jadi serahkan ke LIKE agar tidak ada hasil yang hilang
+                truncated = True
+                break
+            if ids:
+                prefix_hit = True
+                matches |= Q(**{f'{field}__in': ids})
+        fields = list(self.get_search_fields(request))
+        if prefix_hit and not truncated:
+            covered = self.covered_search_fields(request)
+            fields = [field for field in fields if field not in covered]
+        if fields:
+            matches |= self.like_search(fields, term)
+        duplicates = any(lookup_spawns_duplicates(self.opts, field) for field in fields)
+        return queryset.filter(matches), duplicates
 
 # ======================
 # Inline Definitions
@@ -36,6 +147,22 @@ class PaymentInline(admin.StackedInline):
     readonly_fields = ['paid_at']
     can_delete = False
 
+class BookingReservationInline(admin.TabularInline):
+    model = Reservation
+    extra = 0
+    fields = ['room', 'room_type', 'total_price', 'status']
+    readonly_fields = ['room', 'room_type', 'total_price', 'status']
+    can_delete = False
+    show_change_link = True
+
+class BookingPaymentInline(admin.StackedInline):
+    model = Payment
+    fk_name = 'booking'
+    extra = 0
+    fields = ['method', 'is_paid', 'proof', 'paid_at']
+    readonly_fields = ['paid_at']
+    can_delete = False
+
 class ReviewInline(admin.StackedInline):
     model = Review
     extra = 0
@@ -43,6 +170,21 @@ class ReviewInline(admin.StackedInline):
     readonly_fields = ['created_at']
     can_delete = False
 
+class ArchivedPaymentInline(admin.StackedInline):
+    model = ArchivedPayment
+    extra = 0
+    fields = ['method', 'is_paid', 'proof', 'paid_at']
+    readonly_fields = fields
+    can_delete = False
+
+class ArchivedReviewInline(admin.StackedInline):
+    model = Review
+    fk_name = 'archived_reservation'
+    extra = 0
+    fields = ['rating', 'comment', 'created_at']
+    readonly_fields = fields
+    can_delete = False
+
 class UserProfileInline(admin.StackedInline):
     model = UserProfile
     can_delete = False
@@ -79,7 +221,8 @@ class UserProfileAdmin(admin.ModelAdmin):
 # ====================
 @admin.register(Hotel)
 class HotelAdmin(admin.ModelAdmin):
-    list_display = ['name', 'location', 'region', 'average_rating', 'star_rating','created_at']
+    form = HotelAdminForm
+    list_display = ['name', 'location', 'region', 'average_rating', 'star_rating', 'min_price', 'created_at']
     search_fields = ['name', 'location', 'description', 'region']
     list_filter = ['created_at', 'region']  # Tambahkan filter berdasarkan region
     inlines = [HotelGalleryInline, RoomTypeInline]
@@ -94,13 +237,14 @@ class HotelAdmin(admin.ModelAdmin):
 
     def save_model(self, request, obj, form, change):
         super().save_model(request, obj, form, change)
-        if 'multiple_images' in request.FILES:
-            for image in request.FILES.getlist('multiple_images'):
-                HotelGallery.objects.create(
-                    hotel=obj,
-                    image=image,
-                    caption=f"Gambar untuk {obj.name}"
-                )
+        uploads = form.cleaned_data.get('multiple_images') or []
+        results = upload_gallery_images(obj, uploads, caption=f"Gambar untuk {obj.name}")
+        saved = sum(1 for _name, status, _message in results if status == 'saved')
+        if results:
+            self.message_user(request, f"{saved} dari {len(results)} gambar berhasil diunggah.", messages.SUCCESS)
+        for name, status, message in results:
+            if status != 'saved':
+                self.message_user(request, f"{name}: {message}", messages.WARNING)
 
 # ====================
 # HotelGallery Admin
@@ -110,6 +254,16 @@ class HotelGalleryAdmin(admin.ModelAdmin):
     list_display = ['hotel', 'caption', 'image']
     search_fields = ['hotel__name', 'caption']
     list_filter = ['hotel']
+    list_select_related = ['hotel']
+    actions = ['set_as_cover']
+
+    def set_as_cover(self, request, queryset):
+        updated = 0
+        for image in queryset.order_by('hotel_id', 'pk').distinct():
+            updated += Hotel.objects.filter(pk=image.hotel_id).update(cover_image=image)
+        bump_catalog_version()
+        self.message_user(request, f"{updated} hotel telah diperbarui gambar sampulnya.")
+    set_as_cover.short_description = _("Jadikan gambar sampul")
 
 # ====================
 # RoomType Admin
@@ -146,51 +300,288 @@ class RoomAdmin(admin.ModelAdmin):
 # Reservation Admin
 # ====================
 @admin.register(Reservation)
-class ReservationAdmin(admin.ModelAdmin):
-    list_display = ['user', 'room', 'check_in', 'check_out', 'total_price', 'status', 'created_at']
+class ReservationAdmin(EstimatedCountMixin, BoundedSearchMixin, admin.ModelAdmin):
+    list_display = ['user', 'room', 'room_type', 'check_in', 'check_out', 'total_price', 'status', 'created_at']
+    list_select_related = ['user', 'room__hotel', 'room__room_type', 'room_type__hotel']
     search_fields = ['user__username', 'room__number', 'room__hotel__name']
-    list_filter = ['status', 'check_in', 'check_out', 'room__hotel']
-    ordering = ['-created_at']
+    search_prefix_lookups = {
+        'user': (User, 'username'),
+        'hotel': (Hotel, 'name'),
+        'room': (Room, 'number'),
+    }
+    list_filter = ['status', HotelListFilter]
+    date_hierarchy = 'check_in'
+    ordering = ['-created_at', '-id']
     inlines = [PaymentInline, ReviewInline]
     readonly_fields = ['created_at', 'total_price']
     actions = ['mark_as_checked_in', 'mark_as_checked_out', 'mark_as_cancelled']
 
+    def changelist_view(self, request, extra_context=None):
+        # Pencarian juga dijalankan di tier arsip: langsung ke arsip bila hanya arsip yang cocok,
+        # selain itu tautan ke hasil arsip ditampilkan di atas daftar
+        response = super().changelist_view(request, extra_context)
+        term = request.GET.get(SEARCH_VAR, '').strip()
+        changelist = getattr(response, 'context_data', {}).get('cl')
+        if not term or changelist is None:
+            return response
+        archive_admin = self.admin_site._registry[ArchivedReservation]
+        archived, _distinct = archive_admin.get_search_results(request, ArchivedReservation.objects.all(), term)
+        if not archived.exists():
+            return response
+        url = f"{reverse('admin:reservasi_backend_archivedreservation_changelist')}?{urlencode({SEARCH_VAR: term})}"
+        if not changelist.result_list:
+            return redirect(url)
+        messages.info(request, format_html(
+            'Sebagian reservasi yang cocok sudah diarsipkan. <a href="{}">Lihat hasil di arsip</a>.', url
+        ))
+        return response
+
+    def change_view(self, request, object_id, form_url='', extra_context=None):
+        # Reservasi lama sudah dipindah ke arsip dengan id yang sama
+        if (
+            str(object_id).isdigit()
+            and not Reservation.objects.filter(pk=object_id).exists()
+            and ArchivedReservation.objects.filter(pk=object_id).exists()
+        ):
+            return redirect('admin:reservasi_backend_archivedreservation_change', object_id)
+        return super().change_view(request, object_id, form_url, extra_context)
+
+    def get_urls(self):
+        custom = [
+            path('analytics/', self.admin_site.admin_view(self.analytics_view), name='reservasi_backend_reservation_analytics'),
+            path('analytics/export/', self.admin_site.admin_view(self.analytics_export), name='reservasi_backend_reservation_analytics_export'),
+        ]
+        return custom + super().get_urls()
+
+    def analytics_form(self, request):
+        today = timezone.localdate()
+        data = request.GET if 'start' in request.GET else {
+            'start': today - timedelta(days=30), 'end': today, 'group_by': 'hotel',
+        }
+        return AnalyticsForm(data)
+
+    def analytics_params(self, form):
+        data = form.cleaned_data
+        hotel_ids = [hotel.pk for hotel in data['hotels']] or None
+        return data['start'], data['end'], data['group_by'], hotel_ids
+
+    def analytics_view(self, request):
+        form = self.analytics_form(request)
+        report = summary(*self.analytics_params(form)) if form.is_valid() else None
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': _("Analitik Okupansi & Pendapatan"),
+            'form': form,
+            'report': report,
+            'query': request.GET.urlencode(),
+        }
+        return TemplateResponse(request, 'admin/reservasi_backend/reservation/analytics.html', context)
+
+    def analytics_export(self, request):
+        form = self.analytics_form(request)
+        if not form.is_valid():
+            return self.analytics_view(request)
+        start, end, group_by, hotel_ids = self.analytics_params(form)
+
+        class Echo:
+            def write(self, value):
+                return value
+
+        writer = csv.writer(Echo())
+        header = [group_by + '_id', 'nama', 'tanggal', 'kamar', 'terjual', 'pendapatan', 'okupansi', 'adr', 'revpar', 'pembatalan']
+        rows = (writer.writerow(row) for row in chain([header], daily_rows(start, end, group_by, hotel_ids)))
+        response = StreamingHttpResponse(rows, content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="analitik_{group_by}_{start}_{end}.csv"'
+        return response
+
     def mark_as_checked_in(self, request, queryset):
-        updated = queryset.filter(status__in=['PENDING', 'PAID']).update(status='CHECKED_IN')
+        with transaction.atomic():
+            record_status_change(queryset.filter(status__in=['PENDING', 'PAID']), 'CHECKED_IN')
+            updated = queryset.filter(status__in=['PENDING', 'PAID']).update(status='CHECKED_IN')
         self.message_user(request, f"{updated} reservasi telah ditandai sebagai Check-in.")
     mark_as_checked_in.short_description = _("Tandai sebagai Check-in")
 
     def mark_as_checked_out(self, request, queryset):
-        updated = queryset.filter(status='CHECKED_IN').update(status='CHECKED_OUT')
+        with transaction.atomic():
+            # update() melewati signal, jadi jatah kamar dikembalikan di sini
+            release_many(queryset.filter(status='CHECKED_IN'))
+            record_status_change(queryset.filter(status='CHECKED_IN'), 'CHECKED_OUT')
+            updated = queryset.filter(status='CHECKED_IN').update(status='CHECKED_OUT')
         self.message_user(request, f"{updated} reservasi telah ditandai sebagai Check-out.")
     mark_as_checked_out.short_description = _("Tandai sebagai Check-out")
 
     def mark_as_cancelled(self, request, queryset):
-        updated = queryset.filter(status__in=['PENDING', 'PAID']).update(status='CANCELLED')
+        with transaction.atomic():
+            match_on_commit(freed_ranges(queryset.filter(status__in=['PENDING', 'PAID'])))
+            release_many(queryset.filter(status__in=['PENDING', 'PAID']))
+            record_status_change(queryset.filter(status__in=['PENDING', 'PAID']), 'CANCELLED')
+            updated = queryset.filter(status__in=['PENDING', 'PAID']).update(status='CANCELLED')
         self.message_user(request, f"{updated} reservasi telah dibatalkan.")
     mark_as_cancelled.short_description = _("Batalkan reservasi")
 
+# ====================
+# Booking Admin
+# ====================
+@admin.register(Booking)
+class BookingAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'hotel', 'check_in', 'check_out', 'total_price', 'status', 'created_at']
+    search_fields = ['user__username', 'hotel__name']
+    list_filter = ['status', 'hotel']
+    list_select_related = ['user', 'hotel']
+    ordering = ['-created_at']
+    inlines = [BookingReservationInline, BookingPaymentInline]
+    readonly_fields = ['created_at', 'total_price']
+    actions = ['mark_as_cancelled']
+
+    def mark_as_cancelled(self, request, queryset):
+        with transaction.atomic():
+            bookings = queryset.exclude(status='CANCELLED')
+            reservations = Reservation.objects.filter(booking__in=bookings, status__in=['PENDING', 'PAID'])
+            match_on_commit(freed_ranges(reservations))
+            release_many(reservations)
+            record_status_change(reservations, 'CANCELLED')
+            reservations.update(status='CANCELLED')
+            updated = bookings.update(status='CANCELLED')
+        self.message_user(request, f"{updated} pemesanan grup telah dibatalkan.")
+    mark_as_cancelled.short_description = _("Batalkan pemesanan grup")
+
+# ====================
+# Waitlist Admin
+# ====================
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'hotel', 'room_type', 'check_in', 'check_out', 'status', 'offer_expires_at', 'created_at']
+    search_fields = ['user__username', 'first_name', 'last_name', 'hotel__name']
+    list_filter = ['status', 'hotel']
+    list_select_related = ['user', 'hotel', 'room_type']
+    date_hierarchy = 'check_in'
+    ordering = ['status', 'created_at']
+    readonly_fields = ['reservation', 'offer_expires_at', 'created_at']
+    actions = ['mark_as_cancelled']
+
+    def mark_as_cancelled(self, request, queryset):
+        updated = queryset.filter(status='WAITING').update(status='CANCELLED')
+        self.message_user(request, f"{updated} daftar tunggu telah dibatalkan.")
+    mark_as_cancelled.short_description = _("Batalkan daftar tunggu")
+
+# ====================
+# Inventory Admin
+# ====================
+@admin.register(RoomTypeInventory)
+class RoomTypeInventoryAdmin(admin.ModelAdmin):
+    list_display = ['room_type', 'date', 'total', 'booked', 'free']
+    list_filter = ['room_type__hotel']
+    list_select_related = ['room_type']
+    date_hierarchy = 'date'
+    ordering = ['date', 'room_type']
+    readonly_fields = ['room_type', 'date', 'total', 'booked']
+
+@admin.register(RoomRate)
+class RoomRateAdmin(admin.ModelAdmin):
+    # Diisi manage.py reprice; harga jual = base_price tipe kamar saat ini x pengali, kolom price hanya
+    # catatan run terakhir
+    list_display = ['room_type', 'date', 'rooms', 'rooms_sold', 'pace', 'base_price', 'multiplier', 'price']
+    list_filter = ['room_type__hotel']
+    list_select_related = ['room_type']
+    date_hierarchy = 'date'
+    ordering = ['date', 'room_type']
+    readonly_fields = ['room_type', 'date', 'rooms', 'rooms_sold', 'pace', 'base_price', 'multiplier', 'price',
+                       'updated_at']
+
+@admin.register(DailyHotelStats)
+class DailyHotelStatsAdmin(admin.ModelAdmin):
+    list_display = ['hotel', 'room_type', 'date', 'rooms_sold', 'revenue', 'cancellations']
+    list_filter = ['hotel']
+    list_select_related = ['hotel', 'room_type']
+    date_hierarchy = 'date'
+    ordering = ['-date', 'hotel']
+    readonly_fields = ['hotel', 'room_type', 'date', 'rooms_sold', 'revenue', 'cancellations']
+
+@admin.register(HotelSimilarity)
+class HotelSimilarityAdmin(admin.ModelAdmin):
+    # Diisi manage.py build_similar_hotels
+    list_display = ['hotel', 'rank', 'similar_hotel', 'score', 'computed_at']
+    list_filter = ['hotel__region']
+    list_select_related = ['hotel', 'similar_hotel']
+    ordering = ['hotel', 'rank']
+    readonly_fields = ['hotel', 'similar_hotel', 'rank', 'score', 'computed_at']
+
+# ====================
+# Archived Reservation Admin
+# ====================
+@admin.register(ArchivedReservation)
+class ArchivedReservationAdmin(EstimatedCountMixin, BoundedSearchMixin, admin.ModelAdmin):
+    list_display = ['id', 'user', 'room', 'room_type', 'check_in', 'check_out', 'total_price', 'status', 'created_at', 'archived_at']
+    search_fields = ['user__username', 'room__number', 'room__hotel__name']
+    search_prefix_lookups = {
+        'user': (User, 'username'),
+        'room': (Room, 'number'),
+    }
+    list_filter = ['status', ArchivedHotelListFilter]
+    list_select_related = ['user', 'room__hotel', 'room__room_type', 'room_type__hotel']
+    ordering = ['-created_at']
+    inlines = [ArchivedPaymentInline, ArchivedReviewInline]
+
+    # Arsip hanya untuk dibaca
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 # ====================
 # Payment Admin
 # ====================
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
-    list_display = ['reservation', 'method', 'is_paid', 'paid_at', 'proof']
+    list_display = ['reservation', 'booking', 'method', 'is_paid', 'paid_at', 'proof']
     actions = ['mark_as_paid']
 
     def mark_as_paid(self, request, queryset):
-        queryset.update(is_paid=True, paid_at=timezone.now())
-        for payment in queryset:
-            payment.reservation.status = 'PAID'
-            payment.reservation.save()
+        # Jalur yang sama dengan rekonsiliasi mutasi; pembayaran grup melunasi semua reservasinya
+        updated = mark_payments_paid(queryset.values_list('pk', flat=True))
+        self.message_user(request, f"{updated} pembayaran ditandai lunas.")
     mark_as_paid.short_description = "Tandai sebagai Lunas"
 
+# ====================
+# Mutasi Rekening
+# ====================
+@admin.register(StatementLine)
+class StatementLineAdmin(admin.ModelAdmin):
+    # Antrean tinjauan = filter "Sudah Ditangani: Tidak"
+    list_display = ['source', 'line_number', 'posted_on', 'amount', 'reference', 'reason', 'payment', 'is_resolved']
+    list_filter = ['is_resolved', 'reason', 'source']
+    list_select_related = ['payment']
+    search_fields = ['reference', 'description']
+    ordering = ['is_resolved', '-created_at']
+    readonly_fields = ['source', 'line_number', 'posted_on', 'amount', 'reference', 'description', 'payment', 'reason',
+                       'created_at']
+    actions = ['mark_as_resolved']
+
+    def has_add_permission(self, request):
+        return False
+
+    def mark_as_resolved(self, request, queryset):
+        updated = queryset.filter(is_resolved=False).update(is_resolved=True)
+        self.message_user(request, f"{updated} baris mutasi ditandai sudah ditangani.")
+    mark_as_resolved.short_description = _("Tandai sudah ditangani")
+
 # ====================
 # Review Admin
 # ====================
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
-    list_display = ['reservation', 'rating', 'comment', 'created_at']
-    search_fields = ['reservation__user__username', 'reservation__room__number', 'reservation__room__hotel__name', 'comment']
-    list_filter = ['rating', 'created_at']
+class ReviewAdmin(EstimatedCountMixin, BoundedSearchMixin, admin.ModelAdmin):
+    list_display = ['reservation', 'archived_reservation', 'rating', 'comment', 'created_at']
+    list_select_related = ['reservation__room__hotel', 'reservation__room__room_type', 'archived_reservation__room__hotel',
+                           'archived_reservation__room__room_type']
+    search_fields = ['reservation__user__username', 'reservation__room__number', 'hotel__name', 'comment']
+    search_prefix_lookups = {
+        'hotel': (Hotel, 'name'),
+        'reservation__user': (User, 'username'),
+        'reservation__room': (Room, 'number'),
+    }
+    list_filter = ['rating', HotelListFilter]
+    date_hierarchy = 'created_at'
+    ordering = ['-created_at', '-id']
     readonly_fields = ['created_at']
\ No newline at end of file
@@ -0,0 +1,234 @@
+from datetime import timedelta
+import numpy as np
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, Sum
+from .models import ArchivedReservation, DailyHotelStats, Hotel, Reservation, Room, RoomType
+from .stats import SOLD_STATUSES
+
+# ======================
+# Analitik Okupansi & Pendapatan
+# ======================
+GROUP_FIELDS = {
+    'hotel': 'room__hotel_id',
+    'room_type': 'room__room_type_id',
+}
+
+
+def day_index(dates, start):
+    return (dates - np.datetime64(start, 'D')).astype(np.int64)
+
+
+def load_reservations(start, end, group_by='hotel', hotel_ids=None):
+    # Satu query per tabel (aktif dan arsip), hasilnya langsung menjadi array kolom
+    rows = []
+    for model in (Reservation, ArchivedReservation):
+        reservations = model.objects.filter(
+            status__in=SOLD_STATUSES, check_in__lt=end, check_out__gt=start
+        )
+        if hotel_ids:
+            reservations = reservations.filter(room__hotel_id__in=hotel_ids)
+        rows += reservations.values_list(GROUP_FIELDS[group_by], 'check_in', 'check_out', 'total_price')
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty.astype('datetime64[D]'), empty.astype('datetime64[D]'), empty.astype(np.float64)
+    keys, check_in, check_out, price = zip(*rows)
+    return (
+        np.fromiter(keys, dtype=np.int64, count=len(rows)),
+        np.array(check_in, dtype='datetime64[D]'),
+        np.array(check_out, dtype='datetime64[D]'),
+        np.array([float(p) for p in price], dtype=np.float64),
+    )
+
+
+def room_supply(group_by='hotel', hotel_ids=None):
+    # Jumlah kamar tersedia per hotel/tipe kamar, dianggap tetap sepanjang rentang
+    rooms = Room.objects.filter(is_available=True)
+    if hotel_ids:
+        rooms = rooms.filter(hotel_id__in=hotel_ids)
+    field = GROUP_FIELDS[group_by].replace('room__', '')
+    return dict(rooms.order_by().values(field).annotate(n=Count('pk')).values_list(field, 'n'))
+
+
+def sweep(start, end, group_by='hotel', hotel_ids=None):
+    # Kamar terjual dan pendapatan per (grup, malam) dengan difference array
+    days = (end - start).days
+    group_ids, check_in, check_out, price = load_reservations(start, end, group_by, hotel_ids)
+    supply_by_id = room_supply(group_by, hotel_ids)
+    keys = np.array(sorted(set(supply_by_id) | set(group_ids.tolist())), dtype=np.int64)
+    rows = np.searchsorted(keys, group_ids)
+
+    nights = (check_out - check_in).astype(np.int64)
+    # Dibulatkan ke sen seperti stats.night_rate agar sama dengan rollup
+    rate = np.round(np.divide(price, nights, out=np.zeros_like(price), where=nights > 0), 2)
+    first = np.clip(day_index(check_in, start), 0, days)
+    last = np.clip(day_index(check_out, start), 0, days)
+
+    # +1 di malam pertama, -1 setelah malam terakhir, lalu cumsum per baris
+    sold_diff = np.zeros((len(keys), days + 1), dtype=np.int64)
+    revenue_diff = np.zeros((len(keys), days + 1), dtype=np.float64)
+    np.add.at(sold_diff, (rows, first), 1)
+    np.add.at(sold_diff, (rows, last), -1)
+    np.add.at(revenue_diff, (rows, first), rate)
+    np.add.at(revenue_diff, (rows, last), -rate)
+
+    return {
+        'keys': keys,
+        'dates': [start + timedelta(days=i) for i in range(days)],
+        'sold': np.cumsum(sold_diff, axis=1)[:, :days],
+        'revenue': np.cumsum(revenue_diff, axis=1)[:, :days],
+        'supply': np.array([supply_by_id.get(k, 0) for k in keys.tolist()], dtype=np.int64),
+    }
+
+
+def rollup(start, end, group_by='hotel', hotel_ids=None):
+    # Bentuk hasil sama dengan sweep(), tetapi dibaca dari tabel DailyHotelStats
+    days = (end - start).days
+    field = GROUP_FIELDS[group_by].replace('room__', '')
+    stats = DailyHotelStats.objects.filter(date__gte=start, date__lt=end)
+    if hotel_ids:
+        stats = stats.filter(hotel_id__in=hotel_ids)
+    rows = list(
+        stats.order_by().values(field, 'date').annotate(
+            sold=Sum('rooms_sold'), revenue=Sum('revenue'), cancelled=Sum('cancellations')
+        ).values_list(field, 'date', 'sold', 'revenue', 'cancelled')
+    )
+    supply_by_id = room_supply(group_by, hotel_ids)
+    keys = np.array(sorted(set(supply_by_id) | {row[0] for row in rows}), dtype=np.int64)
+    sold = np.zeros((len(keys), days), dtype=np.int64)
+    revenue = np.zeros((len(keys), days), dtype=np.float64)
+    cancelled = np.zeros((len(keys), days), dtype=np.int64)
+    if rows:
+        group_ids, dates, row_sold, row_revenue, row_cancelled = zip(*rows)
+        i = np.searchsorted(keys, np.array(group_ids, dtype=np.int64))
+        j = day_index(np.array(dates, dtype='datetime64[D]'), start)
+        sold[i, j] = row_sold
+        revenue[i, j] = [float(value) for value in row_revenue]
+        cancelled[i, j] = row_cancelled
+    return {
+        'keys': keys,
+        'dates': [start + timedelta(days=i) for i in range(days)],
+        'sold': sold,
+        'revenue': revenue,
+        'cancelled': cancelled,
+        'supply': np.array([supply_by_id.get(k, 0) for k in keys.tolist()], dtype=np.int64),
+    }
+
+
+def ratios(sold, revenue, supply):
+    # Okupansi = terjual / tersedia, ADR = pendapatan / terjual, RevPAR = pendapatan / tersedia
+    with np.errstate(divide='ignore', invalid='ignore'):
+        occupancy = np.where(supply > 0, sold / supply, 0.0)
+        adr = np.where(sold > 0, revenue / np.maximum(sold, 1), 0.0)
+        revpar = np.where(supply > 0, revenue / supply, 0.0)
+    return occupancy, adr, revpar
+
+
+def group_labels(keys, group_by):
+    if group_by == 'room_type':
+        return {
+            pk: f"{name} - {hotel}"
+            for pk, name, hotel in RoomType.objects.filter(pk__in=keys).values_list('pk', 'name', 'hotel__name')
+        }
+    return dict(Hotel.objects.filter(pk__in=keys).values_list('pk', 'name'))
+
+
+def summary(start, end, group_by='hotel', hotel_ids=None):
+    # Ringkasan per grup untuk seluruh rentang, diurutkan dari pendapatan terbesar
+    data = rollup(start, end, group_by, hotel_ids)
+    days = len(data['dates'])
+    sold = data['sold'].sum(axis=1)
+    revenue = data['revenue'].sum(axis=1)
+    cancelled = data['cancelled'].sum(axis=1)
+    available = data['supply'] * days
+    occupancy, adr, revpar = ratios(sold, revenue, available)
+    labels = group_labels(data['keys'].tolist(), group_by)
+    rows = [
+        {
+            'id': key,
+            'name': labels.get(key, key),
+            'rooms': int(data['supply'][i]),
+            'sold': int(sold[i]),
+            'revenue': float(revenue[i]),
+            'occupancy': float(occupancy[i]),
+            'adr': float(adr[i]),
+            'revpar': float(revpar[i]),
+            'cancelled': int(cancelled[i]),
+        }
+        for i, key in enumerate(data['keys'].tolist())
+    ]
+    rows.sort(key=lambda row: row['revenue'], reverse=True)
+
+    total_sold = data['sold'].sum(axis=0)
+    total_revenue = data['revenue'].sum(axis=0)
+    total_cancelled = data['cancelled'].sum(axis=0)
+    total_supply = np.full(days, data['supply'].sum())
+    occupancy, adr, revpar = ratios(total_sold, total_revenue, total_supply)
+    daily = [
+        {
+            'date': day,
+            'sold': int(total_sold[i]),
+            'revenue': float(total_revenue[i]),
+            'occupancy': float(occupancy[i]),
+            'adr': float(adr[i]),
+            'revpar': float(revpar[i]),
+            'cancelled': int(total_cancelled[i]),
+        }
+        for i, day in enumerate(data['dates'])
+    ]
+    return {'groups': rows, 'daily': daily}
+
+
+def daily_rows(start, end, group_by='hotel', hotel_ids=None):
+    # Baris (grup, tanggal, ...) untuk ekspor CSV
+    data = rollup(start, end, group_by, hotel_ids)
+    supply = data['supply'][:, None]
+    occupancy, adr, revpar = ratios(data['sold'], data['revenue'], np.broadcast_to(supply, data['sold'].shape))
+    labels = group_labels(data['keys'].tolist(), group_by)
+    for i, key in enumerate(data['keys'].tolist()):
+        for j, day in enumerate(data['dates']):
+            yield (
+                key, labels.get(key, key), day.isoformat(), int(data['supply'][i]), int(data['sold'][i, j]),
+                round(float(data['revenue'][i, j]), 2), round(float(occupancy[i, j]), 4),
+                round(float(adr[i, j]), 2), round(float(revpar[i, j]), 2), int(data['cancelled'][i, j]),
+            )
+
+# ======================
+# Bangun Ulang Rollup
+# ======================
+def rebuild_daily_stats(start, end, hotel_ids=None, batch_size=2000):
+    # Hitung ulang satu jendela tanggal dengan sweep, lalu ganti baris rollup-nya
+    data = sweep(start, end, 'room_type', hotel_ids)
+    keys = data['keys'].tolist()
+    hotel_by_type = dict(RoomType.objects.filter(pk__in=keys).values_list('pk', 'hotel_id'))
+    cancelled = np.zeros_like(data['sold'])
+    for model in (Reservation, ArchivedReservation):
+        cancellations = model.objects.filter(status='CANCELLED', check_in__gte=start, check_in__lt=end)
+        if hotel_ids:
+            cancellations = cancellations.filter(room__hotel_id__in=hotel_ids)
+        rows = cancellations.order_by().values('room_type_id', 'check_in').annotate(n=Count('pk'))
+        for room_type_id, check_in, n in rows.values_list('room_type_id', 'check_in', 'n'):
+            i = int(np.searchsorted(data['keys'], room_type_id))
+            if i < len(keys) and keys[i] == room_type_id:
+                cancelled[i, (check_in - start).days] += n
+
+    i_idx, j_idx = np.nonzero((data['sold'] != 0) | (data['revenue'] != 0) | (cancelled != 0))
+    objects = [
+        DailyHotelStats(
+            room_type_id=keys[i],
+            hotel_id=hotel_by_type[keys[i]],
+            date=data['dates'][j],
+            rooms_sold=int(data['sold'][i, j]),
+            revenue=Decimal(str(round(float(data['revenue'][i, j]), 2))),
+            cancellations=int(cancelled[i, j]),
+        )
+        for i, j in zip(i_idx.tolist(), j_idx.tolist())
+        if keys[i] in hotel_by_type
+    ]
+    stale = DailyHotelStats.objects.filter(date__gte=start, date__lt=end)
+    if hotel_ids:
+        stale = stale.filter(hotel_id__in=hotel_ids)
+    with transaction.atomic():
+        stale.delete()
+        DailyHotelStats.objects.bulk_create(objects, batch_size=batch_size)
+    return len(objects)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ReservasiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reservasi_backend'
+
+    def ready(self):
+        from . import signals  # noqa: F401
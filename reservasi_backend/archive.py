@@ -0,0 +1,65 @@
+import threading
+from collections import Counter
+from django.db import transaction
+from django.db.models import F
+from .models import Reservation, Payment, Review, ArchivedReservation, ArchivedPayment
+from .media import change_references
+
+# ======================
+# Arsip Reservasi
+# ======================
+ARCHIVE_STATUSES = ('CHECKED_OUT', 'CANCELLED')
+RESERVATION_FIELDS = (
+    'id', 'user_id', 'room_id', 'room_type_id', 'booking_id', 'first_name', 'last_name', 'email', 'phone',
+    'check_in', 'check_out', 'special_request', 'total_price', 'status', 'created_at',
+)
+PAYMENT_FIELDS = ('id', 'reservation_id', 'method', 'proof', 'is_paid', 'paid_at')
+
+_state = threading.local()
+
+
+def archiving():
+    # Signal reservasi dilewati saat baris dipindah, statistiknya tetap berlaku
+    return getattr(_state, 'active', False)
+
+
+def archivable(cutoff):
+    return Reservation.objects.filter(status__in=ARCHIVE_STATUSES, check_out__lt=cutoff)
+
+
+def archive_batch(ids):
+    # Satu potongan dalam satu transaksi: salin, pindahkan ulasan, lalu hapus dari tabel aktif
+    with transaction.atomic():
+        rows = list(Reservation.objects.filter(pk__in=ids, status__in=ARCHIVE_STATUSES).values(*RESERVATION_FIELDS))
+        if not rows:
+            return 0
+        moved = [row['id'] for row in rows]
+        ArchivedReservation.objects.bulk_create([ArchivedReservation(**row) for row in rows])
+        payments = ArchivedPayment.objects.bulk_create([
+            ArchivedPayment(**row)
+            for row in Payment.objects.filter(reservation_id__in=moved).values(*PAYMENT_FIELDS)
+        ])
+        # Bukti kini dirujuk arsip; signal hapus Payment akan mengurangi rujukan lamanya
+        change_references(Counter(payment.proof.name for payment in payments if payment.proof))
+        Review.objects.filter(reservation_id__in=moved).update(
+            archived_reservation_id=F('reservation_id'), reservation=None
+        )
+        _state.active = True
+        try:
+            Reservation.objects.filter(pk__in=moved).delete()
+        finally:
+            _state.active = False
+    return len(moved)
+
+
+def archive_reservations(cutoff, batch_size=1000):
+    # Keyset per id agar tiap potongan tidak memindai ulang baris sebelumnya
+    last_id = 0
+    while True:
+        ids = list(
+            archivable(cutoff).filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        last_id = ids[-1]
+        yield archive_batch(ids)
@@ -0,0 +1,68 @@
+from decimal import Decimal
+from django.db import transaction
+from .inventory import InventoryUnavailable, reserve, allocate_rooms
+from .models import Booking, Reservation, RoomType
+from .pricing import stay_subtotals
+from .stats import record_states
+
+# ======================
+# Pemesanan Grup
+# ======================
+TAX_RATE = Decimal('0.10')
+MAX_GROUP_ROOMS = 50
+
+
+def stay_price(subtotal):
+    # Jumlah tarif semua malam ditambah pajak
+    return subtotal + subtotal * TAX_RATE
+
+
+def create_group_booking(user, hotel, check_in, check_out, quantities, guest):
+    # Semua kamar dipesan dalam satu transaksi: berhasil semua atau tidak sama sekali
+    quantities = {room_type_id: n for room_type_id, n in quantities.items() if n > 0}
+    if not quantities:
+        raise InventoryUnavailable
+    room_types = RoomType.objects.filter(hotel=hotel, pk__in=quantities).in_bulk()
+    if len(room_types) != len(quantities):
+        raise InventoryUnavailable
+    prices = {
+        pk: stay_price(subtotal)
+        for pk, subtotal in stay_subtotals(room_types.values(), check_in, check_out).items()
+    }
+
+    with transaction.atomic():
+        # Satu UPDATE bersyarat per tipe kamar untuk semua malam dan semua unit
+        for room_type_id, quantity in quantities.items():
+            try:
+                reserve(room_type_id, check_in, check_out, quantity)
+            except InventoryUnavailable:
+                raise InventoryUnavailable(room_types[room_type_id])
+        allocated = allocate_rooms(quantities, check_in, check_out)
+        booking = Booking.objects.create(
+            user=user,
+            hotel=hotel,
+            check_in=check_in,
+            check_out=check_out,
+            total_price=sum(prices[t] * n for t, n in quantities.items()),
+        )
+        # bulk_create tidak memicu signal, inventori sudah dikurangi di atas
+        reservations = Reservation.objects.bulk_create([
+            Reservation(
+                user=user,
+                hotel=hotel,
+                booking=booking,
+                room_id=room_id,
+                room_type_id=room_type_id,
+                check_in=check_in,
+                check_out=check_out,
+                total_price=prices[room_type_id],
+                status='PENDING',
+                **guest,
+            )
+            for room_type_id, room_ids in allocated.items()
+            for room_id in room_ids
+        ])
+        record_states([
+            (r.room_type_id, hotel.pk, r.check_in, r.check_out, r.total_price, r.status) for r in reservations
+        ])
+    return booking
@@ -0,0 +1,90 @@
+import hashlib
+from datetime import timedelta
+import numpy as np
+from django.core.cache import cache
+from django.utils import timezone
+from .analytics import day_index
+from .invalidation import availability_version
+from .inventory import room_counts
+from .models import RoomRate, RoomTypeInventory
+from .search import catalog_version, hotel_detail_data
+
+# ======================
+# Kalender Ketersediaan
+# ======================
+CALENDAR_DAYS = 90
+MAX_CALENDAR_DAYS = 365
+CALENDAR_CACHE_TIMEOUT = 60 * 60
+
+
+def calendar_grid(room_types, start, days):
+    # Sisa kamar & harga per (tipe kamar, malam): satu range query inventori dan satu range query tarif,
+    # malam tanpa baris memakai jumlah kamar dan base_price. Harga = base_price x pengali, sama dengan stay_subtotals
+    room_types = sorted(room_types, key=lambda room_type: room_type.pk)
+    keys = np.array([room_type.pk for room_type in room_types], dtype=np.int64)
+    counts = room_counts(keys.tolist())
+    free = np.repeat(np.array([counts[key] for key in keys.tolist()], dtype=np.int64)[:, None], days, axis=1)
+    price = np.repeat(np.array([float(room_type.base_price) for room_type in room_types])[:, None], days, axis=1)
+    if not len(keys):
+        return room_types, free, price
+    end = start + timedelta(days=days)
+
+    rows = list(RoomTypeInventory.objects.filter(
+        room_type_id__in=keys.tolist(), date__gte=start, date__lt=end
+    ).values_list('room_type_id', 'date', 'total', 'booked'))
+    if rows:
+        type_ids, dates, total, booked = zip(*rows)
+        i = np.searchsorted(keys, np.array(type_ids, dtype=np.int64))
+        j = day_index(np.array(dates, dtype='datetime64[D]'), start)
+        free[i, j] = np.array(total, dtype=np.int64) - np.array(booked, dtype=np.int64)
+
+    rows = list(RoomRate.objects.filter(
+        room_type_id__in=keys.tolist(), date__gte=start, date__lt=end
+    ).values_list('room_type_id', 'date', 'multiplier'))
+    if rows:
+        type_ids, dates, factors = zip(*rows)
+        i = np.searchsorted(keys, np.array(type_ids, dtype=np.int64))
+        j = day_index(np.array(dates, dtype='datetime64[D]'), start)
+        price[i, j] *= [float(factor) for factor in factors]
+    return room_types, np.maximum(free, 0), price
+
+
+def lowest_prices(free, price):
+    # Harga termurah di antara tipe kamar yang masih tersisa; None bila penuh
+    lowest = np.where(free > 0, price, np.inf).min(axis=0, initial=np.inf)
+    return [None if np.isinf(value) else round(float(value)) for value in lowest]
+
+
+def hotel_calendar(hotel_id, days=CALENDAR_DAYS):
+    # Dicache per hotel; kunci ikut versi ketersediaan tiap tipe kamarnya sehingga basi begitu ada
+    # pemesanan, pembatalan, perubahan kamar atau tarif
+    data = hotel_detail_data(hotel_id)
+    if data is None:
+        return None
+    room_types = list(data['hotel'].room_types.all())
+    start = timezone.localdate()
+    versions = ','.join(f'{room_type.pk}:{availability_version(room_type.pk)}' for room_type in room_types)
+    digest = hashlib.blake2b(versions.encode(), digest_size=8).hexdigest()
+    cache_key = f'calendar:{catalog_version()}:{hotel_id}:{start}:{days}:{digest}'
+    calendar = cache.get(cache_key)
+    if calendar is None:
+        room_types, free, price = calendar_grid(room_types, start, days)
+        calendar = {
+            'hotel': hotel_id,
+            'start': start.isoformat(),
+            'days': days,
+            # Total sisa kamar hotel dan harga termurah per malam
+            'free': free.sum(axis=0).tolist(),
+            'price': lowest_prices(free, price),
+            'room_types': [
+                {
+                    'id': room_type.pk,
+                    'name': room_type.name,
+                    'free': free[n].tolist(),
+                    'price': [round(value) for value in price[n].tolist()],
+                }
+                for n, room_type in enumerate(room_types)
+            ],
+        }
+        cache.set(cache_key, calendar, CALENDAR_CACHE_TIMEOUT)
+    return calendar
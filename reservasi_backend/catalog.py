@@ -0,0 +1,411 @@
+import json
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from itertools import groupby
+from django.db import transaction
+from django.utils import timezone
+from .geo import encode
+from .invalidation import bump, bump_availability, bump_hotels
+from .inventory import log_room_totals, refresh_totals
+from .media import change_references
+from .models import (
+    AvailabilityChange, Facility, Hotel, HotelGallery, Room, RoomType,
+    refresh_hotel_cover_images, refresh_hotel_facility_masks, refresh_hotel_min_prices,
+)
+from .search import bump_catalog_version
+from .storage import file_digest
+
+# ======================
+# Impor Katalog Massal
+# ======================
+# Jumlah hotel + kamar per transaksi; memori hanya sebesar satu batch dan peta nama fasilitas
+CATALOG_BATCH_SIZE = 2000
+HOTEL_FIELDS = ('location', 'region', 'description', 'star_rating', 'latitude', 'longitude')
+REGIONS = {value for value, _label in Hotel._meta.get_field('region').choices}
+MAX_PRICE = Decimal('9999999.999')
+# Pemisah nilai ganda (gambar, fasilitas) di CSV
+CSV_SEPARATOR = '|'
+# Hanya sejumlah ini pesan galat yang disimpan, sisanya cukup dihitung
+MAX_REPORTED_ERRORS = 100
+TRUE_VALUES = {'1', 'true', 'ya', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'tidak', 'no', 'n'}
+
+
+def read_jsonl(lines):
+    # Satu hotel per baris: {"name", ..., "images": [...], "room_types": [{"name", "base_price", "rooms": [...]}]}
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, None
+
+
+def split(text):
+    return [part.strip() for part in (text or '').split(CSV_SEPARATOR) if part.strip()]
+
+
+def read_csv(reader):
+    # Satu kamar per baris, baris hotel yang sama harus berurutan; kolom hotel dibaca dari baris pertama
+    # dan baris tanpa room_number hanya membawa data hotel/tipe kamar
+    rows = enumerate(reader, start=2)
+    for _name, group in groupby(rows, key=lambda item: (item[1].get('name') or '').strip()):
+        group = list(group)
+        line_number, first = group[0]
+        record = {key: first[key] for key in ('name', *HOTEL_FIELDS) if first.get(key) not in (None, '')}
+        record['images'] = [path for _line, row in group for path in split(row.get('images'))]
+        room_types = {}
+        for _line, row in group:
+            type_name = (row.get('room_type') or '').strip()
+            if not type_name:
+                continue
+            room_type = room_types.setdefault(type_name, {'name': type_name, 'rooms': []})
+            for key, column in (('base_price', 'base_price'), ('description', 'room_type_description')):
+                if row.get(column) not in (None, ''):
+                    room_type[key] = row[column]
+            if (row.get('room_number') or '').strip():
+                room = {'number': row['room_number']}
+                if row.get('facilities') is not None:
+                    room['facilities'] = split(row['facilities'])
+                if row.get('is_available') not in (None, ''):
+                    room['is_available'] = row['is_available']
+                room_type['rooms'].append(room)
+        record['room_types'] = list(room_types.values())
+        yield line_number, record
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"Nilai is_available tidak valid: {value!r}.")
+
+
+def parse_float(value, low, high, label):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{label} tidak valid: {value!r}.")
+    if not low <= number <= high:
+        raise ValueError(f"{label} di luar rentang: {value!r}.")
+    return number
+
+
+def clean_record(record):
+    # Mengembalikan (hotel, images, room_types) yang sudah dinormalisasi; ValueError bila tidak valid
+    if not isinstance(record, dict):
+        raise ValueError("Baris bukan objek JSON.")
+    name = str(record.get('name') or '').strip()
+    if not name or len(name) > 100:
+        raise ValueError("Nama hotel kosong atau lebih dari 100 karakter.")
+    hotel = {'name': name}
+    for key in HOTEL_FIELDS:
+        if record.get(key) not in (None, ''):
+            hotel[key] = record[key]
+    if 'location' in hotel:
+        hotel['location'] = str(hotel['location']).strip()[:200]
+    if 'region' in hotel and hotel['region'] not in REGIONS:
+        raise ValueError(f"Region tidak dikenal: {hotel['region']!r}.")
+    if 'star_rating' in hotel:
+        hotel['star_rating'] = int(parse_float(hotel['star_rating'], 0, 5, "Rating bintang"))
+    if 'latitude' in hotel:
+        hotel['latitude'] = parse_float(hotel['latitude'], -90, 90, "Lintang")
+    if 'longitude' in hotel:
+        hotel['longitude'] = parse_float(hotel['longitude'], -180, 180, "Bujur")
+
+    images = []
+    for path in record.get('images') or ():
+        path = str(path).strip()
+        if path and path not in images:
+            images.append(path)
+
+    room_types = {}
+    for room_type in record.get('room_types') or ():
+        if not isinstance(room_type, dict) or not all(isinstance(room, dict) for room in room_type.get('rooms') or ()):
+            raise ValueError("Struktur room_types tidak valid.")
+        type_name = str(room_type.get('name') or '').strip()
+        if not type_name or len(type_name) > 100:
+            raise ValueError("Nama tipe kamar kosong atau lebih dari 100 karakter.")
+        cleaned = room_types.setdefault(type_name, {'name': type_name, 'rooms': {}})
+        if room_type.get('base_price') not in (None, ''):
+            try:
+                price = Decimal(str(room_type['base_price'])).quantize(Decimal('0.001'))
+            except InvalidOperation:
+                raise ValueError(f"Harga tipe kamar {type_name} tidak valid.")
+            if not 0 <= price <= MAX_PRICE:
+                raise ValueError(f"Harga tipe kamar {type_name} di luar rentang.")
+            cleaned['base_price'] = price
+        if room_type.get('description') not in (None, ''):
+            cleaned['description'] = str(room_type['description'])
+        for room in room_type.get('rooms') or ():
+            number = str(room.get('number') or '').strip()
+            if not number or len(number) > 10:
+                raise ValueError("Nomor kamar kosong atau lebih dari 10 karakter.")
+            facilities = room.get('facilities')
+            if facilities is not None:
+                facilities = sorted({str(facility).strip()[:100] for facility in facilities if str(facility).strip()})
+            cleaned['rooms'][number] = {
+                'is_available': parse_bool(room.get('is_available', True)),
+                'facilities': facilities,
+            }
+    return hotel, images, list(room_types.values())
+
+
+def report(errors, line_number, message):
+    if len(errors) < MAX_REPORTED_ERRORS:
+        errors.append((line_number, message))
+
+
+class FacilityMap:
+    # Peta nama -> (id, bit) dimuat sekali; fasilitas baru dibuat lewat save() agar dapat bit
+    def __init__(self):
+        self.by_name = {}
+        for pk, name, bit in Facility.objects.order_by('pk').values_list('pk', 'name', 'bit'):
+            self.by_name.setdefault(name, (pk, bit))
+
+    def resolve(self, names):
+        for name in names:
+            if name not in self.by_name:
+                facility = Facility.objects.create(name=name)
+                self.by_name[name] = (facility.pk, facility.bit)
+
+    def mask(self, names):
+        mask = 0
+        for name in names:
+            bit = self.by_name[name][1]
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def exact(self, names):
+        # Mask hanya mewakili himpunan fasilitas bila semuanya punya bit
+        return all(self.by_name[name][1] is not None for name in names)
+
+
+def import_catalog(records, batch_size=CATALOG_BATCH_SIZE):
+    # records: iterable (nomor baris, dict) dari read_jsonl/read_csv, dibaca sekali jalan.
+    # Upsert per batch dengan kunci alami nama hotel, (hotel, nama tipe kamar), nomor kamar dan
+    # (hotel, path gambar); kolom turunan dihitung ulang sekali per batch karena bulk tidak memicu signal
+    facilities = FacilityMap()
+    counts = Counter()
+    errors = []
+    touched = set()
+    batch = {}
+    size = 0
+
+    def flush():
+        with transaction.atomic():
+            touched.update(load_batch(list(batch.values()), facilities, counts, errors))
+        batch.clear()
+
+    for line_number, record in records:
+        counts['records'] += 1
+        try:
+            hotel, images, room_types = clean_record(record)
+        except ValueError as e:
+            counts['invalid'] += 1
+            report(errors, line_number, str(e))
+            continue
+        # Hotel yang sama dua kali dalam satu batch dimuat di batch terpisah agar baris terakhir yang menang
+        if hotel['name'] in batch:
+            flush()
+            size = 0
+        batch[hotel['name']] = (line_number, hotel, images, room_types)
+        size += 1 + sum(len(room_type['rooms']) for room_type in room_types)
+        if size >= batch_size:
+            flush()
+            size = 0
+    if batch:
+        flush()
+
+    if touched:
+        bump('hotel', 'room_type', 'room')
+        bump_catalog_version()
+        bump_hotels(*touched)
+    return counts, errors
+
+
+def image_digest(storage, path):
+    # Hash isi untuk deduplikasi unggahan galeri; path yang belum ada di storage dibiarkan kosong
+    try:
+        with storage.open(path, 'rb') as image:
+            return file_digest(image)
+    except OSError:
+        return ''
+
+
+def load_batch(batch, facilities, counts, errors):
+    # Mengembalikan id hotel yang tersentuh (termasuk hotel lama dari kamar yang dipindah)
+    facilities.resolve({
+        name
+        for _line, _hotel, _images, room_types in batch
+        for room_type in room_types
+        for room in room_type['rooms'].values()
+        for name in room['facilities'] or ()
+    })
+
+    # Hotel
+    existing = {}
+    for hotel in Hotel.objects.filter(name__in=[hotel['name'] for _line, hotel, _i, _r in batch]).order_by('-pk'):
+        existing[hotel.name] = hotel
+    hotels, created, updated, fields = {}, [], [], set()
+    for line_number, data, _images, _room_types in batch:
+        hotel = existing.get(data['name'])
+        if hotel is None:
+            if 'location' not in data or 'region' not in data:
+                counts['invalid'] += 1
+                report(errors, line_number, f"Hotel baru {data['name']} wajib punya location dan region.")
+                continue
+            hotel = Hotel(**data)
+            created.append(hotel)
+        else:
+            changed = {key for key, value in data.items() if getattr(hotel, key) != value}
+            for key in changed:
+                setattr(hotel, key, data[key])
+            if changed:
+                fields.update(changed)
+                updated.append(hotel)
+        if hotel.latitude is not None and hotel.longitude is not None:
+            hotel.geohash = encode(hotel.latitude, hotel.longitude)
+        hotels[data['name']] = hotel
+    if {'latitude', 'longitude'} & fields:
+        fields.add('geohash')
+    Hotel.objects.bulk_create(created)
+    if updated:
+        Hotel.objects.bulk_update(updated, sorted(fields))
+    counts['hotels_created'] += len(created)
+    counts['hotels_updated'] += len(updated)
+    batch = [item for item in batch if item[1]['name'] in hotels]
+    hotel_ids = {hotel.pk for hotel in hotels.values()}
+
+    # Galeri
+    gallery = set(HotelGallery.objects.filter(hotel_id__in=hotel_ids).values_list('hotel_id', 'image'))
+    storage = HotelGallery._meta.get_field('image').storage
+    images = [
+        HotelGallery(hotel_id=hotels[data['name']].pk, image=path, content_hash=image_digest(storage, path))
+        for _line, data, paths, _room_types in batch
+        for path in paths
+        if (hotels[data['name']].pk, path) not in gallery
+    ]
+    HotelGallery.objects.bulk_create(images)
+    # bulk_create melewati signal galeri, jadi refcount media dinaikkan di sini
+    change_references(Counter(image.image.name for image in images))
+    counts['images'] += len(images)
+
+    # Tipe kamar
+    room_types = {
+        (room_type.hotel_id, room_type.name): room_type
+        for room_type in RoomType.objects.filter(hotel_id__in=hotel_ids).order_by('-pk')
+    }
+    created, updated, priced = [], [], []
+    for line_number, data, _images, types in batch:
+        hotel = hotels[data['name']]
+        for item in types:
+            room_type = room_types.get((hotel.pk, item['name']))
+            if room_type is None:
+                if 'base_price' not in item:
+                    counts['invalid'] += 1
+                    report(errors, line_number, f"Tipe kamar baru {item['name']} wajib punya base_price.")
+                    continue
+                room_type = RoomType(hotel=hotel, name=item['name'], base_price=item['base_price'],
+                                     description=item.get('description'))
+                created.append(room_type)
+                priced.append(room_type)
+                room_types[hotel.pk, item['name']] = room_type
+                continue
+            changed = False
+            if 'base_price' in item and room_type.base_price != item['base_price']:
+                room_type.base_price = item['base_price']
+                priced.append(room_type)
+                changed = True
+            if 'description' in item and room_type.description != item['description']:
+                room_type.description = item['description']
+                changed = True
+            if changed:
+                updated.append(room_type)
+    RoomType.objects.bulk_create(created)
+    RoomType.objects.bulk_update(updated, ['base_price', 'description'])
+    counts['room_types_created'] += len(created)
+    counts['room_types_updated'] += len(updated)
+    AvailabilityChange.objects.bulk_create([
+        AvailabilityChange(kind='PRICE', room_type_id=room_type.pk, price=room_type.base_price)
+        for room_type in priced
+    ])
+    bump_availability(*(room_type.pk for room_type in priced))
+
+    # Kamar; nomor kamar unik di seluruh sistem sehingga nomor milik hotel lain ditolak
+    wanted = {}
+    for line_number, data, _images, types in batch:
+        hotel = hotels[data['name']]
+        for item in types:
+            room_type = room_types.get((hotel.pk, item['name']))
+            if room_type is None:
+                continue
+            for number, room in item['rooms'].items():
+                if number in wanted and wanted[number][0].pk != hotel.pk:
+                    counts['rooms_rejected'] += 1
+                    report(errors, line_number, f"Nomor kamar {number} sudah dipakai {wanted[number][0].name}.")
+                    continue
+                wanted[number] = (hotel, room_type, room, line_number)
+    existing = {
+        row[0]: row[1:]
+        for row in Room.objects.filter(number__in=list(wanted)).values_list(
+            'number', 'pk', 'hotel_id', 'room_type_id', 'is_available', 'facility_mask'
+        )
+    }
+    created, updated, linked = [], [], []
+    deltas = Counter()
+    for number, (hotel, room_type, room, line_number) in wanted.items():
+        previous = existing.get(number)
+        if previous is not None and previous[1] != hotel.pk:
+            counts['rooms_rejected'] += 1
+            report(errors, line_number, f"Nomor kamar {number} sudah dipakai hotel lain.")
+            continue
+        names = room['facilities']
+        mask = facilities.mask(names) if names is not None else (previous[4] if previous else 0)
+        instance = Room(hotel=hotel, number=number, room_type=room_type,
+                        is_available=room['is_available'], facility_mask=mask)
+        if previous is None:
+            created.append(instance)
+        else:
+            instance.pk = previous[0]
+            # Impor ulang berkas yang sama tidak menulis apa-apa
+            if previous[2:] == (room_type.pk, room['is_available'], mask) and (
+                names is None or facilities.exact(names)
+            ):
+                continue
+            updated.append(instance)
+            if previous[3]:
+                deltas[previous[2]] -= 1
+        if room['is_available']:
+            deltas[room_type.pk] += 1
+        if names is not None:
+            linked.append((instance, names))
+    Room.objects.bulk_create(created)
+    Room.objects.bulk_update(updated, ['room_type', 'is_available', 'facility_mask'])
+    counts['rooms_created'] += len(created)
+    counts['rooms_updated'] += len(updated)
+
+    # Fasilitas kamar langsung lewat tabel through, diganti utuh hanya untuk kamar yang menyebut fasilitasnya
+    through = Room.facilities.through
+    updated_ids = {room.pk for room in updated}
+    through.objects.filter(room_id__in=[room.pk for room, _names in linked if room.pk in updated_ids]).delete()
+    through.objects.bulk_create([
+        through(room_id=room.pk, facility_id=facilities.by_name[name][0])
+        for room, names in linked
+        for name in names
+    ])
+
+    # Kolom turunan & inventori yang biasanya dijaga signal
+    deltas = {room_type_id: delta for room_type_id, delta in deltas.items() if delta}
+    refresh_totals(deltas, start=timezone.localdate())
+    log_room_totals(deltas)
+    refresh_hotel_min_prices(hotel_ids)
+    refresh_hotel_facility_masks(hotel_ids)
+    refresh_hotel_cover_images(hotel_ids)
+    return hotel_ids
@@ -0,0 +1,49 @@
+from collections import defaultdict
+from .inventory import nights
+from .models import AvailabilityChange
+
+# ======================
+# Feed Ketersediaan untuk Channel Manager
+# ======================
+FEED_BATCH_SIZE = 500
+MAX_FEED_BATCH_SIZE = 5000
+
+
+def availability_feed(cursor=0, limit=FEED_BATCH_SIZE):
+    # Delta ringkas sejak kursor; membaca dari kursor 0 menghasilkan keadaan lengkap
+    rows = list(AvailabilityChange.objects.filter(pk__gt=cursor).order_by('pk')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    per_night = defaultdict(int)
+    per_room = defaultdict(int)
+    prices = {}
+    for row in rows:
+        if row.kind == 'PRICE':
+            prices[row.room_type_id] = row.price
+        elif row.end_date is None:
+            per_room[row.room_type_id, row.start_date] += row.delta
+        else:
+            for night in nights(row.start_date, row.end_date):
+                per_night[row.room_type_id, night] += row.delta
+
+    return {
+        'cursor': rows[-1].pk if rows else cursor,
+        'has_more': has_more,
+        # Sisa kamar per malam berubah sebesar delta
+        'nights': [
+            {'room_type': room_type_id, 'date': night.isoformat(), 'delta': delta}
+            for (room_type_id, night), delta in sorted(per_night.items())
+            if delta
+        ],
+        # Jumlah kamar tersedia berubah untuk semua malam mulai tanggal 'from'
+        'rooms': [
+            {'room_type': room_type_id, 'from': start.isoformat(), 'delta': delta}
+            for (room_type_id, start), delta in sorted(per_room.items())
+            if delta
+        ],
+        'prices': [
+            {'room_type': room_type_id, 'base_price': str(price)}
+            for room_type_id, price in sorted(prices.items())
+        ],
+    }
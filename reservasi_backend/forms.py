@@ -1,7 +1,9 @@
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
-from .models import Reservation, Payment, Review, Room
+from .models import Hotel, Reservation, Payment, Review, RoomType
+from .booking import MAX_GROUP_ROOMS
+from .gallery import MAX_GALLERY_FILES
 from django.utils import timezone
 
 class CustomUserCreationForm(UserCreationForm):
@@ -24,7 +26,7 @@ class CustomUserCreationForm(UserCreationForm):
 class ReservationForm(forms.ModelForm):
     class Meta:
         model = Reservation
-        fields = ['room', 'check_in', 'check_out', 'first_name', 'last_name', 'email', 'phone', 'special_request']
+        fields = ['room_type', 'check_in', 'check_out', 'first_name', 'last_name', 'email', 'phone', 'special_request']
         widgets = {
             'check_in': forms.DateInput(attrs={'type': 'date'}),
             'check_out': forms.DateInput(attrs={'type': 'date'}),
@@ -34,8 +36,10 @@ class ReservationForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         hotel_id = kwargs.pop('hotel_id', None)
         super().__init__(*args, **kwargs)
+        # Tamu memilih tipe kamar; nomor kamar dialokasikan saat pemesanan
+        self.fields['room_type'].required = True
         if hotel_id:
-            self.fields['room'].queryset = Room.objects.filter(hotel_id=hotel_id, is_available=True)
+            self.fields['room_type'].queryset = RoomType.objects.filter(hotel_id=hotel_id)
 
     def clean(self):
         cleaned_data = super().clean()
@@ -48,6 +52,50 @@ class ReservationForm(forms.ModelForm):
                 raise forms.ValidationError("Tanggal check-in tidak boleh di masa lalu.")
         return cleaned_data
 
+class GroupBookingForm(forms.Form):
+    check_in = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    check_out = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    first_name = forms.CharField(max_length=30)
+    last_name = forms.CharField(max_length=30)
+    email = forms.EmailField(required=False)
+    phone = forms.CharField(max_length=20, required=False)
+    special_request = forms.CharField(required=False, widget=forms.Textarea(attrs={'rows': 4}))
+
+    def __init__(self, *args, **kwargs):
+        # Satu input jumlah kamar per tipe kamar hotel
+        self.room_types = kwargs.pop('room_types', [])
+        super().__init__(*args, **kwargs)
+        for room_type in self.room_types:
+            self.fields[f'qty_{room_type.pk}'] = forms.IntegerField(
+                min_value=0, max_value=MAX_GROUP_ROOMS, initial=0, required=False, label=room_type.name
+            )
+
+    def quantity_fields(self):
+        return [(room_type, self[f'qty_{room_type.pk}']) for room_type in self.room_types]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        check_in = cleaned_data.get('check_in')
+        check_out = cleaned_data.get('check_out')
+        if check_in and check_out:
+            if check_out <= check_in:
+                raise forms.ValidationError("Tanggal check-out harus setelah check-in.")
+            if check_in < timezone.now().date():
+                raise forms.ValidationError("Tanggal check-in tidak boleh di masa lalu.")
+        phone = cleaned_data.get('phone')
+        if phone and not phone.isdigit():
+            self.add_error('phone', "Nomor telepon harus berupa angka.")
+        quantities = {
+            room_type.pk: cleaned_data.get(f'qty_{room_type.pk}') or 0 for room_type in self.room_types
+        }
+        total = sum(quantities.values())
+        if total == 0:
+            raise forms.ValidationError("Pilih minimal satu kamar.")
+        if total > MAX_GROUP_ROOMS:
+            raise forms.ValidationError(f"Maksimal {MAX_GROUP_ROOMS} kamar per pemesanan.")
+        cleaned_data['quantities'] = quantities
+        return cleaned_data
+
 class PaymentForm(forms.ModelForm):
     class Meta:
         model = Payment
@@ -67,4 +115,46 @@ class ReviewForm(forms.ModelForm):
         widgets = {
             'rating': forms.NumberInput(attrs={'min': 1, 'max': 5}),
             'comment': forms.Textarea(attrs={'rows': 4}),
-        }
\ No newline at end of file
+        }
+
+class AnalyticsForm(forms.Form):
+    MAX_DAYS = 732
+    GROUP_CHOICES = [('hotel', 'Hotel'), ('room_type', 'Tipe Kamar')]
+
+    start = forms.DateField(label="Dari", widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(label="Sampai (eksklusif)", widget=forms.DateInput(attrs={'type': 'date'}))
+    group_by = forms.ChoiceField(label="Kelompokkan per", choices=GROUP_CHOICES, initial='hotel')
+    hotels = forms.ModelMultipleChoiceField(label="Hotel", queryset=Hotel.objects.order_by('name'), required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get('start')
+        end = cleaned_data.get('end')
+        if start and end:
+            if end <= start:
+                raise forms.ValidationError("Tanggal akhir harus setelah tanggal awal.")
+            if (end - start).days > self.MAX_DAYS:
+                raise forms.ValidationError(f"Rentang maksimal {self.MAX_DAYS} hari.")
+        return cleaned_data
+
+class MultipleImageInput(forms.ClearableFileInput):
+    allow_multiple_selected = True
+
+class MultipleImageField(forms.FileField):
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('widget', MultipleImageInput(attrs={'accept': 'image/*'}))
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None):
+        files = data if isinstance(data, (list, tuple)) else ([data] if data else [])
+        if len(files) > MAX_GALLERY_FILES:
+            raise forms.ValidationError(f"Maksimal {MAX_GALLERY_FILES} gambar per unggahan.")
+        # Validasi isi gambar dilakukan paralel saat disimpan
+        return [super(MultipleImageField, self).clean(f, initial) for f in files]
+
+class HotelAdminForm(forms.ModelForm):
+    multiple_images = MultipleImageField(required=False, label="Unggah Banyak Gambar")
+
+    class Meta:
+        model = Hotel
+        fields = '__all__'
@@ -0,0 +1,94 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from django.db import DatabaseError, transaction
+from .models import HotelGallery, refresh_hotel_cover_images
+from .invalidation import bump_hotels
+from .media import change_references
+from .search import bump_catalog_version
+from .storage import file_digest
+
+# ======================
+# Unggah Galeri Massal
+# ======================
+GALLERY_WORKERS = 4
+MAX_GALLERY_FILES = 50
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+ALLOWED_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+
+
+def inspect_upload(upload):
+    # Dijalankan di thread pool: hash isi lalu decode header & verifikasi gambar
+    if upload.size > MAX_IMAGE_BYTES:
+        return {'digest': None, 'error': "Ukuran melebihi 10 MB."}
+    try:
+        digest = file_digest(upload)
+        with Image.open(upload) as image:
+            image_format = image.format
+            image.verify()
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        return {'digest': None, 'error': "Bukan berkas gambar yang valid."}
+    finally:
+        upload.seek(0)
+    if image_format not in ALLOWED_FORMATS:
+        return {'digest': None, 'error': f"Format {image_format} tidak didukung."}
+    return {'digest': digest, 'error': None}
+
+
+def store_upload(hotel, upload):
+    # Storage menulis berkas per potongan dari UploadedFile.chunks()
+    field = HotelGallery._meta.get_field('image')
+    name = field.generate_filename(HotelGallery(hotel=hotel), upload.name)
+    return field.storage.save(name, upload, max_length=field.max_length)
+
+
+def upload_gallery_images(hotel, uploads, caption=None):
+    # Hasil per berkas: (nama, status, pesan) dengan status saved/duplicate/invalid
+    if not uploads:
+        return []
+    workers = min(GALLERY_WORKERS, len(uploads))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        checks = list(pool.map(inspect_upload, uploads))
+
+    seen = set(hotel.gallery.exclude(content_hash='').values_list('content_hash', flat=True))
+    results = []
+    accepted = []
+    for i, (upload, check) in enumerate(zip(uploads, checks)):
+        if check['error']:
+            results.append((upload.name, 'invalid', check['error']))
+        elif check['digest'] in seen:
+            results.append((upload.name, 'duplicate', "Gambar yang sama sudah ada di galeri."))
+        else:
+            seen.add(check['digest'])
+            results.append(None)
+            accepted.append((i, upload, check['digest']))
+    if not accepted:
+        return results
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        names = list(pool.map(lambda item: store_upload(hotel, item[1]), accepted))
+    try:
+        with transaction.atomic():
+            HotelGallery.objects.bulk_create([
+                HotelGallery(hotel=hotel, image=name, caption=caption, content_hash=digest)
+                for name, (_i, _upload, digest) in zip(names, accepted)
+            ])
+    except Exception:
+        # Berkas content-addressed bisa dipakai baris lain, jadi tidak dihapus di sini: didaftarkan lalu
+        # dilepas (refcount 0) agar gc_media menghapusnya setelah masa tenggang bila memang yatim.
+        # Jika transaksi luar sudah rusak, gc_media --recount yang akan mendaftarkannya.
+        try:
+            change_references(Counter(names))
+            change_references({name: -count for name, count in Counter(names).items()})
+        except DatabaseError:
+            pass
+        raise
+
+    # bulk_create melewati signal galeri, jadi sampul, referensi media & versi katalog/hotel diperbarui di sini
+    change_references(Counter(names))
+    refresh_hotel_cover_images([hotel.pk])
+    bump_catalog_version()
+    bump_hotels(hotel.pk)
+    for name, (i, upload, _digest) in zip(names, accepted):
+        results[i] = (upload.name, 'saved', name)
+    return results
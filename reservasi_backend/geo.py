@@ -0,0 +1,133 @@
+import math
+from functools import reduce
+from django.db.models import Q
+
+# ======================
+# Geohash & Jarak
+# ======================
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_KM = 6371.0088
+# Batas jumlah sel geohash per query agar klausa OR tetap kecil
+MAX_CELLS = 16
+
+
+def encode(lat, lng, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(geohash) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(geohash)
+
+
+def parse_coordinate(value, limit):
+    # float() menerima 'inf' dan 'nan'; nilai tak hingga atau di luar [-limit, limit] dianggap tidak ada
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) and -limit <= number <= limit else None
+
+
+def parse_bbox(text):
+    # "min_lat,min_lng,max_lat,max_lng" -> tuple, None bila tidak valid
+    parts = (text or '').split(',')
+    if len(parts) != 4:
+        return None
+    min_lat, min_lng, max_lat, max_lng = (
+        parse_coordinate(value, limit) for value, limit in zip(parts, (90, 180, 90, 180))
+    )
+    if None in (min_lat, min_lng, max_lat, max_lng) or min_lat > max_lat or min_lng > max_lng:
+        return None
+    return min_lat, min_lng, max_lat, max_lng
+
+
+def cell_size(precision):
+    # Mengembalikan (tinggi, lebar) satu sel geohash dalam derajat
+    lng_bits = math.ceil(5 * precision / 2)
+    lat_bits = 5 * precision // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat, lng, radius_km):
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(lat))
+    d_lng = 180.0 if cos_lat < 1e-9 else min(180.0, d_lat / cos_lat)
+    return (
+        max(-90.0, lat - d_lat),
+        max(-180.0, lng - d_lng),
+        min(90.0, lat + d_lat),
+        min(180.0, lng + d_lng),
+    )
+
+
+def covering_cells(min_lat, min_lng, max_lat, max_lng, max_cells=MAX_CELLS):
+    # Pilih presisi terbesar yang menutup kotak dengan <= max_cells sel
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = range(int((min_lat + 90) // height), int((max_lat + 90) // height) + 1)
+        cols = range(int((min_lng + 180) // width), int((max_lng + 180) // width) + 1)
+        if len(rows) * len(cols) <= max_cells:
+            return sorted({
+                encode(
+                    min(89.999999, -90 + (row + 0.5) * height),
+                    min(179.999999, -180 + (col + 0.5) * width),
+                    precision,
+                )
+                for row in rows
+                for col in cols
+            })
+    return ['']
+
+
+def cells_q(cells):
+    # Rentang [prefix, prefix + '~') memakai index B-tree pada kolom geohash
+    return reduce(lambda x, y: x | y, [Q(geohash__gte=c, geohash__lt=c + '~') for c in cells])
+
+
+def within_bbox(queryset, min_lat, min_lng, max_lat, max_lng):
+    return queryset.filter(
+        cells_q(covering_cells(min_lat, min_lng, max_lat, max_lng)),
+        latitude__range=(min_lat, max_lat),
+        longitude__range=(min_lng, max_lng),
+    )
+
+
+def distances_from(queryset, lat, lng, radius_km=None):
+    # Hitung jarak hanya untuk kandidat yang lolos filter index
+    distances = {}
+    for pk, hotel_lat, hotel_lng in queryset.values_list('pk', 'latitude', 'longitude'):
+        distance = haversine_km(lat, lng, hotel_lat, hotel_lng)
+        if radius_km is None or distance <= radius_km:
+            distances[pk] = distance
+    return distances
+
+
+def within_radius(queryset, lat, lng, radius_km):
+    candidates = within_bbox(queryset, *bounding_box(lat, lng, radius_km))
+    return distances_from(candidates, lat, lng, radius_km)
@@ -0,0 +1,199 @@
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection, transaction
+
+try:
+    import fcntl
+except ImportError:  # Windows: cukup untuk server pengembangan satu proses
+    fcntl = None
+
+# ======================
+# Bus Invalidasi Antar Proses
+# ======================
+# Urutan hanya boleh ditambah di akhir; indeks = posisi slot di berkas
+NAMESPACES = ('catalog', 'hotel', 'room_type', 'room', 'reservation', 'review', 'user', 'facility')
+SLOT = struct.Struct('<Q')
+# Versi per hotel / per tipe kamar di berkas terpisah; id di-hash ke slot, tabrakan hanya membuat basi lebih awal
+HOTEL_SLOTS = 4096
+
+
+def bus_path():
+    return Path(getattr(settings, 'INVALIDATION_BUS_PATH', Path(tempfile.gettempdir()) / 'hotel_project-invalidation.bin'))
+
+
+class CounterFile:
+    # Array uint64 di berkas yang di-mmap bersama; baca tanpa syscall, tulis di bawah flock
+    def __init__(self, path, slots=len(NAMESPACES)):
+        self.path = Path(path)
+        self.size = SLOT.size * slots
+        self.lock = threading.Lock()
+        self.pid = None
+        self.fd = None
+        self.map = None
+
+    @contextmanager
+    def exclusive(self):
+        with self.lock:
+            if fcntl is not None:
+                fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def open(self):
+        # Dibuka ulang setelah fork: flock melekat pada file description yang ikut diwariskan
+        if self.map is not None and self.pid == os.getpid():
+            return self.map
+        with self.lock:
+            if self.map is not None and self.pid == os.getpid():
+                return self.map
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                current = os.fstat(fd).st_size
+                if current < self.size:
+                    # Slot baru diawali angka berbasis waktu agar versi tidak mengulang setelah berkas dihapus
+                    seed = time.time_ns() // 1000
+                    os.lseek(fd, current, os.SEEK_SET)
+                    os.write(fd, SLOT.pack(seed) * ((self.size - current) // SLOT.size))
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+            self.map = mmap.mmap(fd, self.size)
+            self.fd = fd
+            self.pid = os.getpid()
+        return self.map
+
+    def read(self, index):
+        return SLOT.unpack_from(self.open(), index * SLOT.size)[0]
+
+    def increment(self, index):
+        buffer = self.open()
+        with self.exclusive():
+            value = SLOT.unpack_from(buffer, index * SLOT.size)[0] + 1
+            SLOT.pack_into(buffer, index * SLOT.size, value)
+        return value
+
+    def close(self):
+        if self.map is not None and self.pid == os.getpid():
+            self.map.close()
+            os.close(self.fd)
+        self.map = self.fd = self.pid = None
+
+
+_buses = {}
+_bus_lock = threading.Lock()
+
+
+def counters(name='namespace'):
+    bus = _buses.get(name)
+    if bus is None:
+        with _bus_lock:
+            bus = _buses.get(name)
+            if bus is None:
+                path = bus_path()
+                if name == 'namespace':
+                    bus = CounterFile(path)
+                else:
+                    bus = CounterFile(path.with_name(f'{path.stem}-{name}{path.suffix}'), HOTEL_SLOTS)
+                _buses[name] = bus
+    return bus
+
+
+def reset_bus(**kwargs):
+    if kwargs and kwargs.get('setting') != 'INVALIDATION_BUS_PATH':
+        return
+    with _bus_lock:
+        for bus in _buses.values():
+            bus.close()
+        _buses.clear()
+
+
+setting_changed.connect(reset_bus, dispatch_uid='invalidation_bus_path_changed')
+
+
+def increment(name, indexes):
+    # Naik sekarang untuk proses ini, dan sekali lagi setelah commit agar proses lain
+    # tidak menyimpan data lama yang sempat dibaca sebelum transaksi selesai
+    for index in indexes:
+        counters(name).increment(index)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: [counters(name).increment(index) for index in indexes])
+
+
+def version(namespace):
+    return counters().read(NAMESPACES.index(namespace))
+
+
+def bump(*namespaces):
+    increment('namespace', [NAMESPACES.index(namespace) for namespace in namespaces])
+
+
+def hotel_version(hotel_id):
+    return counters('hotel').read(hotel_id % HOTEL_SLOTS)
+
+
+def bump_hotels(*hotel_ids):
+    increment('hotel', sorted({hotel_id % HOTEL_SLOTS for hotel_id in hotel_ids if hotel_id is not None}))
+
+
+def availability_version(room_type_id):
+    # Naik setiap kali sisa kamar atau tarif tipe kamar ini berubah
+    return counters('availability').read(room_type_id % HOTEL_SLOTS)
+
+
+def bump_availability(*room_type_ids):
+    increment('availability', sorted({pk % HOTEL_SLOTS for pk in room_type_ids if pk is not None}))
+
+# ======================
+# Cache Lokal Per Proses
+# ======================
+class ProcessCache:
+    # Cache dict per proses yang dikosongkan begitu versi namespace-nya berubah
+    def __init__(self, namespace, maxsize=1024):
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.version = None
+        self.data = {}
+
+    def current(self):
+        latest = version(self.namespace)
+        if latest != self.version:
+            with self.lock:
+                if latest != self.version:
+                    self.data = {}
+                    self.version = latest
+        return latest
+
+    def get(self, key, default=None):
+        self.current()
+        return self.data.get(key, default)
+
+    def get_or_set(self, key, compute):
+        seen = self.current()
+        value = self.data.get(key, _missing)
+        if value is _missing:
+            value = compute()
+            # Jangan simpan hasil bila versi berubah selama compute() berjalan
+            with self.lock:
+                if self.version == seen == version(self.namespace):
+                    if len(self.data) >= self.maxsize:
+                        self.data.pop(next(iter(self.data)))
+                    self.data[key] = value
+        return value
+
+
+_missing = object()
@@ -0,0 +1,194 @@
+from collections import Counter
+from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import Count, Exists, F, Min, OuterRef
+from django.utils import timezone
+from .invalidation import bump_availability
+from .models import AvailabilityChange, Room, RoomTypeInventory, Reservation
+
+# ======================
+# Inventori Tipe Kamar
+# ======================
+# Status yang memakai jatah kamar, sama dengan cek bentrok di Reservation.clean
+HOLDING_STATUSES = ('PENDING', 'PAID', 'CHECKED_IN')
+
+
+class InventoryUnavailable(Exception):
+    pass
+
+
+def nights(check_in, check_out):
+    return [check_in + timedelta(days=i) for i in range((check_out - check_in).days)]
+
+
+def room_counts(room_type_ids):
+    counts = dict.fromkeys(room_type_ids, 0)
+    counts.update(
+        Room.objects.filter(room_type_id__in=room_type_ids, is_available=True).order_by()
+        .values('room_type_id').annotate(n=Count('pk')).values_list('room_type_id', 'n')
+    )
+    return counts
+
+
+def ensure_inventory(room_type_id, dates):
+    # Baris malam dibuat saat pertama dibutuhkan dengan total = jumlah kamar tersedia
+    existing = set(
+        RoomTypeInventory.objects.filter(room_type_id=room_type_id, date__in=dates).values_list('date', flat=True)
+    )
+    missing = [d for d in dates if d not in existing]
+    if missing:
+        total = room_counts([room_type_id])[room_type_id]
+        RoomTypeInventory.objects.bulk_create(
+            [RoomTypeInventory(room_type_id=room_type_id, date=d, total=total) for d in missing],
+            ignore_conflicts=True,
+        )
+
+
+def reserve(room_type_id, check_in, check_out, quantity=1):
+    dates = nights(check_in, check_out)
+    if not dates:
+        raise InventoryUnavailable
+    with transaction.atomic():
+        ensure_inventory(room_type_id, dates)
+        # UPDATE bersyarat: hanya berhasil jika semua malam masih punya sisa
+        updated = RoomTypeInventory.objects.filter(
+            room_type_id=room_type_id, date__in=dates, booked__lte=F('total') - quantity
+        ).update(booked=F('booked') + quantity)
+        if updated != len(dates):
+            raise InventoryUnavailable
+        log_nights(room_type_id, check_in, check_out, -quantity)
+
+
+def adjust(room_type_id, check_in, check_out, delta):
+    # Koreksi tanpa syarat, dipakai saat reservasi diubah di luar alur pemesanan
+    dates = nights(check_in, check_out)
+    if not dates:
+        return
+    if delta > 0:
+        ensure_inventory(room_type_id, dates)
+        RoomTypeInventory.objects.filter(room_type_id=room_type_id, date__in=dates).update(booked=F('booked') + delta)
+    else:
+        RoomTypeInventory.objects.filter(
+            room_type_id=room_type_id, date__in=dates, booked__gte=-delta
+        ).update(booked=F('booked') + delta)
+    log_nights(room_type_id, check_in, check_out, -delta)
+
+
+def release(room_type_id, check_in, check_out, quantity=1):
+    adjust(room_type_id, check_in, check_out, -quantity)
+
+
+def release_many(reservations):
+    # Kelompokkan malam per (tipe, jumlah) agar pembatalan massal cukup beberapa UPDATE
+    per_night = Counter()
+    changes = []
+    for room_type_id, check_in, check_out in reservations.values_list('room_type_id', 'check_in', 'check_out'):
+        if room_type_id is None:
+            continue
+        for night in nights(check_in, check_out):
+            per_night[room_type_id, night] += 1
+        changes.append(AvailabilityChange(
+            kind='RESERVATION', room_type_id=room_type_id, start_date=check_in, end_date=check_out, delta=1
+        ))
+    AvailabilityChange.objects.bulk_create(changes, batch_size=1000)
+    bump_availability(*{change.room_type_id for change in changes})
+    grouped = {}
+    for (room_type_id, night), quantity in per_night.items():
+        grouped.setdefault((room_type_id, quantity), []).append(night)
+    for (room_type_id, quantity), dates in grouped.items():
+        RoomTypeInventory.objects.filter(
+            room_type_id=room_type_id, date__in=dates, booked__gte=quantity
+        ).update(booked=F('booked') - quantity)
+
+
+def refresh_totals(room_type_ids, start=None):
+    # Dipanggil saat kamar ditambah, dihapus, atau ketersediaannya berubah
+    counts = room_counts(list(room_type_ids))
+    rows = RoomTypeInventory.objects.all()
+    if start is not None:
+        rows = rows.filter(date__gte=start)
+    for room_type_id, total in counts.items():
+        rows.filter(room_type_id=room_type_id).update(total=total)
+    bump_availability(*counts)
+
+
+def availability(room_type_ids, check_in, check_out):
+    # Sisa kamar per tipe = MIN(total - booked) atas N baris malam
+    room_type_ids = list(room_type_ids)
+    dates = nights(check_in, check_out)
+    counts = room_counts(room_type_ids)
+    if not dates:
+        return counts
+    rows = RoomTypeInventory.objects.filter(
+        room_type_id__in=room_type_ids, date__in=dates
+    ).order_by().values('room_type_id').annotate(
+        free=Min(F('total') - F('booked')), stored=Count('pk')
+    ).values_list('room_type_id', 'free', 'stored')
+    free = dict(counts)
+    for room_type_id, row_free, stored in rows:
+        # Malam tanpa baris berarti belum ada pesanan, sisanya = jumlah kamar
+        free[room_type_id] = max(0, row_free if stored == len(dates) else min(row_free, counts[room_type_id]))
+    return free
+
+# ======================
+# Log Perubahan Ketersediaan
+# ======================
+# delta = perubahan sisa kamar; ditulis di transaksi yang sama dengan perubahan inventorinya,
+# sekaligus menaikkan versi ketersediaan tipe kamarnya untuk cache kalender
+def log_nights(room_type_id, check_in, check_out, delta):
+    if room_type_id is None or not delta or check_out <= check_in:
+        return
+    AvailabilityChange.objects.create(
+        kind='RESERVATION', room_type_id=room_type_id, start_date=check_in, end_date=check_out, delta=delta
+    )
+    bump_availability(room_type_id)
+
+
+def log_room_totals(deltas, start=None):
+    # deltas: {room_type_id: +n/-n} kamar tersedia, berlaku mulai hari ini seterusnya
+    start = start or timezone.localdate()
+    changes = AvailabilityChange.objects.bulk_create([
+        AvailabilityChange(kind='ROOM', room_type_id=room_type_id, start_date=start, delta=delta)
+        for room_type_id, delta in deltas.items()
+        if room_type_id is not None and delta
+    ])
+    bump_availability(*(change.room_type_id for change in changes))
+
+
+def log_price(room_type_id, price):
+    AvailabilityChange.objects.create(kind='PRICE', room_type_id=room_type_id, price=price)
+    bump_availability(room_type_id)
+
+# ======================
+# Alokasi Kamar
+# ======================
+def free_rooms(room_type_ids, check_in, check_out):
+    # Kamar dari tipe-tipe ini yang tidak bentrok, satu query dengan NOT EXISTS
+    busy = Reservation.objects.filter(
+        room=OuterRef('pk'),
+        check_in__lt=check_out,
+        check_out__gt=check_in,
+        status__in=HOLDING_STATUSES,
+    )
+    rooms = Room.objects.filter(
+        room_type_id__in=room_type_ids, is_available=True
+    ).exclude(Exists(busy)).order_by('number')
+    if connection.features.has_select_for_update_skip_locked:
+        rooms = rooms.select_for_update(skip_locked=True)
+    return rooms
+
+
+def allocate_room(room_type_id, check_in, check_out):
+    return free_rooms([room_type_id], check_in, check_out).first()
+
+
+def allocate_rooms(quantities, check_in, check_out):
+    # quantities: {room_type_id: jumlah}; mengembalikan {room_type_id: [room_id, ...]}
+    allocated = {room_type_id: [] for room_type_id in quantities}
+    rows = free_rooms(list(quantities), check_in, check_out).values_list('pk', 'room_type_id')
+    for room_id, room_type_id in rows:
+        if len(allocated[room_type_id]) < quantities[room_type_id]:
+            allocated[room_type_id].append(room_id)
+    if any(len(allocated[t]) < n for t, n in quantities.items()):
+        raise InventoryUnavailable
+    return allocated
@@ -0,0 +1,29 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from reservasi_backend.archive import archive_reservations
+from reservasi_backend.models import ArchivedReservation, Reservation, Review
+from reservasi_backend.paginators import refresh_table_stats
+
+
+class Command(BaseCommand):
+    help = "Memindahkan reservasi selesai/dibatalkan yang lebih lama dari batas hari ke tabel arsip."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365,
+                            help="Arsipkan reservasi yang check-out-nya lebih lama dari sekian hari.")
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Jumlah reservasi per transaksi.")
+
+    def handle(self, *args, **options):
+        if options['days'] < 0 or options['batch_size'] < 1:
+            raise CommandError("Nilai --days dan --batch-size tidak valid.")
+        cutoff = timezone.localdate() - timedelta(days=options['days'])
+
+        archived = 0
+        for moved in archive_reservations(cutoff, options['batch_size']):
+            archived += moved
+            self.stdout.write(f"{archived} reservasi dipindahkan...")
+        # Perkiraan jumlah baris changelist admin dibaca dari statistik ini
+        refresh_table_stats([Reservation, ArchivedReservation, Review])
+        self.stdout.write(self.style.SUCCESS(f"{archived} reservasi sebelum {cutoff} diarsipkan."))
@@ -0,0 +1,27 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from reservasi_backend.changefeed import availability_feed, FEED_BATCH_SIZE, MAX_FEED_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Mencetak delta ketersediaan sejak kursor, satu baris JSON per batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cursor', type=int, default=0,
+                            help="Kursor terakhir yang sudah diproses channel.")
+        parser.add_argument('--batch-size', type=int, default=FEED_BATCH_SIZE,
+                            help="Jumlah baris log per batch.")
+        parser.add_argument('--all', action='store_true',
+                            help="Lanjutkan batch berikutnya sampai log habis.")
+
+    def handle(self, *args, **options):
+        if options['cursor'] < 0 or not 1 <= options['batch_size'] <= MAX_FEED_BATCH_SIZE:
+            raise CommandError("Nilai --cursor atau --batch-size tidak valid.")
+        cursor = options['cursor']
+        while True:
+            batch = availability_feed(cursor, options['batch_size'])
+            self.stdout.write(json.dumps(batch, separators=(',', ':')))
+            cursor = batch['cursor']
+            if not (options['all'] and batch['has_more']):
+                break
+        self.stderr.write(f"Kursor berikutnya: {cursor}")
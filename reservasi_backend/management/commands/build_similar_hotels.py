@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from reservasi_backend.similarity import SIMILARITY_BATCH_SIZE, TOP_K, build_similarities
+
+
+class Command(BaseCommand):
+    help = "Menghitung ulang daftar hotel serupa dari matriks co-booking, wilayah, bintang dan harga."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help="Hitung ulang semua hotel, bukan hanya yang terdampak pemesanan baru.")
+        parser.add_argument('--top', type=int, default=TOP_K,
+                            help="Jumlah hotel serupa yang disimpan per hotel.")
+        parser.add_argument('--batch-size', type=int, default=SIMILARITY_BATCH_SIZE,
+                            help="Jumlah hotel per transaksi tulis.")
+
+    def handle(self, *args, **options):
+        if options['top'] < 1 or options['batch_size'] < 1:
+            raise CommandError("Nilai --top dan --batch-size tidak valid.")
+        started = time.perf_counter()
+        hotels, rows = build_similarities(options['full'], options['top'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{hotels} hotel dihitung ulang ({rows} baris) dalam {time.perf_counter() - started:.2f} detik."
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from reservasi_backend.media import MEDIA_FIELDS, recount_references
+from reservasi_backend.storage import content_storage, file_digest, is_content_name
+
+
+class Command(BaseCommand):
+    help = "Memindahkan berkas media lama ke nama berbasis SHA-256 dan menggabungkan berkas yang isinya sama."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Hanya hitung duplikat tanpa mengubah berkas maupun database.")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        replaced = {}
+        missing = 0
+        for model, field in MEDIA_FIELDS:
+            names = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).order_by()
+            for name in names.values_list(field, flat=True).distinct().iterator():
+                if is_content_name(name):
+                    continue
+                if name not in replaced:
+                    try:
+                        with content_storage.open(name) as f:
+                            if dry_run:
+                                replaced[name] = content_storage.content_name(name, file_digest(f))
+                            else:
+                                replaced[name] = content_storage.save(name, f)
+                    except FileNotFoundError:
+                        missing += 1
+                        continue
+                if not dry_run:
+                    model.objects.filter(**{field: name}).update(**{field: replaced[name]})
+
+        if not dry_run:
+            # Berkas lama dihapus setelah semua tabel menunjuk ke nama barunya
+            for old in replaced:
+                content_storage.delete(old)
+            recount_references()
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(replaced)} berkas lama menjadi {len(set(replaced.values()))} blob, {missing} berkas tidak ditemukan."
+        ))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from reservasi_backend.waitlist import expire_offers
+
+
+class Command(BaseCommand):
+    help = "Melepas hold daftar tunggu yang lewat batas tanpa pembayaran dan menawarkannya ke antrean berikutnya."
+
+    def handle(self, *args, **options):
+        expired, booked, offered = expire_offers()
+        self.stdout.write(self.style.SUCCESS(
+            f"{expired} tawaran kedaluwarsa, {booked} sudah dipesan, {offered} tawaran baru diberikan."
+        ))
@@ -0,0 +1,26 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from reservasi_backend.media import collect_garbage, recount_references
+
+
+class Command(BaseCommand):
+    help = "Menghapus berkas media yang tidak lagi dirujuk (refcount 0) setelah masa tenggang."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=int, default=24,
+                            help="Berkas tanpa rujukan baru dihapus setelah sekian jam.")
+        parser.add_argument('--recount', action='store_true',
+                            help="Hitung ulang refcount dari tabel dan disk sebelum membersihkan.")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['grace_hours'] < 0:
+            raise CommandError("--grace-hours tidak boleh negatif.")
+        if options['recount']:
+            fixed = recount_references()
+            self.stdout.write(f"{fixed} refcount diperbaiki.")
+        removed = collect_garbage(timedelta(hours=options['grace_hours']), options['dry_run'])
+        for name in removed:
+            self.stdout.write(name)
+        verb = "akan dihapus" if options['dry_run'] else "dihapus"
+        self.stdout.write(self.style.SUCCESS(f"{len(removed)} berkas media {verb}."))
@@ -0,0 +1,46 @@
+import csv
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from reservasi_backend.catalog import CATALOG_BATCH_SIZE, import_catalog, read_csv, read_jsonl
+
+
+class Command(BaseCommand):
+    help = "Memuat hotel, tipe kamar, kamar, fasilitas dan path gambar secara massal dari berkas JSONL/CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Berkas JSONL (satu hotel per baris) atau CSV (satu kamar per baris).")
+        parser.add_argument('--format', choices=['jsonl', 'csv'],
+                            help="Format berkas (default menurut ekstensi).")
+        parser.add_argument('--delimiter', default=',')
+        parser.add_argument('--encoding', default='utf-8-sig')
+        parser.add_argument('--batch-size', type=int, default=CATALOG_BATCH_SIZE,
+                            help="Jumlah hotel + kamar per transaksi.")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.is_file():
+            raise CommandError(f"Berkas {path} tidak ditemukan.")
+        if options['batch_size'] < 1:
+            raise CommandError("Nilai --batch-size tidak valid.")
+        file_format = options['format'] or ('csv' if path.suffix.lower() == '.csv' else 'jsonl')
+        started = time.perf_counter()
+        with path.open(newline='', encoding=options['encoding']) as catalog:
+            if file_format == 'csv':
+                reader = csv.DictReader(catalog, delimiter=options['delimiter'])
+                missing = {'name', 'room_type', 'room_number'} - set(reader.fieldnames or ())
+                if missing:
+                    raise CommandError(f"Kolom tidak ditemukan: {', '.join(sorted(missing))}.")
+                records = read_csv(reader)
+            else:
+                records = read_jsonl(catalog)
+            counts, errors = import_catalog(records, options['batch_size'])
+        for line_number, message in errors:
+            self.stderr.write(self.style.WARNING(f"Baris {line_number}: {message}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"{counts['hotels_created']} hotel baru, {counts['hotels_updated']} diperbarui; "
+            f"{counts['room_types_created'] + counts['room_types_updated']} tipe kamar, "
+            f"{counts['rooms_created']} kamar baru, {counts['rooms_updated']} diperbarui, "
+            f"{counts['images']} gambar; {counts['invalid']} baris dan {counts['rooms_rejected']} kamar ditolak "
+            f"dalam {time.perf_counter() - started:.2f} detik."
+        ))
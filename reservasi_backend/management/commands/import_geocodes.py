@@ -0,0 +1,72 @@
+import csv
+from django.core.management.base import BaseCommand, CommandError
+from reservasi_backend.geo import encode
+from reservasi_backend.models import Hotel
+from reservasi_backend.search import bump_catalog_version
+
+
+class Command(BaseCommand):
+    help = "Mengisi latitude/longitude hotel dari file CSV lokal (kolom: hotel_id atau name, latitude, longitude)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path')
+        parser.add_argument('--match', choices=['id', 'name'], default='id',
+                            help="Cocokkan baris CSV berdasarkan hotel_id atau nama hotel.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        match = options['match']
+        batch_size = options['batch_size']
+        key_column = 'hotel_id' if match == 'id' else 'name'
+
+        try:
+            csv_file = open(options['csv_path'], newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f"Tidak dapat membuka file: {e}")
+
+        updated = 0
+        skipped = 0
+        with csv_file:
+            reader = csv.DictReader(csv_file)
+            missing = {key_column, 'latitude', 'longitude'} - set(reader.fieldnames or [])
+            if missing:
+                raise CommandError(f"Kolom CSV tidak lengkap: {', '.join(sorted(missing))}")
+
+            batch = {}
+            for row in reader:
+                try:
+                    lat = float(row['latitude'])
+                    lng = float(row['longitude'])
+                except (TypeError, ValueError):
+                    skipped += 1
+                    continue
+                if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+                    skipped += 1
+                    continue
+                key = row[key_column].strip()
+                if match == 'id' and not key.isdigit():
+                    skipped += 1
+                    continue
+                batch[int(key) if match == 'id' else key] = (lat, lng)
+                if len(batch) >= batch_size:
+                    done, missed = self.flush(batch, match)
+                    updated += done
+                    skipped += missed
+                    batch = {}
+            if batch:
+                done, missed = self.flush(batch, match)
+                updated += done
+                skipped += missed
+
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f"{updated} hotel diperbarui, {skipped} baris dilewati."))
+
+    def flush(self, batch, match):
+        lookup = 'pk__in' if match == 'id' else 'name__in'
+        hotels = list(Hotel.objects.filter(**{lookup: list(batch)}).only('pk', 'name'))
+        for hotel in hotels:
+            hotel.latitude, hotel.longitude = batch[hotel.pk if match == 'id' else hotel.name]
+            hotel.geohash = encode(hotel.latitude, hotel.longitude)
+        Hotel.objects.bulk_update(hotels, ['latitude', 'longitude', 'geohash'])
+        matched = {hotel.pk if match == 'id' else hotel.name for hotel in hotels}
+        return len(hotels), len(set(batch) - matched)
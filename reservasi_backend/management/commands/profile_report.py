@@ -0,0 +1,58 @@
+import json
+import pstats
+from pathlib import Path
+from statistics import mean
+from django.core.management.base import BaseCommand, CommandError
+from reservasi_backend.middleware import profile_directory
+
+
+class Command(BaseCommand):
+    help = "Merangkum dump ProfilingMiddleware menjadi N fungsi terberat per view."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', help="Folder profil (default: PROFILING_DIR).")
+        parser.add_argument('--top', type=int, default=15)
+        parser.add_argument('--view', action='append', dest='views', help="Batasi ke view tertentu (boleh diulang).")
+        parser.add_argument('--sort', choices=['cumulative', 'tottime'], default='tottime',
+                            help="Urutkan berdasarkan waktu sendiri (tottime) atau kumulatif.")
+
+    def handle(self, *args, **options):
+        root = Path(options['dir']) if options['dir'] else profile_directory()
+        if not root.is_dir():
+            raise CommandError(f"Folder profil tidak ditemukan: {root}")
+
+        for directory in sorted(path for path in root.iterdir() if path.is_dir()):
+            if options['views'] and directory.name not in options['views']:
+                continue
+            dumps = sorted(directory.glob('*.prof'))
+            if not dumps:
+                continue
+            self.report(directory.name, dumps, options['top'], options['sort'])
+
+    def report(self, view_name, dumps, top, sort):
+        samples = len(dumps)
+        timings = []
+        for dump in dumps:
+            try:
+                timings.append(json.loads(dump.with_suffix('.json').read_text()))
+            except (OSError, ValueError):
+                pass
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{view_name} ({samples} sampel)"))
+        if timings:
+            parts = ', '.join(
+                f"{label} {mean(t[key] for t in timings):.1f} ms"
+                for label, key in (('total', 'total_ms'), ('view', 'view_ms'), ('template', 'template_ms'), ('orm', 'orm_ms'))
+            )
+            self.stdout.write(f"  rata-rata: {parts}, {mean(t['queries'] for t in timings):.1f} query")
+
+        stats = pstats.Stats(*(str(dump) for dump in dumps))
+        stats.sort_stats(sort)
+        self.stdout.write(f"  {'self ms':>10} {'kum. ms':>10} {'panggilan':>10}  fungsi")
+        for func in stats.fcn_list[:top]:
+            _primitive, calls, own, cumulative, _callers = stats.stats[func]
+            filename, line, name = func
+            self.stdout.write(
+                f"  {own * 1000 / samples:10.2f} {cumulative * 1000 / samples:10.2f} {calls // samples:10d}  "
+                f"{filename}:{line}({name})"
+            )
+        self.stdout.write('')
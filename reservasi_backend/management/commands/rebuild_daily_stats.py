@@ -0,0 +1,30 @@
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from reservasi_backend.analytics import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Menghitung ulang tabel DailyHotelStats untuk rentang tanggal tertentu (tanggal akhir eksklusif)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, required=True)
+        parser.add_argument('--end', type=date.fromisoformat, required=True)
+        parser.add_argument('--hotel', type=int, action='append', dest='hotels',
+                            help="Batasi ke hotel tertentu (boleh diulang).")
+        parser.add_argument('--chunk-days', type=int, default=31,
+                            help="Jumlah hari per transaksi.")
+
+    def handle(self, *args, **options):
+        start, end = options['start'], options['end']
+        if end <= start:
+            raise CommandError("Tanggal akhir harus setelah tanggal awal.")
+        chunk = timedelta(days=max(1, options['chunk_days']))
+
+        written = 0
+        window_start = start
+        while window_start < end:
+            window_end = min(window_start + chunk, end)
+            written += rebuild_daily_stats(window_start, window_end, options['hotels'])
+            self.stdout.write(f"{window_start} - {window_end}: selesai")
+            window_start = window_end
+        self.stdout.write(self.style.SUCCESS(f"{written} baris statistik harian ditulis."))
@@ -0,0 +1,51 @@
+import csv
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from reservasi_backend.reconciliation import (
+    reconcile_statement, DEFAULT_COLUMNS, MATCH_WINDOW_DAYS, RECONCILE_BATCH_SIZE,
+)
+
+
+class Command(BaseCommand):
+    help = "Mencocokkan mutasi rekening/e-wallet (CSV) dengan pembayaran tertunda dan melunasinya secara massal."
+
+    def add_arguments(self, parser):
+        parser.add_argument('statement', help="Berkas CSV mutasi, dibaca baris demi baris.")
+        parser.add_argument('--source', help="Nama sumber mutasi di antrean tinjauan (default nama berkas).")
+        parser.add_argument('--date-column', default=DEFAULT_COLUMNS['date'])
+        parser.add_argument('--amount-column', default=DEFAULT_COLUMNS['amount'])
+        parser.add_argument('--description-column', default=DEFAULT_COLUMNS['description'])
+        parser.add_argument('--date-format', default='%Y-%m-%d')
+        parser.add_argument('--delimiter', default=',')
+        parser.add_argument('--encoding', default='utf-8-sig')
+        parser.add_argument('--window-days', type=int, default=MATCH_WINDOW_DAYS,
+                            help="Selisih hari maksimum antara pemesanan dan tanggal transfer.")
+        parser.add_argument('--batch-size', type=int, default=RECONCILE_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        path = Path(options['statement'])
+        if not path.is_file():
+            raise CommandError(f"Berkas {path} tidak ditemukan.")
+        if options['window_days'] < 0 or options['batch_size'] < 1:
+            raise CommandError("Nilai --window-days dan --batch-size tidak valid.")
+        columns = {
+            'date': options['date_column'],
+            'amount': options['amount_column'],
+            'description': options['description_column'],
+        }
+        with path.open(newline='', encoding=options['encoding']) as statement:
+            reader = csv.DictReader(statement, delimiter=options['delimiter'])
+            missing = set(columns.values()) - set(reader.fieldnames or ())
+            if missing:
+                raise CommandError(f"Kolom tidak ditemukan: {', '.join(sorted(missing))}.")
+            counts = reconcile_statement(
+                reader, options['source'] or path.name, columns, options['date_format'],
+                options['window_days'], options['batch_size'], options['dry_run'],
+            )
+        verb = "akan dilunasi" if options['dry_run'] else "dilunasi"
+        self.stdout.write(self.style.SUCCESS(
+            f"{counts['lines']} baris: {counts['matched']} pembayaran {verb}, "
+            f"{counts['unmatched']} masuk antrean tinjauan, {counts['ignored']} debit dilewati, "
+            f"{counts['skipped']} sudah pernah diimpor."
+        ))
@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from reservasi_backend.pricing import PRICING_HORIZON_DAYS, REPRICE_BATCH_SIZE, reprice
+
+
+class Command(BaseCommand):
+    help = "Menghitung ulang tarif per malam dari okupansi ke depan, laju pemesanan dan hari dalam minggu."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=PRICING_HORIZON_DAYS,
+                            help="Jumlah malam ke depan yang diberi tarif.")
+        parser.add_argument('--full', action='store_true',
+                            help="Hitung ulang semua malam, mis. setelah bobot harga diubah.")
+        parser.add_argument('--batch-size', type=int, default=REPRICE_BATCH_SIZE,
+                            help="Jumlah baris tarif per upsert.")
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['batch_size'] < 1:
+            raise CommandError("Nilai --days dan --batch-size tidak valid.")
+        started = time.perf_counter()
+        nights, changed = reprice(options['days'], options['full'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{changed} dari {nights} malam dihitung ulang dalam {time.perf_counter() - started:.2f} detik."
+        ))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from reservasi_backend.warmup import warm_caches
+
+
+class Command(BaseCommand):
+    help = "Mengisi cache katalog, facet, detail hotel teratas dan page cache tabel utama sebelum menerima trafik."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Jumlah thread pemanasan (default WARMUP_WORKERS).")
+        parser.add_argument('--top', type=int, default=None,
+                            help="Jumlah hotel teratas yang detailnya dipanaskan (default WARMUP_TOP_HOTELS).")
+        parser.add_argument('--max-seconds', type=float, default=None,
+                            help="Gagal bila pemanasan lebih lama dari sekian detik.")
+
+    def handle(self, *args, **options):
+        if (options['workers'] is not None and options['workers'] < 1) or (options['top'] is not None and options['top'] < 0):
+            raise CommandError("Nilai --workers dan --top tidak valid.")
+        results, elapsed = warm_caches(options['workers'], options['top'])
+
+        failed = [(label, error) for label, _seconds, error in results if error is not None]
+        if options['verbosity'] > 1:
+            for label, seconds, error in results:
+                self.stdout.write(f"{seconds * 1000:8.1f} ms  {label}{'  GAGAL' if error else ''}")
+        for label, error in failed:
+            self.stderr.write(f"{label}: {error}")
+        summary = f"{len(results) - len(failed)}/{len(results)} tugas pemanasan selesai dalam {elapsed:.2f} detik."
+        if failed:
+            raise CommandError(summary)
+        if options['max_seconds'] is not None and elapsed > options['max_seconds']:
+            raise CommandError(f"{summary} Melebihi batas {options['max_seconds']:g} detik.")
+        self.stdout.write(self.style.SUCCESS(summary))
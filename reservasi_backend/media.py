@@ -0,0 +1,103 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import ArchivedPayment, HotelGallery, MediaBlob, Payment
+from .storage import content_storage
+
+# ======================
+# Referensi Berkas Media
+# ======================
+# (model, nama field) yang menyimpan berkas di content_storage
+MEDIA_FIELDS = (
+    (HotelGallery, 'image'),
+    (Payment, 'proof'),
+    (ArchivedPayment, 'proof'),
+)
+GC_GRACE = timedelta(hours=24)
+
+
+def blob_size(name):
+    try:
+        return content_storage.size(name)
+    except OSError:
+        return 0
+
+
+def change_references(deltas):
+    # deltas: {nama berkas: +n/-n}; pola sama dengan stats.apply_deltas
+    deltas = {name: delta for name, delta in deltas.items() if name and delta}
+    if not deltas:
+        return
+    now = timezone.now()
+    with transaction.atomic():
+        added = [name for name, delta in deltas.items() if delta > 0]
+        known = set(MediaBlob.objects.filter(name__in=added).values_list('name', flat=True))
+        MediaBlob.objects.bulk_create(
+            [MediaBlob(name=name, size=blob_size(name)) for name in added if name not in known],
+            ignore_conflicts=True,
+        )
+        grouped = defaultdict(list)
+        for name, delta in deltas.items():
+            grouped[delta].append(name)
+        for delta, names in grouped.items():
+            MediaBlob.objects.filter(name__in=names).update(refcount=F('refcount') + delta, updated_at=now)
+
+
+def count_references():
+    counts = Counter()
+    for model, field in MEDIA_FIELDS:
+        names = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).values_list(field, flat=True)
+        counts.update(names.iterator())
+    return counts
+
+
+def walk_files(directory):
+    try:
+        directories, files = content_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for filename in files:
+        if not filename.startswith('.tmp-'):
+            yield f'{directory}/{filename}'
+    for child in directories:
+        yield from walk_files(f'{directory}/{child}')
+
+
+def upload_directories():
+    return sorted({model._meta.get_field(field).upload_to.strip('/') for model, field in MEDIA_FIELDS})
+
+
+def recount_references():
+    # Perbaikan: hitung ulang dari tabel, daftarkan juga berkas di disk yang tidak dipakai
+    counts = count_references()
+    for directory in upload_directories():
+        for name in walk_files(directory):
+            counts.setdefault(name, 0)
+    now = timezone.now()
+    with transaction.atomic():
+        known = dict(MediaBlob.objects.values_list('name', 'refcount'))
+        MediaBlob.objects.bulk_create(
+            [MediaBlob(name=name, size=blob_size(name), refcount=n) for name, n in counts.items() if name not in known],
+            batch_size=1000,
+        )
+        grouped = defaultdict(list)
+        for name, refcount in known.items():
+            if counts.get(name, 0) != refcount:
+                grouped[counts.get(name, 0)].append(name)
+        for refcount, names in grouped.items():
+            MediaBlob.objects.filter(name__in=names).update(refcount=refcount, updated_at=now)
+    return sum(len(names) for names in grouped.values())
+
+
+def collect_garbage(grace=GC_GRACE, dry_run=False):
+    # Hapus berkas tanpa referensi yang sudah melewati masa tenggang
+    orphans = MediaBlob.objects.filter(refcount__lte=0, updated_at__lt=timezone.now() - grace)
+    removed = []
+    for blob in orphans.iterator():
+        removed.append(blob.name)
+        # Baris dihapus dulu secara bersyarat; berkas hanya dihapus bila baris benar-benar hilang
+        if not dry_run and MediaBlob.objects.filter(pk=blob.pk, refcount__lte=0).delete()[0]:
+            content_storage.delete(blob.name)
+    return removed
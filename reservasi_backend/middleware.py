@@ -1,5 +1,30 @@
+import cProfile
+import hashlib
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from io import BytesIO
+from pathlib import Path
+from urllib.parse import urlencode
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.http import HttpResponse
+from django.template.base import Template
+from django.urls import Resolver404, resolve
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.auth import get_user_model
+from .invalidation import hotel_version, version
 
 User = get_user_model()
 
@@ -26,4 +51,240 @@ class AppAuthMiddleware:
             request.user = AnonymousUser()
 
         response = self.get_response(request)
-        return response
\ No newline at end of file
+        return response
+
+# ======================
+# Profiling Sampel
+# ======================
+# Kunci pstats untuk Template.render, dipakai memisahkan waktu render template
+TEMPLATE_RENDER_KEY = (
+    Template.render.__code__.co_filename,
+    Template.render.__code__.co_firstlineno,
+    Template.render.__code__.co_name,
+)
+
+
+def profile_directory():
+    return Path(getattr(settings, 'PROFILING_DIR', Path(settings.BASE_DIR) / 'profiles'))
+
+
+def inside_template_render():
+    # Apakah query ini dipanggil (langsung/tidak langsung) dari Template.render
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_code is Template.render.__code__:
+            return True
+        frame = frame.f_back
+    return False
+
+
+class QueryTimer:
+    # execute_wrapper: total waktu & jumlah query selama request diprofil, plus bagian yang
+    # terjadi di dalam render template (sudah termasuk dalam template_ms)
+    def __init__(self):
+        self.seconds = 0.0
+        self.template_seconds = 0.0
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.seconds += elapsed
+            if inside_template_render():
+                self.template_seconds += elapsed
+            self.count += 1
+
+
+class ProfilingMiddleware:
+    # Opt-in: aktif hanya bila PROFILING_SAMPLE_RATE > 0 atau PROFILING_TOKEN diisi
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = float(getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0))
+        self.token = getattr(settings, 'PROFILING_TOKEN', None)
+        self.header = getattr(settings, 'PROFILING_HEADER', 'X-Profile')
+        self.max_files = int(getattr(settings, 'PROFILING_MAX_FILES', 50))
+        if self.sample_rate <= 0 and not self.token:
+            # Dilepas dari rantai middleware, jadi tanpa overhead sama sekali
+            raise MiddlewareNotUsed
+
+    def should_profile(self, request):
+        if self.token:
+            value = request.headers.get(self.header)
+            if value and hmac.compare_digest(value, self.token):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Profiler lain sedang aktif di proses ini; lewati sampel ini
+            return self.get_response(request)
+        timer = QueryTimer()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(timer))
+                response = self.get_response(request)
+                # TemplateResponse dirender di sini agar waktunya ikut terukur
+                if hasattr(response, 'render') and callable(response.render):
+                    response = response.render()
+        finally:
+            profiler.disable()
+        total = time.perf_counter() - start
+
+        profiler.create_stats()
+        template = profiler.stats.get(TEMPLATE_RENDER_KEY, (0, 0, 0.0, 0.0))[3]
+        timings = {
+            'path': request.path,
+            'method': request.method,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'template_ms': round(template * 1000, 2),
+            'orm_ms': round(timer.seconds * 1000, 2),
+            # Query dari dalam template sudah masuk template_ms, jadi hanya query di luar render yang dikurangi
+            'view_ms': round(max(0.0, total - template - (timer.seconds - timer.template_seconds)) * 1000, 2),
+            'queries': timer.count,
+        }
+        match = getattr(request, 'resolver_match', None)
+        self.dump(profiler, (match.view_name if match else None) or 'unresolved', timings)
+        response['Server-Timing'] = (
+            f"total;dur={timings['total_ms']}, tpl;dur={timings['template_ms']}, db;dur={timings['orm_ms']}"
+        )
+        return response
+
+    def dump(self, profiler, view_name, timings):
+        directory = profile_directory() / re.sub(r'[^\w.-]+', '_', view_name)
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            stem = f"{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+            profiler.dump_stats(directory / f'{stem}.prof')
+            (directory / f'{stem}.json').write_text(json.dumps(timings))
+            # Rotasi: simpan hanya PROFILING_MAX_FILES profil terbaru per view
+            for old in sorted(directory.glob('*.prof'))[:-self.max_files]:
+                old.unlink(missing_ok=True)
+                old.with_suffix('.json').unlink(missing_ok=True)
+        except OSError:
+            pass
+
+# ======================
+# Cache Halaman Anonim
+# ======================
+# Halaman yang di-cache beserta parameter query yang memengaruhi isinya; parameter lain diabaikan
+PAGE_CACHE_PARAMS = {
+    'home': (),
+    'hotel_list': (),
+    'hotel_search': (
+        'destination_id', 'region', 'star_rating', 'price_bucket', 'facility', 'facility_mode',
+        'min_price', 'max_price', 'sort', 'cursor', 'lat', 'lng', 'radius', 'bbox',
+    ),
+    'hotel_detail': ('check_in', 'check_out'),
+}
+REFRESH_LOCK_SECONDS = 30
+
+
+def page_versions(match):
+    # Halaman detail hanya basi oleh perubahan hotelnya sendiri; halaman daftar oleh versi katalog
+    if match.view_name == 'hotel_detail':
+        return (hotel_version(match.kwargs['hotel_id']), version('facility'))
+    return (version('catalog'),)
+
+
+class PageCacheMiddleware:
+    # Dipasang sebelum session & auth: GET anonim dilayani dari cache tanpa melewati middleware lain
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.fresh = int(getattr(settings, 'PAGE_CACHE_SECONDS', 0))
+        self.stale = int(getattr(settings, 'PAGE_CACHE_STALE_SECONDS', 0))
+        self.background = getattr(settings, 'PAGE_CACHE_BACKGROUND', True)
+        if self.fresh <= 0:
+            raise MiddlewareNotUsed
+
+    def cacheable(self, request):
+        if request.method != 'GET':
+            return None
+        # Tanpa cookie sesi/pesan, halaman pasti dirender untuk pengunjung anonim
+        if settings.SESSION_COOKIE_NAME in request.COOKIES or CookieStorage.cookie_name in request.COOKIES:
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        return match if match.view_name in PAGE_CACHE_PARAMS else None
+
+    def cache_key(self, request, match):
+        params = sorted(
+            (name, value) for name in PAGE_CACHE_PARAMS[match.view_name] for value in request.GET.getlist(name) if value
+        )
+        raw = f'{request.path}?{urlencode(params)}'
+        return f'page:{match.view_name}:{hashlib.sha1(raw.encode()).hexdigest()}'
+
+    def __call__(self, request):
+        match = self.cacheable(request)
+        if match is None:
+            return self.get_response(request)
+        key = self.cache_key(request, match)
+        versions = page_versions(match)
+        entry = cache.get(key)
+        if entry is not None:
+            age = time.time() - entry['created']
+            if entry['versions'] == versions and age < self.fresh:
+                return self.replay(entry, age, 'hit')
+            if age < self.fresh + self.stale:
+                # Kedaluwarsa atau sudah di-purge: kirim versi lama, bangun ulang di belakang
+                self.revalidate(request, key, match)
+                return self.replay(entry, age, 'stale')
+
+        response = self.get_response(request)
+        self.store(key, versions, response)
+        response['X-Page-Cache'] = 'miss'
+        return response
+
+    def store(self, key, versions, response):
+        if response.status_code != 200 or response.streaming or response.cookies:
+            return
+        cache_control = response.get('Cache-Control', '')
+        if 'private' in cache_control or 'no-store' in cache_control:
+            return
+        cache.set(key, {
+            'versions': versions,
+            'created': time.time(),
+            'status': response.status_code,
+            'headers': list(response.items()),
+            'content': response.content,
+        }, self.fresh + self.stale)
+
+    def replay(self, entry, age, state):
+        response = HttpResponse(entry['content'], status=entry['status'])
+        for header, value in entry['headers']:
+            response[header] = value
+        response['Age'] = str(int(age))
+        response['X-Page-Cache'] = state
+        return response
+
+    def revalidate(self, request, key, match):
+        # Kunci add() memastikan satu pembangunan ulang per halaman di semua worker
+        if not cache.add(f'{key}:refresh', 1, REFRESH_LOCK_SECONDS):
+            return
+        environ = {**request.META, 'wsgi.input': BytesIO(), 'CONTENT_LENGTH': '0'}
+        if self.background:
+            threading.Thread(target=self.refresh, args=(environ, key, match), daemon=True).start()
+        else:
+            self.refresh(environ, key, match)
+
+    def refresh(self, environ, key, match):
+        try:
+            versions = page_versions(match)
+            self.store(key, versions, self.get_response(WSGIRequest(environ)))
+        finally:
+            cache.delete(f'{key}:refresh')
+            if self.background:
+                connections.close_all()
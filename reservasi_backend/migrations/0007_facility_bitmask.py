@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:54
+
+from django.db import migrations, models
+
+
+def fill_facility_masks(apps, schema_editor):
+    Facility = apps.get_model('reservasi_backend', 'Facility')
+    Room = apps.get_model('reservasi_backend', 'Room')
+    Hotel = apps.get_model('reservasi_backend', 'Hotel')
+
+    for bit, facility in enumerate(Facility.objects.order_by('pk')[:63]):
+        facility.bit = bit
+        facility.save(update_fields=['bit'])
+
+    room_masks = {}
+    rows = Room.facilities.through.objects.filter(facility__bit__isnull=False).values_list('room_id', 'facility__bit')
+    for room_id, bit in rows:
+        room_masks[room_id] = room_masks.get(room_id, 0) | (1 << bit)
+    for room_id, mask in room_masks.items():
+        Room.objects.filter(pk=room_id).update(facility_mask=mask)
+
+    hotel_masks = {}
+    for hotel_id, mask in Room.objects.filter(is_available=True).values_list('hotel_id', 'facility_mask'):
+        hotel_masks[hotel_id] = hotel_masks.get(hotel_id, 0) | mask
+    for hotel_id, mask in hotel_masks.items():
+        Hotel.objects.filter(pk=hotel_id).update(facility_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservasi_backend', '0006_remove_payment_payment_code_reservation_email_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facility',
+            name='bit',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, unique=True, verbose_name='Bit Fasilitas'),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='facility_mask',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False, verbose_name='Bitmask Fasilitas'),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='facility_mask',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False, verbose_name='Bitmask Fasilitas'),
+        ),
+        migrations.AlterField(
+            model_name='hotel',
+            name='region',
+            field=models.CharField(choices=[('Lampung', 'Lampung'), ('Jakarta', 'Jakarta'), ('Surabaya', 'Surabaya'), ('Bandung', 'Bandung'), ('Sumatra Barat', 'Sumatra Barat'), ('Balikpapan', 'Bali'), ('Jawa Barat', 'Jawa Barat'), ('Jawa Timur', 'Jawa Timur'), ('Balikpapan', 'Balikpapan')], max_length=200, verbose_name='Region'),
+        ),
+        migrations.AlterField(
+            model_name='roomtype',
+            name='base_price',
+            field=models.DecimalField(decimal_places=3, max_digits=10, verbose_name='Harga per Malam'),
+        ),
+        migrations.RunPython(fill_facility_masks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:58
+
+from django.db import migrations, models
+
+
+def fill_min_prices(apps, schema_editor):
+    Hotel = apps.get_model('reservasi_backend', 'Hotel')
+    RoomType = apps.get_model('reservasi_backend', 'RoomType')
+    rows = RoomType.objects.values('hotel_id').annotate(price=models.Min('base_price')).values_list('hotel_id', 'price')
+    for hotel_id, price in rows:
+        Hotel.objects.filter(pk=hotel_id).update(min_price=price)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservasi_backend', '0008_hotel_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotel',
+            name='min_price',
+            field=models.DecimalField(blank=True, decimal_places=3, editable=False, max_digits=10, null=True, verbose_name='Harga Termurah'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['min_price', 'id'], name='hotel_min_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['average_rating', 'id'], name='hotel_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['star_rating', 'id'], name='hotel_star_idx'),
+        ),
+        migrations.RunPython(fill_min_prices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_cover_images(apps, schema_editor):
+    Hotel = apps.get_model('reservasi_backend', 'Hotel')
+    HotelGallery = apps.get_model('reservasi_backend', 'HotelGallery')
+    first_image = HotelGallery.objects.filter(hotel=models.OuterRef('pk')).order_by('pk').values('pk')[:1]
+    Hotel.objects.filter(cover_image__isnull=True).update(cover_image=models.Subquery(first_image))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservasi_backend', '0009_hotel_min_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotel',
+            name='cover_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='reservasi_backend.hotelgallery', verbose_name='Gambar Sampul'),
+        ),
+        migrations.RunPython(fill_cover_images, migrations.RunPython.noop),
+    ]
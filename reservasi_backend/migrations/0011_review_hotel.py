@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_review_hotels(apps, schema_editor):
+    Review = apps.get_model('reservasi_backend', 'Review')
+    Reservation = apps.get_model('reservasi_backend', 'Reservation')
+    hotel_id = Reservation.objects.filter(pk=models.OuterRef('reservation_id')).values('room__hotel_id')[:1]
+    Review.objects.filter(hotel__isnull=True).update(hotel=models.Subquery(hotel_id))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservasi_backend', '0010_hotel_cover_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='hotel',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='reservasi_backend.hotel', verbose_name='Hotel'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['hotel', '-created_at', '-id'], name='review_hotel_recent_idx'),
+        ),
+        migrations.RunPython(fill_review_hotels, migrations.RunPython.noop),
+    ]
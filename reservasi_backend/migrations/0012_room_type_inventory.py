@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:06
+
+import django.db.models.deletion
+from collections import Counter
+from datetime import date, timedelta
+from django.db import migrations, models
+
+
+def fill_inventory(apps, schema_editor):
+    Reservation = apps.get_model('reservasi_backend', 'Reservation')
+    Room = apps.get_model('reservasi_backend', 'Room')
+    RoomTypeInventory = apps.get_model('reservasi_backend', 'RoomTypeInventory')
+    room_type_id = Room.objects.filter(pk=models.OuterRef('room_id')).values('room_type_id')[:1]
+    Reservation.objects.filter(room_type__isnull=True).update(room_type=models.Subquery(room_type_id))
+
+    # Malam mendatang dari reservasi aktif menjadi baris inventori awal
+    today = date.today()
+    booked = Counter()
+    active = Reservation.objects.filter(
+        status__in=['PENDING', 'PAID', 'CHECKED_IN'], check_out__gt=today
+    ).values_list('room_type_id', 'check_in', 'check_out')
+    for type_id, check_in, check_out in active.iterator():
+        night = max(check_in, today)
+        while night < check_out:
+            booked[type_id, night] += 1
+            night += timedelta(days=1)
+    totals = dict(
+        Room.objects.filter(is_available=True).order_by().values('room_type_id')
+        .annotate(n=models.Count('pk')).values_list('room_type_id', 'n')
+    )
+    RoomTypeInventory.objects.bulk_create(
+        [
+            RoomTypeInventory(room_type_id=type_id, date=night, total=totals.get(type_id, 0), booked=count)
+            for (type_id, night), count in booked.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservasi_backend', '0011_review_hotel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='room_type',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='reservasi_backend.roomtype', verbose_name='Tipe Kamar'),
+        ),
+        migrations.CreateModel(
+            name='RoomTypeInventory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Malam')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Jumlah Kamar')),
+                ('booked', models.PositiveIntegerField(default=0, verbose_name='Terpesan')),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory', to='reservasi_backend.roomtype', verbose_name='Tipe Kamar')),
+            ],
+            options={
+                'verbose_name': 'Inventori Kamar',
+                'verbose_name_plural': 'Inventori Kamar',
+                'constraints': [models.UniqueConstraint(fields=('room_type', 'date'), name='inventory_room_type_date_uniq')],
+            },
+        ),
+        migrations.RunPython(fill_inventory, migrations.RunPython.noop),
+    ]
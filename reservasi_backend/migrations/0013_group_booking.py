@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservasi_backend', '0012_room_type_inventory'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payment',
+            name='reservation',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='reservasi_backend.reservation', verbose_name='Reservasi'),
+        ),
+        migrations.CreateModel(
+            name='Booking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('check_in', models.DateField(verbose_name='Tanggal Check-in')),
+                ('check_out', models.DateField(verbose_name='Tanggal Check-out')),
+                ('total_price', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Total Harga')),
+                ('status', models.CharField(choices=[('PENDING', 'Menunggu Pembayaran'), ('PAID', 'Dibayar'), ('CANCELLED', 'Dibatalkan')], default='PENDING', max_length=20, verbose_name='Status')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Dipesan Pada')),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='reservasi_backend.hotel', verbose_name='Hotel')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to=settings.AUTH_USER_MODEL, verbose_name='Pemesan')),
+            ],
+            options={
+                'verbose_name': 'Pemesanan Grup',
+                'verbose_name_plural': 'Pemesanan Grup',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='booking',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='payment', to='reservasi_backend.booking', verbose_name='Pemesanan Grup'),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='booking',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='reservasi_backend.booking', verbose_name='Pemesanan Grup'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:16
+
+import django.db.models.deletion
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def fill_daily_stats(apps, schema_editor):
+    Reservation = apps.get_model('reservasi_backend', 'Reservation')
+    DailyHotelStats = apps.get_model('reservasi_backend', 'DailyHotelStats')
+    totals = defaultdict(lambda: [0, Decimal(0), 0])
+    rows = Reservation.objects.filter(room_type__isnull=False).values_list(
+        'room_type_id', 'room__hotel_id', 'check_in', 'check_out', 'total_price', 'status'
+    )
+    for room_type_id, hotel_id, check_in, check_out, total_price, status in rows.iterator():
+        if status in ('PAID', 'CHECKED_IN', 'CHECKED_OUT'):
+            nights = (check_out - check_in).days
+            rate = (Decimal(total_price) / nights).quantize(Decimal('0.01')) if nights > 0 else Decimal(0)
+            for i in range(nights):
+                cell = totals[room_type_id, hotel_id, check_in + timedelta(days=i)]
+                cell[0] += 1
+                cell[1] += rate
+        elif status == 'CANCELLED':
+            totals[room_type_id, hotel_id, check_in][2] += 1
+    DailyHotelStats.objects.bulk_create(
+        [
+            DailyHotelStats(
+                room_type_id=room_type_id, hotel_id=hotel_id, date=day,
+                rooms_sold=sold, revenue=revenue, cancellations=cancelled,
+            )
+            for (room_type_id, hotel_id, day), (sold, revenue, cancelled) in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservasi_backend', '0013_group_booking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyHotelStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Tanggal')),
+                ('rooms_sold', models.IntegerField(default=0, verbose_name='Kamar Terjual')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Pendapatan')),
+                ('cancellations', models.IntegerField(default=0, verbose_name='Pembatalan')),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='reservasi_backend.hotel', verbose_name='Hotel')),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='reservasi_backend.roomtype', verbose_name='Tipe Kamar')),
+            ],
+            options={
+                'verbose_name': 'Statistik Harian Hotel',
+                'verbose_name_plural': 'Statistik Harian Hotel',
+                'indexes': [models.Index(fields=['date', 'hotel'], name='daily_stats_date_hotel_idx')],
+                'constraints': [models.UniqueConstraint(fields=('room_type', 'date'), name='daily_stats_room_type_date_uniq')],
+            },
+        ),
+        migrations.RunPython(fill_daily_stats, migrations.RunPython.noop),
+    ]
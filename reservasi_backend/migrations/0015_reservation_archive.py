@@ -0,0 +1,95 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservasi_backend', '0014_daily_hotel_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPayment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID Pembayaran')),
+                ('method', models.CharField(max_length=50, verbose_name='Metode Pembayaran')),
+                ('proof', models.ImageField(blank=True, null=True, upload_to='payment_proofs/', verbose_name='Bukti Pembayaran')),
+                ('is_paid', models.BooleanField(default=False, verbose_name='Lunas')),
+                ('paid_at', models.DateTimeField(blank=True, null=True, verbose_name='Dibayar Pada')),
+            ],
+            options={
+                'verbose_name': 'Arsip Pembayaran',
+                'verbose_name_plural': 'Arsip Pembayaran',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedReservation',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID Reservasi')),
+                ('first_name', models.CharField(max_length=30, verbose_name='Nama Depan')),
+                ('last_name', models.CharField(max_length=30, verbose_name='Nama Belakang')),
+                ('email', models.EmailField(blank=True, max_length=254, null=True, verbose_name='Email')),
+                ('phone', models.CharField(blank=True, max_length=20, null=True, verbose_name='Nomor Telepon')),
+                ('check_in', models.DateField(verbose_name='Tanggal Check-in')),
+                ('check_out', models.DateField(verbose_name='Tanggal Check-out')),
+                ('special_request', models.TextField(blank=True, null=True, verbose_name='Permintaan Khusus')),
+                ('total_price', models.DecimalField(decimal_places=2, default=0.0, max_digits=10, verbose_name='Total Harga')),
+                ('status', models.CharField(choices=[('PENDING', 'Menunggu Pembayaran'), ('PAID', 'Dibayar'), ('CHECKED_IN', 'Check-in'), ('CHECKED_OUT', 'Check-out'), ('CANCELLED', 'Dibatalkan')], max_length=20, verbose_name='Status')),
+                ('created_at', models.DateTimeField(verbose_name='Dipesan Pada')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Diarsipkan Pada')),
+            ],
+            options={
+                'verbose_name': 'Arsip Reservasi',
+                'verbose_name_plural': 'Arsip Reservasi',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='reservation',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='reservasi_backend.reservation', verbose_name='Reservasi'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['status', 'check_out'], name='reservation_status_out_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedreservation',
+            name='booking',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_reservations', to='reservasi_backend.booking', verbose_name='Pemesanan Grup'),
+        ),
+        migrations.AddField(
+            model_name='archivedreservation',
+            name='room',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reservations', to='reservasi_backend.room', verbose_name='Kamar'),
+        ),
+        migrations.AddField(
+            model_name='archivedreservation',
+            name='room_type',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_reservations', to='reservasi_backend.roomtype', verbose_name='Tipe Kamar'),
+        ),
+        migrations.AddField(
+            model_name='archivedreservation',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reservations', to=settings.AUTH_USER_MODEL, verbose_name='Pemesan'),
+        ),
+        migrations.AddField(
+            model_name='archivedpayment',
+            name='reservation',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='payment', to='reservasi_backend.archivedreservation', verbose_name='Reservasi'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='archived_reservation',
+            field=models.OneToOneField(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='review', to='reservasi_backend.archivedreservation', verbose_name='Arsip Reservasi'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedreservation',
+            index=models.Index(fields=['user', '-created_at'], name='archived_user_recent_idx'),
+        ),
+    ]
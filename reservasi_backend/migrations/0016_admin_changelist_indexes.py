@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_reservation_hotel(apps, schema_editor):
+    Reservation = apps.get_model('reservasi_backend', 'Reservation')
+    Room = apps.get_model('reservasi_backend', 'Room')
+    hotel_id = Room.objects.filter(pk=models.OuterRef('room_id')).values('hotel_id')[:1]
+    Reservation.objects.filter(hotel__isnull=True).update(hotel=models.Subquery(hotel_id))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservasi_backend', '0015_reservation_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='hotel',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='reservasi_backend.hotel', verbose_name='Hotel'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['-created_at', '-id'], name='reservation_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['hotel', '-created_at', '-id'], name='reservation_hotel_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['check_in'], name='reservation_check_in_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['-created_at', '-id'], name='review_recent_idx'),
+        ),
+        migrations.RunPython(fill_reservation_hotel, migrations.RunPython.noop),
+    ]
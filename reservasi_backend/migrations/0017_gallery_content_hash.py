@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:24
+
+import hashlib
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+def fill_content_hash(apps, schema_editor):
+    HotelGallery = apps.get_model('reservasi_backend', 'HotelGallery')
+    for image in HotelGallery.objects.filter(content_hash='').only('pk', 'image').iterator():
+        digest = hashlib.sha256()
+        try:
+            with default_storage.open(image.image.name, 'rb') as f:
+                for chunk in iter(lambda: f.read(64 * 1024), b''):
+                    digest.update(chunk)
+        except OSError:
+            continue
+        HotelGallery.objects.filter(pk=image.pk).update(content_hash=digest.hexdigest())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservasi_backend', '0016_admin_changelist_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotelgallery',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Hash Isi'),
+        ),
+        migrations.AddIndex(
+            model_name='hotelgallery',
+            index=models.Index(fields=['hotel', 'content_hash'], name='gallery_hotel_hash_idx'),
+        ),
+        migrations.RunPython(fill_content_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:26
+
+import django.utils.timezone
+import reservasi_backend.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservasi_backend', '0017_gallery_content_hash'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedpayment',
+            name='proof',
+            field=models.ImageField(blank=True, null=True, storage=reservasi_backend.storage.ContentAddressedStorage(), upload_to='payment_proofs/', verbose_name='Bukti Pembayaran'),
+        ),
+        migrations.AlterField(
+            model_name='hotelgallery',
+            name='image',
+            field=models.ImageField(storage=reservasi_backend.storage.ContentAddressedStorage(), upload_to='hotel_images/', verbose_name='Gambar'),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='proof',
+            field=models.ImageField(blank=True, null=True, storage=reservasi_backend.storage.ContentAddressedStorage(), upload_to='payment_proofs/', verbose_name='Bukti Pembayaran'),
+        ),
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Nama Berkas')),
+                ('size', models.BigIntegerField(default=0, verbose_name='Ukuran (byte)')),
+                ('refcount', models.IntegerField(default=0, verbose_name='Jumlah Referensi')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Dibuat Pada')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Diperbarui Pada')),
+            ],
+            options={
+                'verbose_name': 'Berkas Media',
+                'verbose_name_plural': 'Berkas Media',
+                'indexes': [models.Index(fields=['refcount', 'updated_at'], name='media_blob_orphan_idx')],
+            },
+        ),
+    ]
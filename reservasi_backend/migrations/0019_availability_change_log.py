@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def seed_availability_log(apps, schema_editor):
+    # Keadaan awal sebagai delta, sehingga feed dari kursor 0 menghasilkan keadaan lengkap
+    AvailabilityChange = apps.get_model('reservasi_backend', 'AvailabilityChange')
+    RoomType = apps.get_model('reservasi_backend', 'RoomType')
+    Room = apps.get_model('reservasi_backend', 'Room')
+    Reservation = apps.get_model('reservasi_backend', 'Reservation')
+    today = timezone.localdate()
+    changes = [
+        AvailabilityChange(kind='PRICE', room_type_id=pk, price=price)
+        for pk, price in RoomType.objects.values_list('pk', 'base_price').iterator()
+    ]
+    rooms = Room.objects.filter(is_available=True).order_by().values('room_type_id').annotate(n=models.Count('pk'))
+    changes += [
+        AvailabilityChange(kind='ROOM', room_type_id=row['room_type_id'], start_date=today, delta=row['n'])
+        for row in rooms
+    ]
+    holds = Reservation.objects.filter(
+        status__in=('PENDING', 'PAID', 'CHECKED_IN'), room_type__isnull=False, check_out__gt=today
+    ).values_list('room_type_id', 'check_in', 'check_out')
+    changes += [
+        AvailabilityChange(kind='RESERVATION', room_type_id=room_type_id, start_date=check_in, end_date=check_out, delta=-1)
+        for room_type_id, check_in, check_out in holds.iterator()
+    ]
+    AvailabilityChange.objects.bulk_create(changes, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservasi_backend', '0018_content_addressed_media'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilityChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('RESERVATION', 'Reservasi'), ('ROOM', 'Kamar'), ('PRICE', 'Harga')], max_length=12, verbose_name='Jenis')),
+                ('start_date', models.DateField(blank=True, null=True, verbose_name='Malam Pertama')),
+                ('end_date', models.DateField(blank=True, null=True, verbose_name='Sampai Malam')),
+                ('delta', models.IntegerField(default=0, verbose_name='Perubahan Sisa Kamar')),
+                ('price', models.DecimalField(blank=True, decimal_places=3, max_digits=10, null=True, verbose_name='Harga Baru')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Waktu')),
+                ('room_type', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='availability_changes', to='reservasi_backend.roomtype', verbose_name='Tipe Kamar')),
+            ],
+            options={
+                'verbose_name': 'Perubahan Ketersediaan',
+                'verbose_name_plural': 'Perubahan Ketersediaan',
+            },
+        ),
+        migrations.RunPython(seed_availability_log, migrations.RunPython.noop),
+    ]
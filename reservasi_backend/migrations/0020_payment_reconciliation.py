@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservasi_backend', '0019_availability_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatementLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, verbose_name='Sumber Mutasi')),
+                ('line_number', models.PositiveIntegerField(verbose_name='Baris')),
+                ('posted_on', models.DateField(blank=True, null=True, verbose_name='Tanggal Mutasi')),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True, verbose_name='Jumlah')),
+                ('reference', models.CharField(blank=True, max_length=20, verbose_name='Referensi')),
+                ('description', models.TextField(blank=True, verbose_name='Keterangan')),
+                ('reason', models.CharField(choices=[('MATCHED', 'Cocok Otomatis'), ('NO_MATCH', 'Tidak Ada Pembayaran Cocok'), ('AMBIGUOUS', 'Lebih dari Satu Kandidat'), ('INVALID', 'Baris Tidak Valid')], max_length=12, verbose_name='Hasil')),
+                ('is_resolved', models.BooleanField(default=False, verbose_name='Sudah Ditangani')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Diimpor Pada')),
+                ('payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='statement_lines', to='reservasi_backend.payment', verbose_name='Pembayaran')),
+            ],
+            options={
+                'verbose_name': 'Mutasi Rekening',
+                'verbose_name_plural': 'Mutasi Rekening',
+                'indexes': [models.Index(fields=['is_resolved', '-created_at'], name='statement_open_idx')],
+                'constraints': [models.UniqueConstraint(fields=('source', 'line_number'), name='statement_line_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservasi_backend', '0020_payment_reconciliation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('check_in', models.DateField(verbose_name='Tanggal Check-in')),
+                ('check_out', models.DateField(verbose_name='Tanggal Check-out')),
+                ('first_name', models.CharField(max_length=30, verbose_name='Nama Depan')),
+                ('last_name', models.CharField(max_length=30, verbose_name='Nama Belakang')),
+                ('email', models.EmailField(blank=True, max_length=254, null=True, verbose_name='Email')),
+                ('phone', models.CharField(blank=True, max_length=20, null=True, verbose_name='Nomor Telepon')),
+                ('special_request', models.TextField(blank=True, null=True, verbose_name='Permintaan Khusus')),
+                ('status', models.CharField(choices=[('WAITING', 'Menunggu'), ('OFFERED', 'Ditawarkan'), ('BOOKED', 'Dipesan'), ('EXPIRED', 'Kedaluwarsa'), ('CANCELLED', 'Dibatalkan')], default='WAITING', max_length=20, verbose_name='Status')),
+                ('offer_expires_at', models.DateTimeField(blank=True, null=True, verbose_name='Tawaran Berlaku Sampai')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Mendaftar Pada')),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='reservasi_backend.hotel', verbose_name='Hotel')),
+                ('reservation', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_entry', to='reservasi_backend.reservation', verbose_name='Reservasi')),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='reservasi_backend.roomtype', verbose_name='Tipe Kamar')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to=settings.AUTH_USER_MODEL, verbose_name='Pemesan')),
+            ],
+            options={
+                'verbose_name': 'Daftar Tunggu',
+                'verbose_name_plural': 'Daftar Tunggu',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'room_type', 'check_in'], name='waitlist_match_idx'), models.Index(fields=['status', 'offer_expires_at'], name='waitlist_offer_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservasi_backend', '0021_waitlist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Malam')),
+                ('rooms', models.PositiveIntegerField(default=0, verbose_name='Jumlah Kamar')),
+                ('rooms_sold', models.PositiveIntegerField(default=0, verbose_name='Terpesan')),
+                ('pace', models.PositiveIntegerField(default=0, verbose_name='Pesanan Baru')),
+                ('base_price', models.DecimalField(decimal_places=3, max_digits=10, verbose_name='Harga Dasar')),
+                ('multiplier', models.DecimalField(decimal_places=2, default=1, max_digits=5, verbose_name='Pengali')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Harga per Malam')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Dihitung Pada')),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rates', to='reservasi_backend.roomtype', verbose_name='Tipe Kamar')),
+            ],
+            options={
+                'verbose_name': 'Tarif Kamar',
+                'verbose_name_plural': 'Tarif Kamar',
+                'constraints': [models.UniqueConstraint(fields=('room_type', 'date'), name='rate_room_type_date_uniq')],
+            },
+        ),
+    ]
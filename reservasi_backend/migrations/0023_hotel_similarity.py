@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservasi_backend', '0022_room_rates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotelSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Peringkat')),
+                ('score', models.FloatField(default=0.0, verbose_name='Skor')),
+                ('computed_at', models.DateTimeField(auto_now_add=True, verbose_name='Dihitung Pada')),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_hotels', to='reservasi_backend.hotel', verbose_name='Hotel')),
+                ('similar_hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reservasi_backend.hotel', verbose_name='Hotel Serupa')),
+            ],
+            options={
+                'verbose_name': 'Hotel Serupa',
+                'verbose_name_plural': 'Hotel Serupa',
+                'constraints': [models.UniqueConstraint(fields=('hotel', 'rank'), name='similarity_hotel_rank_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:02
+
+import hashlib
+from collections import Counter
+from django.db import migrations, models
+
+
+def fingerprint(posted_on, amount, description, occurrence):
+    # Salinan reconciliation.line_fingerprint pada saat migrasi ini dibuat
+    raw = '|'.join([
+        posted_on.isoformat() if posted_on else '',
+        str(int((amount * 100).to_integral_value())) if amount is not None else '',
+        ' '.join(description.split()),
+        str(occurrence),
+    ])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def fill_fingerprint(apps, schema_editor):
+    StatementLine = apps.get_model('reservasi_backend', 'StatementLine')
+    occurrences = Counter()
+    taken = set()
+    rows = StatementLine.objects.order_by('source', 'line_number').values_list(
+        'pk', 'source', 'posted_on', 'amount', 'description'
+    )
+    for pk, source, posted_on, amount, description in rows.iterator():
+        content = (source, fingerprint(posted_on, amount, description, 0))
+        occurrences[content] += 1
+        value = fingerprint(posted_on, amount, description, occurrences[content])
+        # Baris sama dari berkas berbeda (impor ganda sebelum perbaikan) tetap disimpan dengan sidik unik
+        if value in taken:
+            value = fingerprint(posted_on, amount, description, f'{source}:{pk}')
+        taken.add(value)
+        StatementLine.objects.filter(pk=pk).update(fingerprint=value)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservasi_backend', '0023_hotel_similarity'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='statementline',
+            name='statement_line_uniq',
+        ),
+        migrations.AddField(
+            model_name='statementline',
+            name='fingerprint',
+            field=models.CharField(default='', editable=False, max_length=64, verbose_name='Sidik Isi'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_fingerprint, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='statementline',
+            constraint=models.UniqueConstraint(fields=('fingerprint',), name='statement_fingerprint_uniq'),
+        ),
+    ]
@@ -1,10 +1,14 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import User
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from decimal import Decimal
+from functools import reduce
+import operator
+from .geo import encode as geohash_encode
+from .storage import content_storage, file_digest
 
 # Fungsi default untuk ForeignKey
 def get_default_hotel():
@@ -94,6 +98,52 @@ class Hotel(models.Model):
         validators=[MinValueValidator(0), MaxValueValidator(5)],
         verbose_name=_("Rating Bintang (0-5)")
     )
+    latitude = models.FloatField(
+        blank=True,
+        null=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
+        verbose_name=_("Lintang")
+    )
+    longitude = models.FloatField(
+        blank=True,
+        null=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)],
+        verbose_name=_("Bujur")
+    )
+    # Diisi otomatis dari koordinat, dipakai sebagai index spasial
+    geohash = models.CharField(
+        max_length=12,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name=_("Geohash")
+    )
+    # Gabungan (OR) bitmask fasilitas dari semua kamar yang tersedia
+    facility_mask = models.BigIntegerField(
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name=_("Bitmask Fasilitas")
+    )
+    # Gambar sampul untuk kartu hotel, dijaga oleh signal HotelGallery
+    cover_image = models.ForeignKey(
+        'HotelGallery',
+        on_delete=models.SET_NULL,
+        related_name='+',
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name=_("Gambar Sampul")
+    )
+    # Harga termurah dari tipe kamar, dijaga oleh signal RoomType
+    min_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=3,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name=_("Harga Termurah")
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name=_("Dibuat Pada")
@@ -102,13 +152,37 @@ class Hotel(models.Model):
     class Meta:
         verbose_name = _("Hotel")
         verbose_name_plural = _("Hotel")
+        indexes = [
+            models.Index(fields=['latitude', 'longitude'], name='hotel_lat_lng_idx'),
+            models.Index(fields=['min_price', 'id'], name='hotel_min_price_idx'),
+            models.Index(fields=['average_rating', 'id'], name='hotel_rating_idx'),
+            models.Index(fields=['star_rating', 'id'], name='hotel_star_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    # Kolom turunan yang dijaga signal, tidak ikut ditimpa oleh save() biasa
+    DERIVED_FIELDS = ('facility_mask', 'min_price', 'cover_image')
+
+    def save(self, *args, **kwargs):
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geohash_encode(self.latitude, self.longitude)
+        else:
+            self.geohash = ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        elif update_fields is None and not self._state.adding and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.DERIVED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def update_average_rating(self):
         from django.db.models import Avg
-        reviews = Review.objects.filter(reservation__room__hotel=self)
+        reviews = Review.objects.filter(hotel=self)
         if reviews.exists():
             self.average_rating = reviews.aggregate(Avg('rating'))['rating__avg']
         else:
@@ -127,6 +201,7 @@ class HotelGallery(models.Model):
     )
     image = models.ImageField(
         upload_to='hotel_images/',
+        storage=content_storage,
         verbose_name=_("Gambar")
     )
     caption = models.CharField(
@@ -135,14 +210,40 @@ class HotelGallery(models.Model):
         null=True,
         verbose_name=_("Keterangan")
     )
+    # SHA-256 isi gambar untuk mendeteksi unggahan ganda
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name=_("Hash Isi")
+    )
 
     class Meta:
         verbose_name = _("Galeri Hotel")
         verbose_name_plural = _("Galeri Hotel")
+        indexes = [
+            models.Index(fields=['hotel', 'content_hash'], name='gallery_hotel_hash_idx'),
+        ]
 
     def __str__(self):
         return f"Gambar untuk {self.hotel.name}"
 
+    def save(self, *args, **kwargs):
+        if self.image and not self.content_hash:
+            try:
+                self.content_hash = file_digest(self.image)
+            except OSError:
+                pass
+        super().save(*args, **kwargs)
+
+def refresh_hotel_cover_images(hotel_ids):
+    # Hotel tanpa sampul memakai gambar galeri pertama yang masih ada
+    first_image = HotelGallery.objects.filter(hotel=models.OuterRef('pk')).order_by('pk').values('pk')[:1]
+    Hotel.objects.filter(pk__in=list(hotel_ids), cover_image__isnull=True).update(
+        cover_image=models.Subquery(first_image)
+    )
+
 # ======================
 # Tipe Kamar
 # ======================
@@ -175,14 +276,42 @@ class RoomType(models.Model):
     def __str__(self):
         return f"{self.name} - {self.hotel.name}"
 
+    def save(self, *args, **kwargs):
+        # Signal harga & log perubahan ketersediaan ikut satu transaksi dengan baris ini
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+def refresh_hotel_min_prices(hotel_ids):
+    hotel_ids = list(hotel_ids)
+    prices = dict.fromkeys(hotel_ids)
+    rows = RoomType.objects.filter(hotel_id__in=hotel_ids).values('hotel_id').annotate(
+        price=models.Min('base_price')
+    ).values_list('hotel_id', 'price')
+    prices.update(rows)
+    by_price = {}
+    for hotel_id, price in prices.items():
+        by_price.setdefault(price, []).append(hotel_id)
+    for price, ids in by_price.items():
+        Hotel.objects.filter(pk__in=ids).update(min_price=price)
+
 # ======================
 # Fasilitas Kamar
 # ======================
 class Facility(models.Model):
+    # Bit 0-62 agar bitmask tetap positif di BigIntegerField (signed 64-bit)
+    MAX_BITS = 63
+
     name = models.CharField(
         max_length=100,
         verbose_name=_("Nama Fasilitas")
     )
+    bit = models.PositiveSmallIntegerField(
+        unique=True,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name=_("Bit Fasilitas")
+    )
 
     class Meta:
         verbose_name = _("Fasilitas")
@@ -191,6 +320,74 @@ class Facility(models.Model):
     def __str__(self):
         return self.name
 
+    def free_bit(self):
+        used = set(Facility.objects.exclude(bit__isnull=True).values_list('bit', flat=True))
+        return next((b for b in range(self.MAX_BITS) if b not in used), None)
+
+    def save(self, *args, **kwargs):
+        if self.bit is not None:
+            return super().save(*args, **kwargs)
+        # Dua proses bisa memilih bit bebas yang sama; yang kalah di constraint unik mencoba bit berikutnya.
+        # Setelah 63 bit habis fasilitas disimpan tanpa bit dan difilter lewat M2M
+        for _attempt in range(self.MAX_BITS):
+            self.bit = self.free_bit()
+            if self.bit is None:
+                break
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Galat selain bentrok bit tidak ditelan
+                taken = Facility.objects.filter(bit=self.bit).exists()
+                self.bit = None
+                if not taken:
+                    raise
+        super().save(*args, **kwargs)
+
+    @property
+    def mask(self):
+        return 0 if self.bit is None else 1 << self.bit
+
+
+def facility_mask(facility_ids):
+    bits = Facility.objects.filter(pk__in=facility_ids, bit__isnull=False).values_list('bit', flat=True)
+    return reduce(operator.or_, (1 << b for b in bits), 0)
+
+
+def mask_to_bits(mask):
+    return [b for b in range(Facility.MAX_BITS) if mask & (1 << b)]
+
+
+def refresh_room_facility_masks(room_ids):
+    room_ids = list(room_ids)
+    masks = dict.fromkeys(room_ids, 0)
+    rows = Room.facilities.through.objects.filter(
+        room_id__in=room_ids, facility__bit__isnull=False
+    ).values_list('room_id', 'facility__bit')
+    for room_id, bit in rows:
+        masks[room_id] |= 1 << bit
+    # Satu UPDATE per nilai mask, bukan per kamar
+    by_mask = {}
+    for room_id, mask in masks.items():
+        by_mask.setdefault(mask, []).append(room_id)
+    for mask, ids in by_mask.items():
+        Room.objects.filter(pk__in=ids).update(facility_mask=mask)
+
+
+def refresh_hotel_facility_masks(hotel_ids):
+    hotel_ids = list(hotel_ids)
+    masks = dict.fromkeys(hotel_ids, 0)
+    rows = Room.objects.filter(
+        hotel_id__in=hotel_ids, is_available=True
+    ).values_list('hotel_id', 'facility_mask').distinct()
+    for hotel_id, mask in rows:
+        masks[hotel_id] |= mask
+    by_mask = {}
+    for hotel_id, mask in masks.items():
+        by_mask.setdefault(mask, []).append(hotel_id)
+    for mask, ids in by_mask.items():
+        Hotel.objects.filter(pk__in=ids).update(facility_mask=mask)
+
 # ======================
 # Kamar
 # ======================
@@ -220,6 +417,12 @@ class Room(models.Model):
         default=True,
         verbose_name=_("Tersedia")
     )
+    facility_mask = models.BigIntegerField(
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name=_("Bitmask Fasilitas")
+    )
 
     class Meta:
         verbose_name = _("Kamar")
@@ -232,6 +435,221 @@ class Room(models.Model):
         if Room.objects.filter(hotel=self.hotel, number=self.number).exclude(pk=self.pk).exists():
             raise ValidationError(_("Nomor kamar sudah ada untuk hotel ini."))
 
+    def save(self, *args, **kwargs):
+        # Signal inventori & log perubahan ketersediaan ikut satu transaksi dengan baris ini
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+# ======================
+# Inventori Tipe Kamar
+# ======================
+class RoomTypeInventory(models.Model):
+    # Satu baris per (tipe kamar, malam); ketersediaan = total - booked
+    room_type = models.ForeignKey(
+        RoomType,
+        related_name='inventory',
+        on_delete=models.CASCADE,
+        verbose_name=_("Tipe Kamar")
+    )
+    date = models.DateField(
+        verbose_name=_("Malam")
+    )
+    total = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Jumlah Kamar")
+    )
+    booked = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Terpesan")
+    )
+
+    class Meta:
+        verbose_name = _("Inventori Kamar")
+        verbose_name_plural = _("Inventori Kamar")
+        constraints = [
+            models.UniqueConstraint(fields=['room_type', 'date'], name='inventory_room_type_date_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.room_type.name} {self.date}: {self.booked}/{self.total}"
+
+    @property
+    def free(self):
+        return max(0, self.total - self.booked)
+
+
+class RoomRate(models.Model):
+    # Harga per (tipe kamar, malam) hasil manage.py reprice; input disimpan agar run berikutnya
+    # hanya menghitung ulang malam yang berubah
+    room_type = models.ForeignKey(
+        RoomType,
+        related_name='rates',
+        on_delete=models.CASCADE,
+        verbose_name=_("Tipe Kamar")
+    )
+    date = models.DateField(
+        verbose_name=_("Malam")
+    )
+    rooms = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Jumlah Kamar")
+    )
+    rooms_sold = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Terpesan")
+    )
+    pace = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Pesanan Baru")
+    )
+    base_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=3,
+        verbose_name=_("Harga Dasar")
+    )
+    multiplier = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        default=1,
+        verbose_name=_("Pengali")
+    )
+    price = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        verbose_name=_("Harga per Malam")
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_("Dihitung Pada")
+    )
+
+    class Meta:
+        verbose_name = _("Tarif Kamar")
+        verbose_name_plural = _("Tarif Kamar")
+        constraints = [
+            models.UniqueConstraint(fields=['room_type', 'date'], name='rate_room_type_date_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.room_type.name} {self.date}: {self.price}"
+
+
+class AvailabilityChange(models.Model):
+    # Log tambah-saja untuk sinkronisasi channel manager; id dipakai sebagai kursor feed
+    KIND_CHOICES = [
+        ('RESERVATION', _('Reservasi')),
+        ('ROOM', _('Kamar')),
+        ('PRICE', _('Harga')),
+    ]
+    # Tanpa constraint agar log tetap utuh walau tipe kamarnya dihapus
+    room_type = models.ForeignKey(
+        RoomType,
+        related_name='availability_changes',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        verbose_name=_("Tipe Kamar")
+    )
+    kind = models.CharField(
+        max_length=12,
+        choices=KIND_CHOICES,
+        verbose_name=_("Jenis")
+    )
+    start_date = models.DateField(
+        blank=True,
+        null=True,
+        verbose_name=_("Malam Pertama")
+    )
+    # Eksklusif; kosong berarti berlaku seterusnya
+    end_date = models.DateField(
+        blank=True,
+        null=True,
+        verbose_name=_("Sampai Malam")
+    )
+    delta = models.IntegerField(
+        default=0,
+        verbose_name=_("Perubahan Sisa Kamar")
+    )
+    price = models.DecimalField(
+        max_digits=10,
+        decimal_places=3,
+        blank=True,
+        null=True,
+        verbose_name=_("Harga Baru")
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_("Waktu")
+    )
+
+    class Meta:
+        verbose_name = _("Perubahan Ketersediaan")
+        verbose_name_plural = _("Perubahan Ketersediaan")
+
+    def __str__(self):
+        return f"#{self.pk} {self.kind} tipe {self.room_type_id}"
+
+# ======================
+# Pemesanan Grup
+# ======================
+class Booking(models.Model):
+    # Induk beberapa reservasi yang dipesan dan dibayar sekaligus
+    STATUS_CHOICES = [
+        ('PENDING', _('Menunggu Pembayaran')),
+        ('PAID', _('Dibayar')),
+        ('CANCELLED', _('Dibatalkan')),
+    ]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='bookings',
+        verbose_name=_("Pemesan")
+    )
+    hotel = models.ForeignKey(
+        Hotel,
+        on_delete=models.CASCADE,
+        related_name='bookings',
+        verbose_name=_("Hotel")
+    )
+    check_in = models.DateField(
+        verbose_name=_("Tanggal Check-in")
+    )
+    check_out = models.DateField(
+        verbose_name=_("Tanggal Check-out")
+    )
+    total_price = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name=_("Total Harga")
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='PENDING',
+        verbose_name=_("Status")
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_("Dipesan Pada")
+    )
+
+    class Meta:
+        verbose_name = _("Pemesanan Grup")
+        verbose_name_plural = _("Pemesanan Grup")
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Pemesanan #{self.id} - {self.hotel.name} ({self.check_in} - {self.check_out})"
+
+    def duration(self):
+        return (self.check_out - self.check_in).days
+
+    @property
+    def payment_reference(self):
+        # Dicantumkan tamu di berita transfer, dibaca saat rekonsiliasi mutasi
+        return f"GRP{self.pk}"
+
 # ======================
 # Reservasi
 # ======================
@@ -255,6 +673,32 @@ class Reservation(models.Model):
         related_name='reservations',
         verbose_name=_("Kamar")
     )
+    room_type = models.ForeignKey(
+        RoomType,
+        on_delete=models.CASCADE,
+        related_name='reservations',
+        blank=True,
+        null=True,
+        verbose_name=_("Tipe Kamar")
+    )
+    # Salinan hotel dari kamar agar filter admin tidak perlu join
+    hotel = models.ForeignKey(
+        Hotel,
+        on_delete=models.CASCADE,
+        related_name='reservations',
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name=_("Hotel")
+    )
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.CASCADE,
+        related_name='reservations',
+        blank=True,
+        null=True,
+        verbose_name=_("Pemesanan Grup")
+    )
     first_name = models.CharField(
         max_length=30,
         verbose_name=_("Nama Depan")
@@ -306,6 +750,12 @@ class Reservation(models.Model):
         verbose_name = _("Reservasi")
         verbose_name_plural = _("Reservasi")
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'check_out'], name='reservation_status_out_idx'),
+            models.Index(fields=['-created_at', '-id'], name='reservation_recent_idx'),
+            models.Index(fields=['hotel', '-created_at', '-id'], name='reservation_hotel_recent_idx'),
+            models.Index(fields=['check_in'], name='reservation_check_in_idx'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.room.number} ({self.check_in} - {self.check_out})"
@@ -315,7 +765,7 @@ class Reservation(models.Model):
             raise ValidationError(_("Tanggal check-in dan check-out harus diisi."))
         if self.check_out <= self.check_in:
             raise ValidationError(_("Tanggal check-out harus lebih besar dari tanggal check-in."))
-        if self.room:
+        if self.room_id:
             overlapping_reservations = Reservation.objects.filter(
                 room=self.room,
                 check_in__lt=self.check_out,
@@ -327,9 +777,22 @@ class Reservation(models.Model):
         if self.phone and not self.phone.isdigit():
             raise ValidationError(_("Nomor telepon harus berupa angka."))
 
+    def save(self, *args, **kwargs):
+        if self.room_id is not None:
+            self.hotel_id = self.room.hotel_id
+            if self.room_type_id is None:
+                self.room_type_id = self.room.room_type_id
+        # Signal inventori, statistik & log perubahan ketersediaan ikut satu transaksi dengan baris ini
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
     def duration(self):
         return (self.check_out - self.check_in).days
 
+    @property
+    def payment_reference(self):
+        return f"RSV{self.pk}"
+
     def calculate_total_price(self):
         duration = self.duration()
         self.total_price = self.room.room_type.base_price * duration
@@ -337,6 +800,332 @@ class Reservation(models.Model):
         self.total_price += tax
         self.save()
 
+# ======================
+# Daftar Tunggu
+# ======================
+class WaitlistEntry(models.Model):
+    # Permintaan (tipe kamar, rentang malam) yang ditawari hold begitu ada kamar yang kosong
+    STATUS_CHOICES = [
+        ('WAITING', _('Menunggu')),
+        ('OFFERED', _('Ditawarkan')),
+        ('BOOKED', _('Dipesan')),
+        ('EXPIRED', _('Kedaluwarsa')),
+        ('CANCELLED', _('Dibatalkan')),
+    ]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries',
+        verbose_name=_("Pemesan")
+    )
+    hotel = models.ForeignKey(
+        Hotel,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries',
+        verbose_name=_("Hotel")
+    )
+    room_type = models.ForeignKey(
+        RoomType,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries',
+        verbose_name=_("Tipe Kamar")
+    )
+    check_in = models.DateField(
+        verbose_name=_("Tanggal Check-in")
+    )
+    check_out = models.DateField(
+        verbose_name=_("Tanggal Check-out")
+    )
+    first_name = models.CharField(
+        max_length=30,
+        verbose_name=_("Nama Depan")
+    )
+    last_name = models.CharField(
+        max_length=30,
+        verbose_name=_("Nama Belakang")
+    )
+    email = models.EmailField(
+        verbose_name=_("Email"),
+        null=True,
+        blank=True
+    )
+    phone = models.CharField(
+        max_length=20,
+        verbose_name=_("Nomor Telepon"),
+        null=True,
+        blank=True
+    )
+    special_request = models.TextField(
+        blank=True,
+        null=True,
+        verbose_name=_("Permintaan Khusus")
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='WAITING',
+        verbose_name=_("Status")
+    )
+    # Reservasi PENDING yang dibuat saat tawaran diberikan
+    reservation = models.OneToOneField(
+        Reservation,
+        on_delete=models.SET_NULL,
+        related_name='waitlist_entry',
+        blank=True,
+        null=True,
+        verbose_name=_("Reservasi")
+    )
+    offer_expires_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name=_("Tawaran Berlaku Sampai")
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_("Mendaftar Pada")
+    )
+
+    class Meta:
+        verbose_name = _("Daftar Tunggu")
+        verbose_name_plural = _("Daftar Tunggu")
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'room_type', 'check_in'], name='waitlist_match_idx'),
+            models.Index(fields=['status', 'offer_expires_at'], name='waitlist_offer_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.first_name} {self.last_name} - {self.room_type.name} ({self.check_in} - {self.check_out})"
+
+# ======================
+# Arsip Reservasi
+# ======================
+class ArchivedReservation(models.Model):
+    # Salinan reservasi selesai/dibatalkan; id sama dengan id reservasi asalnya
+    id = models.BigIntegerField(
+        primary_key=True,
+        verbose_name=_("ID Reservasi")
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_reservations',
+        verbose_name=_("Pemesan")
+    )
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        related_name='archived_reservations',
+        verbose_name=_("Kamar")
+    )
+    room_type = models.ForeignKey(
+        RoomType,
+        on_delete=models.CASCADE,
+        related_name='archived_reservations',
+        blank=True,
+        null=True,
+        verbose_name=_("Tipe Kamar")
+    )
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.SET_NULL,
+        related_name='archived_reservations',
+        blank=True,
+        null=True,
+        verbose_name=_("Pemesanan Grup")
+    )
+    first_name = models.CharField(
+        max_length=30,
+        verbose_name=_("Nama Depan")
+    )
+    last_name = models.CharField(
+        max_length=30,
+        verbose_name=_("Nama Belakang")
+    )
+    email = models.EmailField(
+        verbose_name=_("Email"),
+        null=True,
+        blank=True
+    )
+    phone = models.CharField(
+        max_length=20,
+        verbose_name=_("Nomor Telepon"),
+        null=True,
+        blank=True
+    )
+    check_in = models.DateField(
+        verbose_name=_("Tanggal Check-in")
+    )
+    check_out = models.DateField(
+        verbose_name=_("Tanggal Check-out")
+    )
+    special_request = models.TextField(
+        blank=True,
+        null=True,
+        verbose_name=_("Permintaan Khusus")
+    )
+    total_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0.00,
+        verbose_name=_("Total Harga")
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Reservation.STATUS_CHOICES,
+        verbose_name=_("Status")
+    )
+    created_at = models.DateTimeField(
+        verbose_name=_("Dipesan Pada")
+    )
+    archived_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_("Diarsipkan Pada")
+    )
+
+    class Meta:
+        verbose_name = _("Arsip Reservasi")
+        verbose_name_plural = _("Arsip Reservasi")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='archived_user_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.first_name} {self.last_name} - {self.room.number} ({self.check_in} - {self.check_out})"
+
+    def duration(self):
+        return (self.check_out - self.check_in).days
+
+
+class ArchivedPayment(models.Model):
+    id = models.BigIntegerField(
+        primary_key=True,
+        verbose_name=_("ID Pembayaran")
+    )
+    reservation = models.OneToOneField(
+        ArchivedReservation,
+        on_delete=models.CASCADE,
+        related_name='payment',
+        verbose_name=_("Reservasi")
+    )
+    method = models.CharField(
+        max_length=50,
+        verbose_name=_("Metode Pembayaran")
+    )
+    # Hanya nama file bukti; berkasnya tetap di storage yang sama
+    proof = models.ImageField(
+        upload_to='payment_proofs/',
+        storage=content_storage,
+        blank=True,
+        null=True,
+        verbose_name=_("Bukti Pembayaran")
+    )
+    is_paid = models.BooleanField(
+        default=False,
+        verbose_name=_("Lunas")
+    )
+    paid_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name=_("Dibayar Pada")
+    )
+
+    class Meta:
+        verbose_name = _("Arsip Pembayaran")
+        verbose_name_plural = _("Arsip Pembayaran")
+
+    def __str__(self):
+        return f"Pembayaran #{self.reservation_id} - {'Lunas' if self.is_paid else 'Belum Lunas'}"
+
+# ======================
+# Statistik Harian
+# ======================
+class DailyHotelStats(models.Model):
+    # Rollup per (tipe kamar, malam); total hotel = SUM per hotel_id
+    hotel = models.ForeignKey(
+        Hotel,
+        related_name='daily_stats',
+        on_delete=models.CASCADE,
+        verbose_name=_("Hotel")
+    )
+    room_type = models.ForeignKey(
+        RoomType,
+        related_name='daily_stats',
+        on_delete=models.CASCADE,
+        verbose_name=_("Tipe Kamar")
+    )
+    date = models.DateField(
+        verbose_name=_("Tanggal")
+    )
+    rooms_sold = models.IntegerField(
+        default=0,
+        verbose_name=_("Kamar Terjual")
+    )
+    revenue = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name=_("Pendapatan")
+    )
+    cancellations = models.IntegerField(
+        default=0,
+        verbose_name=_("Pembatalan")
+    )
+
+    class Meta:
+        verbose_name = _("Statistik Harian Hotel")
+        verbose_name_plural = _("Statistik Harian Hotel")
+        constraints = [
+            models.UniqueConstraint(fields=['room_type', 'date'], name='daily_stats_room_type_date_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'hotel'], name='daily_stats_date_hotel_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.hotel.name} {self.date}: {self.rooms_sold} kamar"
+
+# ======================
+# Hotel Serupa
+# ======================
+class HotelSimilarity(models.Model):
+    # K tetangga terdekat per hotel hasil manage.py build_similar_hotels; rank 1 = paling mirip
+    hotel = models.ForeignKey(
+        Hotel,
+        on_delete=models.CASCADE,
+        related_name='similar_hotels',
+        verbose_name=_("Hotel")
+    )
+    similar_hotel = models.ForeignKey(
+        Hotel,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_("Hotel Serupa")
+    )
+    rank = models.PositiveSmallIntegerField(
+        verbose_name=_("Peringkat")
+    )
+    score = models.FloatField(
+        default=0.0,
+        verbose_name=_("Skor")
+    )
+    computed_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_("Dihitung Pada")
+    )
+
+    class Meta:
+        verbose_name = _("Hotel Serupa")
+        verbose_name_plural = _("Hotel Serupa")
+        constraints = [
+            models.UniqueConstraint(fields=['hotel', 'rank'], name='similarity_hotel_rank_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.hotel_id} -> {self.similar_hotel_id} (#{self.rank})"
+
 # ======================
 # Pembayaran
 # ======================
@@ -346,11 +1135,22 @@ class Payment(models.Model):
         ('E_WALLET', _('Dompet Digital')),
     ]
 
+    # Pembayaran milik satu reservasi atau satu pemesanan grup
     reservation = models.OneToOneField(
         Reservation,
         on_delete=models.CASCADE,
+        blank=True,
+        null=True,
         verbose_name=_("Reservasi")
     )
+    booking = models.OneToOneField(
+        Booking,
+        on_delete=models.CASCADE,
+        related_name='payment',
+        blank=True,
+        null=True,
+        verbose_name=_("Pemesanan Grup")
+    )
     method = models.CharField(
         max_length=50,
         choices=PAYMENT_METHODS,
@@ -359,6 +1159,7 @@ class Payment(models.Model):
     )
     proof = models.ImageField(
         upload_to='payment_proofs/',
+        storage=content_storage,
         blank=True,
         null=True,
         verbose_name=_("Bukti Pembayaran")
@@ -378,17 +1179,119 @@ class Payment(models.Model):
         verbose_name_plural = _("Pembayaran")
 
     def __str__(self):
-        return f"Pembayaran #{self.reservation.id} - {'Lunas' if self.is_paid else 'Belum Lunas'}"
+        target = f"Grup #{self.booking_id}" if self.booking_id else f"#{self.reservation_id}"
+        return f"Pembayaran {target} - {'Lunas' if self.is_paid else 'Belum Lunas'}"
+
+
+class StatementLine(models.Model):
+    # Baris mutasi rekening yang sudah diimpor; yang belum cocok menjadi antrean tinjauan keuangan
+    REASON_CHOICES = [
+        ('MATCHED', _('Cocok Otomatis')),
+        ('NO_MATCH', _('Tidak Ada Pembayaran Cocok')),
+        ('AMBIGUOUS', _('Lebih dari Satu Kandidat')),
+        ('INVALID', _('Baris Tidak Valid')),
+    ]
+
+    source = models.CharField(
+        max_length=255,
+        verbose_name=_("Sumber Mutasi")
+    )
+    line_number = models.PositiveIntegerField(
+        verbose_name=_("Baris")
+    )
+    # Hash isi baris (tanggal, jumlah, keterangan, urutan kemunculan); kunci deduplikasi impor ulang
+    fingerprint = models.CharField(
+        max_length=64,
+        editable=False,
+        verbose_name=_("Sidik Isi")
+    )
+    posted_on = models.DateField(
+        blank=True,
+        null=True,
+        verbose_name=_("Tanggal Mutasi")
+    )
+    amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        verbose_name=_("Jumlah")
+    )
+    reference = models.CharField(
+        max_length=20,
+        blank=True,
+        verbose_name=_("Referensi")
+    )
+    description = models.TextField(
+        blank=True,
+        verbose_name=_("Keterangan")
+    )
+    payment = models.ForeignKey(
+        Payment,
+        related_name='statement_lines',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        verbose_name=_("Pembayaran")
+    )
+    reason = models.CharField(
+        max_length=12,
+        choices=REASON_CHOICES,
+        verbose_name=_("Hasil")
+    )
+    is_resolved = models.BooleanField(
+        default=False,
+        verbose_name=_("Sudah Ditangani")
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_("Diimpor Pada")
+    )
+
+    class Meta:
+        verbose_name = _("Mutasi Rekening")
+        verbose_name_plural = _("Mutasi Rekening")
+        constraints = [
+            models.UniqueConstraint(fields=['fingerprint'], name='statement_fingerprint_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['is_resolved', '-created_at'], name='statement_open_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.source}:{self.line_number} ({self.get_reason_display()})"
 
 # ======================
 # Ulasan / Review
 # ======================
 class Review(models.Model):
+    # Ulasan tetap di tabel aktif; saat reservasinya diarsipkan, relasinya dipindah
     reservation = models.OneToOneField(
         Reservation,
         on_delete=models.CASCADE,
+        blank=True,
+        null=True,
         verbose_name=_("Reservasi")
     )
+    archived_reservation = models.OneToOneField(
+        ArchivedReservation,
+        on_delete=models.CASCADE,
+        related_name='review',
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name=_("Arsip Reservasi")
+    )
+    # Salinan hotel dari reservasi agar daftar ulasan cukup memakai satu index
+    hotel = models.ForeignKey(
+        Hotel,
+        on_delete=models.CASCADE,
+        related_name='reviews',
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name=_("Hotel")
+    )
     rating = models.PositiveSmallIntegerField(
         validators=[MinValueValidator(1), MaxValueValidator(5)],
         verbose_name=_("Rating (1-5)")
@@ -406,10 +1309,56 @@ class Review(models.Model):
     class Meta:
         verbose_name = _("Ulasan")
         verbose_name_plural = _("Ulasan")
+        indexes = [
+            models.Index(fields=['hotel', '-created_at', '-id'], name='review_hotel_recent_idx'),
+            models.Index(fields=['-created_at', '-id'], name='review_recent_idx'),
+        ]
 
     def __str__(self):
-        return f"Ulasan {self.reservation.room.number} oleh {self.reservation.user.username}"
+        return f"Ulasan {self.stay.room.number} oleh {self.stay.user.username}"
+
+    @property
+    def stay(self):
+        return self.reservation if self.reservation_id else self.archived_reservation
 
     def save(self, *args, **kwargs):
+        if self.hotel_id is None:
+            self.hotel_id = self.stay.room.hotel_id
         super().save(*args, **kwargs)
-        self.reservation.room.hotel.update_average_rating()
\ No newline at end of file
+        self.hotel.update_average_rating()
+# ======================
+# Berkas Media
+# ======================
+class MediaBlob(models.Model):
+    # Satu baris per berkas di storage; refcount = jumlah baris model yang memakainya
+    name = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name=_("Nama Berkas")
+    )
+    size = models.BigIntegerField(
+        default=0,
+        verbose_name=_("Ukuran (byte)")
+    )
+    refcount = models.IntegerField(
+        default=0,
+        verbose_name=_("Jumlah Referensi")
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_("Dibuat Pada")
+    )
+    updated_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name=_("Diperbarui Pada")
+    )
+
+    class Meta:
+        verbose_name = _("Berkas Media")
+        verbose_name_plural = _("Berkas Media")
+        indexes = [
+            models.Index(fields=['refcount', 'updated_at'], name='media_blob_orphan_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount})"
@@ -0,0 +1,77 @@
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+# ======================
+# Paginator Perkiraan Jumlah
+# ======================
+# Jumlah baris terfilter hanya dihitung sampai batas ini
+EXACT_COUNT_LIMIT = 10000
+
+
+def estimated_row_count(model, using='default'):
+    # Perkiraan jumlah baris dari statistik database, tanpa COUNT(*)
+    connection = connections[using]
+    table = model._meta.db_table
+    queries = {
+        'postgresql': ("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table]),
+        'mysql': ("SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s", [table]),
+        # Terisi setelah ANALYZE; angka pertama kolom stat adalah jumlah baris tabel
+        'sqlite': ("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table]),
+    }
+    if connection.vendor not in queries:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(*queries[connection.vendor])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if not row or row[0] is None:
+        return None
+    try:
+        estimate = int(str(row[0]).split()[0])
+    except (IndexError, ValueError):
+        return None
+    return estimate if estimate >= 0 else None
+
+
+def refresh_table_stats(models, using='default'):
+    # Statistik yang dibaca estimated_row_count; SQLite tidak mengisinya sendiri tanpa ANALYZE
+    connection = connections[using]
+    statements = {
+        'postgresql': 'ANALYZE {}',
+        'mysql': 'ANALYZE TABLE {}',
+        'sqlite': 'ANALYZE {}',
+    }
+    if connection.vendor not in statements:
+        return
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(statements[connection.vendor].format(connection.ops.quote_name(model._meta.db_table)))
+
+
+class AtLeast(int):
+    # Jumlah yang terpotong di batas hitung: tetap int untuk perhitungan halaman, tampil "10000+"
+    def __str__(self):
+        return f'{int(self)}+'
+
+
+class EstimatedCountPaginator(Paginator):
+    # Changelist tanpa filter memakai perkiraan; dengan filter dihitung sampai exact_limit. Admin menaikkan
+    # batas itu mengikuti halaman yang diminta sehingga halaman setelah batas tetap bisa dibuka
+    exact_limit = EXACT_COUNT_LIMIT
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            # Perkiraan yang lebih kecil dari isi tabel tidak memotong halaman: halaman di atasnya menaikkan
+            # exact_limit melewati perkiraan sehingga jatuh ke hitungan terbatas di bawah
+            if estimate is not None and estimate > self.exact_limit:
+                return estimate
+        count = queryset.order_by()[:self.exact_limit].count()
+        return AtLeast(count) if count >= self.exact_limit else count
@@ -0,0 +1,152 @@
+from datetime import timedelta
+from decimal import Decimal
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+from .analytics import day_index
+from .inventory import HOLDING_STATUSES, room_counts
+from .invalidation import bump_availability
+from .models import Reservation, RoomRate, RoomType
+
+# ======================
+# Harga Dinamis
+# ======================
+PRICING_HORIZON_DAYS = 365
+# Pesanan yang dibuat dalam rentang ini dihitung sebagai laju pemesanan
+PACE_DAYS = 14
+TARGET_OCCUPANCY = 0.5
+OCCUPANCY_WEIGHT = 0.3
+PACE_WEIGHT = 0.5
+# Senin..Minggu menurut malam menginap; malam Jumat & Sabtu lebih mahal
+WEEKDAY_FACTORS = (1.0, 1.0, 1.0, 1.0, 1.1, 1.15, 1.0)
+MIN_MULTIPLIER = 0.8
+MAX_MULTIPLIER = 1.5
+REPRICE_BATCH_SIZE = 2000
+
+
+def forward_bookings(keys, start, days):
+    # Satu query untuk semua reservasi yang memegang jatah di horizon, lalu difference array per tipe kamar
+    since = timezone.now() - timedelta(days=PACE_DAYS)
+    rows = list(
+        Reservation.objects.filter(
+            status__in=HOLDING_STATUSES, room_type__isnull=False,
+            check_in__lt=start + timedelta(days=days), check_out__gt=start,
+        ).values_list('room_type_id', 'check_in', 'check_out', 'created_at')
+    )
+    sold_diff = np.zeros((len(keys), days + 1), dtype=np.int32)
+    pace_diff = np.zeros((len(keys), days + 1), dtype=np.int32)
+    if rows:
+        type_ids, check_in, check_out, created = zip(*rows)
+        i = np.searchsorted(keys, np.array(type_ids, dtype=np.int64))
+        first = np.clip(day_index(np.array(check_in, dtype='datetime64[D]'), start), 0, days)
+        last = np.clip(day_index(np.array(check_out, dtype='datetime64[D]'), start), 0, days)
+        recent = np.fromiter((value >= since for value in created), dtype=bool, count=len(rows))
+        np.add.at(sold_diff, (i, first), 1)
+        np.add.at(sold_diff, (i, last), -1)
+        np.add.at(pace_diff, (i[recent], first[recent]), 1)
+        np.add.at(pace_diff, (i[recent], last[recent]), -1)
+    return np.cumsum(sold_diff, axis=1)[:, :days], np.cumsum(pace_diff, axis=1)[:, :days]
+
+
+def stored_inputs(keys, start, days):
+    # Input yang dipakai run sebelumnya; -1 berarti malam itu belum punya tarif
+    rooms = np.full((len(keys), days), -1, dtype=np.int32)
+    sold = np.full((len(keys), days), -1, dtype=np.int32)
+    pace = np.full((len(keys), days), -1, dtype=np.int32)
+    base = np.full((len(keys), days), -1, dtype=np.int64)
+    rows = list(
+        RoomRate.objects.filter(date__gte=start, date__lt=start + timedelta(days=days)).values_list(
+            'room_type_id', 'date', 'rooms', 'rooms_sold', 'pace', 'base_price'
+        )
+    )
+    if rows:
+        type_ids, dates, row_rooms, row_sold, row_pace, row_base = zip(*rows)
+        i = np.searchsorted(keys, np.array(type_ids, dtype=np.int64))
+        j = day_index(np.array(dates, dtype='datetime64[D]'), start)
+        rooms[i, j] = row_rooms
+        sold[i, j] = row_sold
+        pace[i, j] = row_pace
+        base[i, j] = [int(price * 1000) for price in row_base]
+    return rooms, sold, pace, base
+
+
+def multipliers(sold, pace, rooms, weekdays):
+    # Vektor per malam: okupansi di atas target & laju pemesanan menaikkan harga, akhir pekan lebih mahal
+    with np.errstate(divide='ignore', invalid='ignore'):
+        occupancy = np.where(rooms > 0, sold / np.maximum(rooms, 1), 0.0)
+        pace_ratio = np.where(rooms > 0, pace / np.maximum(rooms, 1), 0.0)
+    factor = (
+        np.asarray(WEEKDAY_FACTORS)[weekdays]
+        * (1 + OCCUPANCY_WEIGHT * (occupancy - TARGET_OCCUPANCY))
+        * (1 + PACE_WEIGHT * pace_ratio)
+    )
+    return np.round(np.clip(factor, MIN_MULTIPLIER, MAX_MULTIPLIER), 2)
+
+
+def reprice(days=PRICING_HORIZON_DAYS, full=False, batch_size=REPRICE_BATCH_SIZE):
+    # Mengembalikan (jumlah malam dalam horizon, jumlah malam yang dihitung ulang)
+    start = timezone.localdate()
+    RoomRate.objects.filter(date__lt=start).delete()
+    base_by_id = dict(RoomType.objects.values_list('pk', 'base_price'))
+    keys = np.array(sorted(base_by_id), dtype=np.int64)
+    if not len(keys):
+        return 0, 0
+    counts = room_counts(keys.tolist())
+    rooms = np.array([counts[key] for key in keys.tolist()], dtype=np.int32)
+    # Harga dasar dalam per seribu rupiah agar perbandingannya eksak
+    base = np.array([int(base_by_id[key] * 1000) for key in keys.tolist()], dtype=np.int64)
+    sold, pace = forward_bookings(keys, start, days)
+
+    changed = np.ones((len(keys), days), dtype=bool)
+    if not full:
+        stored_rooms, stored_sold, stored_pace, stored_base = stored_inputs(keys, start, days)
+        changed = (
+            (stored_rooms != rooms[:, None]) | (stored_sold != sold)
+            | (stored_pace != pace) | (stored_base != base[:, None])
+        )
+    i, j = np.nonzero(changed)
+    weekdays = (np.arange(days) + start.weekday()) % 7
+    factor = multipliers(sold[i, j], pace[i, j], rooms[i], weekdays[j])
+    price = np.round(base[i] / 1000 * factor, 2)
+
+    type_ids = keys[i].tolist()
+    for offset in range(0, len(type_ids), batch_size):
+        chunk = range(offset, min(offset + batch_size, len(type_ids)))
+        with transaction.atomic():
+            RoomRate.objects.bulk_create(
+                [
+                    RoomRate(
+                        room_type_id=type_ids[n],
+                        date=start + timedelta(days=int(j[n])),
+                        rooms=int(rooms[i[n]]),
+                        rooms_sold=int(sold[i[n], j[n]]),
+                        pace=int(pace[i[n], j[n]]),
+                        base_price=base_by_id[type_ids[n]],
+                        multiplier=Decimal(f'{factor[n]:.2f}'),
+                        price=Decimal(f'{price[n]:.2f}'),
+                    )
+                    for n in chunk
+                ],
+                update_conflicts=True,
+                unique_fields=['room_type', 'date'],
+                update_fields=['rooms', 'rooms_sold', 'pace', 'base_price', 'multiplier', 'price', 'updated_at'],
+            )
+    bump_availability(*np.unique(keys[i]).tolist())
+    return int(changed.size), len(type_ids)
+
+# ======================
+# Harga Menginap
+# ======================
+def stay_subtotals(room_types, check_in, check_out):
+    # {room_type_id: jumlah harga semua malam}; harga malam = base_price saat ini x pengali tersimpan,
+    # sehingga perubahan base_price langsung berlaku tanpa menunggu reprice. Malam tanpa tarif memakai base_price
+    nights = (check_out - check_in).days
+    base_by_id = {room_type.pk: Decimal(room_type.base_price) for room_type in room_types}
+    subtotals = {pk: price * nights for pk, price in base_by_id.items()}
+    rows = RoomRate.objects.filter(
+        room_type_id__in=base_by_id, date__gte=check_in, date__lt=check_out
+    ).order_by().values('room_type_id').annotate(factor=Sum('multiplier'), n=Count('pk'))
+    for room_type_id, factor, n in rows.values_list('room_type_id', 'factor', 'n'):
+        subtotals[room_type_id] = (base_by_id[room_type_id] * (nights - n + factor)).quantize(Decimal('0.01'))
+    return subtotals
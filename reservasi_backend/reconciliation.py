@@ -0,0 +1,199 @@
+import hashlib
+import re
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Booking, Payment, Reservation, StatementLine
+from .stats import record_status_change
+
+# ======================
+# Pelunasan Massal
+# ======================
+def mark_payments_paid(payment_ids):
+    # Set-based: pembayaran, reservasinya, serta pemesanan grup beserta semua reservasinya
+    payment_ids = list(payment_ids)
+    if not payment_ids:
+        return 0
+    with transaction.atomic():
+        payments = Payment.objects.filter(pk__in=payment_ids)
+        updated = payments.filter(is_paid=False).update(is_paid=True, paid_at=timezone.now())
+        reservations = Reservation.objects.filter(
+            Q(payment__in=payments) | Q(booking__payment__in=payments), status='PENDING'
+        )
+        record_status_change(reservations, 'PAID')
+        reservations.update(status='PAID')
+        Booking.objects.filter(payment__in=payments, status='PENDING').update(status='PAID')
+    return updated
+
+# ======================
+# Rekonsiliasi Mutasi Rekening
+# ======================
+MATCH_WINDOW_DAYS = 7
+RECONCILE_BATCH_SIZE = 5000
+# Kode dari Reservation/Booking.payment_reference, toleran spasi/strip dari berita transfer
+REFERENCE_RE = re.compile(r'\b(RSV|GRP)[-\s]?(\d+)\b', re.IGNORECASE)
+DEFAULT_COLUMNS = {'date': 'tanggal', 'amount': 'jumlah', 'description': 'keterangan'}
+
+
+def parse_amount(text):
+    # "1.650.000,00", "1,650,000.00", "Rp 1650000" -> Decimal; None bila tidak terbaca
+    cleaned = re.sub(r'[^\d,.\-]', '', text or '')
+    trailing = re.search(r'([.,])\d{1,2}$', cleaned)
+    if ',' in cleaned and '.' in cleaned:
+        decimal_mark = ',' if cleaned.rfind(',') > cleaned.rfind('.') else '.'
+    else:
+        # Satu jenis pemisah: desimal hanya bila diikuti 1-2 digit di akhir
+        decimal_mark = trailing.group(1) if trailing else None
+    for mark in {',', '.'} - {decimal_mark}:
+        cleaned = cleaned.replace(mark, '')
+    if decimal_mark:
+        cleaned = cleaned.replace(decimal_mark, '.')
+    try:
+        return Decimal(cleaned)
+    except InvalidOperation:
+        return None
+
+
+def parse_reference(text):
+    match = REFERENCE_RE.search(text or '')
+    return f'{match.group(1).upper()}{int(match.group(2))}' if match else ''
+
+
+def cents(amount):
+    return int((amount * 100).to_integral_value())
+
+
+class PendingIndex:
+    # Index hash pembayaran yang belum lunas; ukurannya mengikuti jumlah pembayaran tertunda, bukan panjang mutasi
+    def __init__(self, window_days=MATCH_WINDOW_DAYS):
+        self.window = timedelta(days=window_days)
+        self.by_reference = {}
+        self.by_amount_day = defaultdict(list)
+        self.matched = set()
+
+    def add(self, payment_id, reference, amount, created):
+        day = timezone.localdate(created) if timezone.is_aware(created) else created.date()
+        self.by_reference[cents(amount), reference] = (payment_id, day)
+        self.by_amount_day[cents(amount), day].append(payment_id)
+
+    @classmethod
+    def load(cls, window_days=MATCH_WINDOW_DAYS):
+        index = cls(window_days)
+        rows = Payment.objects.filter(is_paid=False).values_list(
+            'pk', 'reservation_id', 'reservation__total_price', 'reservation__created_at',
+            'booking_id', 'booking__total_price', 'booking__created_at',
+        )
+        for pk, reservation_id, reservation_total, reserved_at, booking_id, booking_total, booked_at in rows.iterator(
+            chunk_size=5000
+        ):
+            if booking_id is not None:
+                index.add(pk, f'GRP{booking_id}', booking_total, booked_at)
+            elif reservation_id is not None:
+                index.add(pk, f'RSV{reservation_id}', reservation_total, reserved_at)
+        return index
+
+    def in_window(self, created, posted):
+        # Transfer dianggap sah dari sehari sebelum (beda zona waktu) sampai jendela setelah pemesanan
+        return created - timedelta(days=1) <= posted <= created + self.window
+
+    def match(self, amount, reference, posted):
+        # (payment_id, None) bila cocok, (None, alasan) bila tidak
+        key = cents(amount)
+        if reference:
+            # Referensi yang tertulis tidak boleh dialihkan ke pembayaran lain meski jumlahnya sama
+            candidate = self.by_reference.get((key, reference))
+            if candidate and candidate[0] not in self.matched and self.in_window(candidate[1], posted):
+                self.matched.add(candidate[0])
+                return candidate[0], None
+            return None, 'NO_MATCH'
+        candidates = []
+        for offset in range(-1, self.window.days + 1):
+            for payment_id in self.by_amount_day.get((key, posted - timedelta(days=offset)), ()):
+                if payment_id not in self.matched:
+                    candidates.append(payment_id)
+        if len(candidates) == 1:
+            self.matched.add(candidates[0])
+            return candidates[0], None
+        return None, 'AMBIGUOUS' if candidates else 'NO_MATCH'
+
+
+def line_fingerprint(posted_on, amount, description, occurrence):
+    # occurrence membedakan transfer kembar (tanggal, jumlah & keterangan sama) dalam satu mutasi
+    raw = '|'.join([
+        posted_on.isoformat() if posted_on else '',
+        str(cents(amount)) if amount is not None else '',
+        ' '.join(description.split()),
+        str(occurrence),
+    ])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def parse_line(line_number, row, columns, date_format):
+    description = row.get(columns['description']) or ''
+    try:
+        posted = datetime.strptime((row.get(columns['date']) or '').strip(), date_format).date()
+    except ValueError:
+        posted = None
+    return StatementLine(
+        line_number=line_number, posted_on=posted, amount=parse_amount(row.get(columns['amount'])),
+        reference=parse_reference(description), description=description,
+    )
+
+
+def reconcile_statement(rows, source, columns=None, date_format='%Y-%m-%d', window_days=MATCH_WINDOW_DAYS,
+                        batch_size=RECONCILE_BATCH_SIZE, dry_run=False):
+    # rows: iterable dict per baris (mis. csv.DictReader) yang dibaca sekali jalan; baris diproses
+    # per batch sehingga memori hanya sebesar index pembayaran tertunda + satu batch
+    columns = {**DEFAULT_COLUMNS, **(columns or {})}
+    index = PendingIndex.load(window_days)
+    counts = Counter()
+    batch = []
+
+    def flush():
+        # Baris yang isinya sudah tercatat dari impor sebelumnya dilewati, apa pun nama berkasnya,
+        # jadi impor ulang maupun ekspor dengan rentang tanggal bertumpuk aman
+        seen = set(StatementLine.objects.filter(
+            fingerprint__in=[line.fingerprint for line in batch]
+        ).values_list('fingerprint', flat=True))
+        lines = []
+        for line in batch:
+            if line.fingerprint in seen:
+                counts['skipped'] += 1
+                continue
+            if line.amount is not None and line.amount <= 0:
+                # Debit/biaya bank bukan pembayaran tamu
+                counts['ignored'] += 1
+                continue
+            if line.amount is None or line.posted_on is None:
+                payment_id, reason = None, 'INVALID'
+            else:
+                payment_id, reason = index.match(line.amount, line.reference, line.posted_on)
+            line.source = source
+            line.payment_id = payment_id
+            line.reason = reason or 'MATCHED'
+            line.is_resolved = payment_id is not None
+            counts['matched' if payment_id is not None else 'unmatched'] += 1
+            lines.append(line)
+        if not dry_run:
+            with transaction.atomic():
+                mark_payments_paid([line.payment_id for line in lines if line.payment_id is not None])
+                StatementLine.objects.bulk_create(lines)
+        batch.clear()
+
+    # Baris 1 adalah header CSV
+    occurrences = Counter()
+    for line_number, row in enumerate(rows, start=2):
+        counts['lines'] += 1
+        line = parse_line(line_number, row, columns, date_format)
+        content = line_fingerprint(line.posted_on, line.amount, line.description, 0)
+        occurrences[content] += 1
+        line.fingerprint = line_fingerprint(line.posted_on, line.amount, line.description, occurrences[content])
+        batch.append(line)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return counts
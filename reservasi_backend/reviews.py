@@ -0,0 +1,78 @@
+from datetime import datetime
+from django.core.cache import cache
+from django.db.models import Count, Q
+from .models import Review
+from .invalidation import version
+from .search import encode_cursor, decode_cursor
+
+# ======================
+# Ringkasan & Halaman Ulasan
+# ======================
+REVIEW_PAGE_SIZE = 10
+SUMMARY_CACHE_TIMEOUT = 60 * 60
+
+
+def summary_cache_key(hotel_id):
+    # Versi namespace ulasan membuat cache tiap worker ikut basi saat worker lain menulis
+    return f'review_summary:{version("review")}:{hotel_id}'
+
+
+def invalidate_review_summary(hotel_id):
+    cache.delete(summary_cache_key(hotel_id))
+
+
+def review_summary(hotel_id):
+    summary = cache.get(summary_cache_key(hotel_id))
+    if summary is None:
+        counts = dict(
+            Review.objects.filter(hotel_id=hotel_id).order_by().values_list('rating').annotate(total=Count('pk'))
+        )
+        total = sum(counts.values())
+        average = sum(rating * n for rating, n in counts.items()) / total if total else 0.0
+        summary = {
+            'count': total,
+            'average': round(average, 1),
+            'histogram': [
+                {
+                    'rating': rating,
+                    'count': counts.get(rating, 0),
+                    'percent': round(counts.get(rating, 0) * 100 / total) if total else 0,
+                }
+                for rating in range(5, 0, -1)
+            ],
+        }
+        cache.set(summary_cache_key(hotel_id), summary, SUMMARY_CACHE_TIMEOUT)
+    return summary
+
+
+def review_page(hotel_id, cursor=None, page_size=REVIEW_PAGE_SIZE):
+    # Keyset (created_at, id) menurun memakai index review_hotel_recent_idx
+    reviews = Review.objects.filter(hotel_id=hotel_id).select_related(
+        'reservation__user', 'archived_reservation__user'
+    ).order_by('-created_at', '-id')
+    position = decode_cursor(cursor)
+    if position is not None:
+        created_at, last_id = position
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except (TypeError, ValueError):
+            created_at = None
+        if created_at is not None and isinstance(last_id, int):
+            reviews = reviews.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=last_id))
+
+    items = list(reviews[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        next_cursor = encode_cursor([items[-1].created_at.isoformat(), items[-1].id])
+    for review in items:
+        review.author = reviewer_name(review)
+    return items, next_cursor
+
+
+def reviewer_name(review):
+    reservation = review.stay
+    if reservation.first_name:
+        initial = f" {reservation.last_name[:1]}." if reservation.last_name else ''
+        return f"{reservation.first_name}{initial}"
+    return reservation.user.username
@@ -0,0 +1,386 @@
+import base64
+import binascii
+import hashlib
+import json
+import math
+import operator
+from array import array
+from decimal import Decimal, InvalidOperation
+from functools import reduce
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q, F
+from .models import Hotel, HotelGallery, Room, Facility, mask_to_bits
+from .invalidation import ProcessCache, bump, version
+
+# ======================
+# Versi Katalog
+# ======================
+FACET_CACHE_TIMEOUT = 60 * 10
+DETAIL_CACHE_TIMEOUT = 60 * 30
+
+# Batas bawah (inklusif) tiap bucket harga per malam
+PRICE_BUCKETS = [
+    ('lt500', 0, 500000, 'Di bawah Rp 500.000'),
+    ('500-1000', 500000, 1000000, 'Rp 500.000 - 1.000.000'),
+    ('1000-2000', 1000000, 2000000, 'Rp 1.000.000 - 2.000.000'),
+    ('gte2000', 2000000, None, 'Di atas Rp 2.000.000'),
+]
+
+
+def catalog_version():
+    # Versi dibaca dari bus bersama, jadi semua worker melihat perubahan yang sama
+    return version('catalog')
+
+
+def bump_catalog_version():
+    bump('catalog')
+
+
+def price_bucket(price):
+    if price is None or (isinstance(price, float) and math.isnan(price)):
+        return None
+    for key, low, high, _label in PRICE_BUCKETS:
+        if price >= low and (high is None or price < high):
+            return key
+    return None
+
+
+def parse_price(value):
+    try:
+        price = Decimal(value)
+    except (TypeError, InvalidOperation):
+        return None
+    return price if price.is_finite() and price >= 0 else None
+
+# ======================
+# Filter Pencarian
+# ======================
+def normalize_filters(params):
+    regions = sorted({r for r in params.getlist('region') if r})
+    stars = sorted({int(s) for s in params.getlist('star_rating') if s.isdigit()})
+    bucket_keys = {key for key, *_ in PRICE_BUCKETS}
+    buckets = sorted({b for b in params.getlist('price_bucket') if b in bucket_keys})
+    facilities = sorted({int(f) for f in params.getlist('facility') if f.isdigit()})
+    facility_mode = 'any' if params.get('facility_mode') == 'any' else 'all'
+    min_price = parse_price(params.get('min_price'))
+    max_price = parse_price(params.get('max_price'))
+    return {
+        'region': regions,
+        'star_rating': stars,
+        'price_bucket': buckets,
+        'facility': facilities,
+        'facility_mode': facility_mode,
+        'min_price': str(min_price) if min_price is not None else None,
+        'max_price': str(max_price) if max_price is not None else None,
+    }
+
+
+def filter_key(filters, extra=''):
+    raw = json.dumps([filters, extra], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def split_facilities(facility_ids):
+    # (mask fasilitas yang punya bit, id fasilitas tanpa bit karena 63 bit sudah terpakai)
+    mask, bitless = 0, []
+    for pk, bit in Facility.objects.filter(pk__in=facility_ids).values_list('pk', 'bit'):
+        if bit is None:
+            bitless.append(pk)
+        else:
+            mask |= 1 << bit
+    return mask, bitless
+
+
+def has_facility(facility_id):
+    # Fallback M2M untuk fasilitas tanpa bit; seperti facility_mask hotel, hanya kamar yang tersedia
+    return Exists(Room.objects.filter(hotel=OuterRef('pk'), is_available=True, facilities=facility_id))
+
+
+def hotels_with_facilities(facility_ids, mode):
+    # Versi set id untuk facet snapshot: irisan ('all') atau gabungan ('any') hotel per fasilitas
+    sets = [
+        set(Room.objects.filter(is_available=True, facilities=pk).values_list('hotel_id', flat=True).distinct())
+        for pk in facility_ids
+    ]
+    return set.union(*sets) if mode == 'any' else set.intersection(*sets)
+
+
+def apply_filters(queryset, filters):
+    if filters['region']:
+        queryset = queryset.filter(region__in=filters['region'])
+    if filters['star_rating']:
+        queryset = queryset.filter(star_rating__in=filters['star_rating'])
+    if filters['price_bucket']:
+        ranges = []
+        for key, low, high, _label in PRICE_BUCKETS:
+            if key in filters['price_bucket']:
+                ranges.append(Q(min_price__gte=low) if high is None else Q(min_price__gte=low, min_price__lt=high))
+        queryset = queryset.filter(reduce(lambda x, y: x | y, ranges))
+    if filters['min_price'] is not None:
+        queryset = queryset.filter(min_price__gte=Decimal(filters['min_price']))
+    if filters['max_price'] is not None:
+        queryset = queryset.filter(min_price__lte=Decimal(filters['max_price']))
+    # Filter fasilitas memakai operasi bit pada kolom hotel, tanpa join M2M; hanya fasilitas tanpa bit
+    # yang jatuh ke subquery EXISTS
+    if filters['facility']:
+        mask, bitless = split_facilities(filters['facility'])
+        conditions = [has_facility(pk) for pk in bitless]
+        if mask:
+            queryset = queryset.annotate(matched_facilities=F('facility_mask').bitand(mask))
+            if filters['facility_mode'] == 'any':
+                conditions.append(Q(matched_facilities__gt=0))
+            else:
+                conditions.append(Q(matched_facilities=mask))
+        if conditions:
+            combine = operator.or_ if filters['facility_mode'] == 'any' else operator.and_
+            queryset = queryset.filter(reduce(combine, (Q(condition) for condition in conditions)))
+    return queryset
+
+# ======================
+# Snapshot Kolom Katalog
+# ======================
+# Satu entri per proses, dikosongkan ProcessCache begitu versi katalog berubah
+_snapshots = ProcessCache('catalog', maxsize=1)
+
+
+def build_catalog_snapshot():
+    regions = [choice[0] for choice in Hotel._meta.get_field('region').choices]
+    region_index = {name: i for i, name in enumerate(dict.fromkeys(regions))}
+    region_names = list(region_index)
+    columns = {
+        'id': array('q'),
+        'region': array('H'),
+        'star_rating': array('B'),
+        'price': array('d'),
+        'facility_mask': array('q'),
+    }
+    rows = Hotel.objects.values_list(
+        'pk', 'region', 'star_rating', 'min_price', 'facility_mask'
+    )
+    for pk, region, star, price, mask in rows.iterator(chunk_size=2000):
+        if region not in region_index:
+            region_index[region] = len(region_names)
+            region_names.append(region)
+        columns['id'].append(pk)
+        columns['region'].append(region_index[region])
+        columns['star_rating'].append(star)
+        columns['price'].append(float('nan') if price is None else float(price))
+        columns['facility_mask'].append(mask)
+    return {
+        'columns': columns,
+        'regions': region_names,
+        'facilities': list(Facility.objects.filter(bit__isnull=False).order_by('name').values_list('pk', 'name', 'bit')),
+    }
+
+
+def catalog_snapshot():
+    # Snapshot kolom ringkas per proses, dibangun ulang saat versi katalog berubah
+    return _snapshots.get_or_set('snapshot', build_catalog_snapshot)
+
+# ======================
+# Facet
+# ======================
+def get_facets(filters, restrict_ids=None, restrict_key=''):
+    version = catalog_version()
+    cache_key = f'facets:{version}:{filter_key(filters, restrict_key)}'
+    facets = cache.get(cache_key)
+    if facets is None:
+        facets = compute_facets(filters, restrict_ids)
+        cache.set(cache_key, facets, FACET_CACHE_TIMEOUT)
+    return facets
+
+
+def compute_facets(filters, restrict_ids=None):
+    # Satu kali lewat snapshot; tiap dimensi dihitung dengan filter dimensi lain
+    snapshot = catalog_snapshot()
+    columns = snapshot['columns']
+    regions = snapshot['regions']
+    selected_regions = {regions.index(r) for r in filters['region'] if r in regions}
+    selected_stars = set(filters['star_rating'])
+    selected_buckets = set(filters['price_bucket'])
+    bit_by_id = {pk: bit for pk, _name, bit in snapshot['facilities']}
+    wanted_mask = reduce(lambda x, y: x | y, (1 << bit_by_id[f] for f in filters['facility'] if f in bit_by_id), 0)
+    facility_any = filters['facility_mode'] == 'any'
+    bitless = []
+    if any(f not in bit_by_id for f in filters['facility']):
+        bitless = split_facilities(filters['facility'])[1]
+    bitless_ids = hotels_with_facilities(bitless, filters['facility_mode']) if bitless else None
+    min_price = float(filters['min_price']) if filters['min_price'] is not None else None
+    max_price = float(filters['max_price']) if filters['max_price'] is not None else None
+
+    region_counts = [0] * len(regions)
+    star_counts = [0] * 6
+    bucket_counts = dict.fromkeys((key for key, *_ in PRICE_BUCKETS), 0)
+    bit_counts = [0] * Facility.MAX_BITS
+    total = 0
+
+    for pk, region, star, price, mask in zip(
+        columns['id'], columns['region'], columns['star_rating'], columns['price'], columns['facility_mask']
+    ):
+        if restrict_ids is not None and pk not in restrict_ids:
+            continue
+        # Rentang harga berlaku untuk semua facet
+        if min_price is not None and not price >= min_price:
+            continue
+        if max_price is not None and not price <= max_price:
+            continue
+        bucket = price_bucket(price)
+        region_ok = not filters['region'] or region in selected_regions
+        star_ok = not selected_stars or star in selected_stars
+        price_ok = not selected_buckets or bucket in selected_buckets
+        if not wanted_mask:
+            facility_ok = bitless_ids is None or pk in bitless_ids
+        elif facility_any:
+            facility_ok = bool(mask & wanted_mask) or (bitless_ids is not None and pk in bitless_ids)
+        else:
+            facility_ok = mask & wanted_mask == wanted_mask and (bitless_ids is None or pk in bitless_ids)
+
+        if star_ok and price_ok and facility_ok:
+            region_counts[region] += 1
+        if region_ok and price_ok and facility_ok:
+            star_counts[min(star, 5)] += 1
+        if region_ok and star_ok and facility_ok and bucket is not None:
+            bucket_counts[bucket] += 1
+        # Mode 'any' mengecualikan dimensinya sendiri seperti facet lain karena memilih fasilitas menambah
+        # hasil (OR). Mode 'all' sengaja tidak: memilih fasilitas mempersempit hasil (AND), jadi angka per
+        # fasilitas adalah jumlah hotel yang tersisa bila fasilitas itu ikut dipilih
+        if region_ok and star_ok and price_ok and (facility_any or facility_ok):
+            remaining = mask
+            while remaining:
+                lowest = remaining & -remaining
+                bit_counts[lowest.bit_length() - 1] += 1
+                remaining ^= lowest
+        if region_ok and star_ok and price_ok and facility_ok:
+            total += 1
+
+    return {
+        'total': total,
+        'region': [
+            {'value': name, 'label': name, 'count': region_counts[i], 'selected': name in filters['region']}
+            for i, name in enumerate(regions)
+        ],
+        'star_rating': [
+            {'value': star, 'label': star, 'count': star_counts[star], 'selected': star in selected_stars}
+            for star in range(5, 0, -1)
+        ],
+        'price_bucket': [
+            {'value': key, 'label': label, 'count': bucket_counts[key], 'selected': key in selected_buckets}
+            for key, _low, _high, label in PRICE_BUCKETS
+        ],
+        'facility': [
+            {'value': pk, 'label': name, 'count': bit_counts[bit], 'selected': pk in filters['facility']}
+            for pk, name, bit in snapshot['facilities']
+        ],
+    }
+
+# ======================
+# Data Detail Hotel
+# ======================
+def hotel_detail_data(hotel_id):
+    # Bagian katalog halaman detail; kunci ikut versi katalog sehingga basi bersama perubahan hotel/kamar/galeri
+    cache_key = f'hotel_detail:{catalog_version()}:{hotel_id}'
+    data = cache.get(cache_key)
+    if data is None:
+        hotel = Hotel.objects.prefetch_related('room_types').filter(pk=hotel_id).first()
+        if hotel is None:
+            return None
+        rooms = list(Room.objects.filter(hotel=hotel, is_available=True).select_related('room_type'))
+        harga_list = [
+            r.room_type.base_price
+            for r in rooms
+            if r.room_type and r.room_type.base_price is not None
+        ]
+        data = {
+            'hotel': hotel,
+            'gallery': list(HotelGallery.objects.filter(hotel_id=hotel.pk)),
+            'rooms': rooms,
+            'facilities': list(Facility.objects.filter(bit__in=mask_to_bits(hotel.facility_mask)).order_by('name')),
+            'harga_termurah': min(harga_list) if harga_list else 0,
+        }
+        cache.set(cache_key, data, DETAIL_CACHE_TIMEOUT)
+    return data
+
+# ======================
+# Urutan & Paginasi Keyset
+# ======================
+PAGE_SIZE = 20
+SORT_OPTIONS = {
+    'price': ('min_price', 'asc'),
+    'rating': ('average_rating', 'desc'),
+    'stars': ('star_rating', 'desc'),
+}
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+    return values if isinstance(values, list) and len(values) == 2 else None
+
+
+def cursor_value(field, value):
+    # Nilai cursor harus bertipe sesuai kolom urut; cursor palsu diabaikan, bukan diteruskan ke query
+    if field == 'min_price':
+        return parse_price(value) if isinstance(value, str) else None
+    if isinstance(value, bool):
+        return None
+    if field == 'star_rating':
+        return value if isinstance(value, int) else None
+    if isinstance(value, (int, float)) and math.isfinite(value):
+        return value
+    return None
+
+
+def keyset_page(queryset, sort, cursor, page_size=PAGE_SIZE):
+    # Paginasi keyset (nilai urut, id) agar halaman dalam secepat halaman pertama
+    field, direction = SORT_OPTIONS.get(sort, ('id', 'asc'))
+    if field == 'min_price':
+        # Hotel tanpa tipe kamar tidak punya harga, jadi tidak ikut urutan harga
+        queryset = queryset.filter(min_price__isnull=False)
+    desc = direction == 'desc'
+    queryset = queryset.order_by(f'-{field}' if desc else field, '-id' if desc else 'id')
+
+    position = decode_cursor(cursor)
+    if position is not None:
+        value, last_id = position
+        value = cursor_value(field, value)
+        if value is not None and isinstance(last_id, int) and not isinstance(last_id, bool):
+            if field == 'id':
+                queryset = queryset.filter(id__gt=last_id)
+            elif desc:
+                queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': last_id}))
+            else:
+                queryset = queryset.filter(Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': last_id}))
+
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        value = getattr(last, field)
+        next_cursor = encode_cursor([str(value) if isinstance(value, Decimal) else value, last.id])
+    return items, next_cursor
+
+
+def distance_page(distances, cursor, page_size=PAGE_SIZE):
+    # Kandidat jarak sudah dibatasi index geo, jadi cukup diurutkan di memori
+    ordered = sorted((distance, pk) for pk, distance in distances.items())
+    position = decode_cursor(cursor)
+    if position is not None:
+        value, last_id = position
+        if isinstance(value, (int, float)) and isinstance(last_id, int):
+            ordered = [row for row in ordered if row > (value, last_id)]
+    next_cursor = None
+    if len(ordered) > page_size:
+        ordered = ordered[:page_size]
+        next_cursor = encode_cursor(list(ordered[-1]))
+    return [pk for _distance, pk in ordered], next_cursor
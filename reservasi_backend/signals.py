@@ -0,0 +1,283 @@
+from collections import Counter
+from django.db.models import F, Avg
+from django.db.models.signals import m2m_changed, pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.contrib.auth.models import User
+from django.utils import timezone
+from .models import (
+    Hotel, HotelGallery, RoomType, Facility, Room, Reservation, Review,
+    refresh_room_facility_masks, refresh_hotel_facility_masks, refresh_hotel_min_prices,
+    refresh_hotel_cover_images,
+)
+from .search import bump_catalog_version
+from .invalidation import bump, bump_hotels
+from .reviews import invalidate_review_summary
+from .inventory import HOLDING_STATUSES, adjust, refresh_totals, log_room_totals, log_price
+from .stats import STATE_FIELDS, reservation_state, record_change
+from .archive import archiving
+from .media import MEDIA_FIELDS, change_references
+
+# ======================
+# Bitmask Fasilitas
+# ======================
+@receiver(m2m_changed, sender=Room.facilities.through)
+def room_facilities_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # Simpan kamar yang terdampak sebelum relasinya dihapus
+        instance._cleared_room_ids = list(instance.room_set.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if reverse:
+        room_ids = instance.__dict__.pop('_cleared_room_ids', []) if action == 'post_clear' else list(pk_set or [])
+    else:
+        room_ids = [instance.pk]
+    if not room_ids:
+        return
+
+    refresh_room_facility_masks(room_ids)
+    hotel_ids = list(Room.objects.filter(pk__in=room_ids).values_list('hotel_id', flat=True).distinct())
+    refresh_hotel_facility_masks(hotel_ids)
+    bump_hotels(*hotel_ids)
+
+
+@receiver(pre_save, sender=Room)
+def room_remember_state(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        return
+    (
+        instance._previous_hotel_id, instance._previous_room_type_id, instance._previous_is_available
+    ) = Room.objects.filter(pk=instance.pk).values_list('hotel_id', 'room_type_id', 'is_available').first() or (
+        None, None, False
+    )
+
+
+@receiver(post_save, sender=Room)
+def room_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    hotel_ids = {instance.hotel_id, getattr(instance, '_previous_hotel_id', None)} - {None}
+    refresh_hotel_facility_masks(hotel_ids)
+    room_type_ids = {instance.room_type_id, getattr(instance, '_previous_room_type_id', None)} - {None}
+    refresh_totals(room_type_ids, start=timezone.localdate())
+    deltas = Counter()
+    if getattr(instance, '_previous_is_available', False):
+        deltas[instance._previous_room_type_id] -= 1
+    if instance.is_available:
+        deltas[instance.room_type_id] += 1
+    log_room_totals(deltas)
+
+
+@receiver(post_delete, sender=Room)
+def room_deleted(sender, instance, **kwargs):
+    refresh_hotel_facility_masks([instance.hotel_id])
+    refresh_totals([instance.room_type_id], start=timezone.localdate())
+    if instance.is_available:
+        log_room_totals({instance.room_type_id: -1})
+
+
+@receiver(post_delete, sender=Facility)
+def facility_deleted(sender, instance, **kwargs):
+    if instance.bit is None:
+        return
+    # Baris through sudah terhapus oleh cascade, cukup matikan bit-nya
+    rooms = Room.objects.annotate(
+        has_bit=F('facility_mask').bitand(instance.mask)
+    ).filter(has_bit__gt=0)
+    hotel_ids = set(rooms.values_list('hotel_id', flat=True))
+    rooms.update(facility_mask=F('facility_mask').bitand(~instance.mask))
+    refresh_hotel_facility_masks(hotel_ids)
+    bump_hotels(*hotel_ids)
+
+# ======================
+# Harga Termurah Hotel
+# ======================
+@receiver(pre_save, sender=RoomType)
+def room_type_remember_state(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        return
+    instance._previous_hotel_id, instance._previous_base_price = RoomType.objects.filter(
+        pk=instance.pk
+    ).values_list('hotel_id', 'base_price').first() or (None, None)
+
+
+@receiver(post_save, sender=RoomType)
+def room_type_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_hotel_min_prices({instance.hotel_id, getattr(instance, '_previous_hotel_id', None)} - {None})
+    if created or instance.base_price != getattr(instance, '_previous_base_price', None):
+        log_price(instance.pk, instance.base_price)
+
+
+@receiver(post_delete, sender=RoomType)
+def room_type_deleted(sender, instance, **kwargs):
+    refresh_hotel_min_prices([instance.hotel_id])
+
+# ======================
+# Gambar Sampul Hotel
+# ======================
+@receiver(post_save, sender=HotelGallery)
+def gallery_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    Hotel.objects.filter(pk=instance.hotel_id, cover_image__isnull=True).update(cover_image=instance)
+
+
+@receiver(post_delete, sender=HotelGallery)
+def gallery_deleted(sender, instance, **kwargs):
+    # FK sampul sudah di-SET_NULL oleh Django, tinggal pilih pengganti
+    refresh_hotel_cover_images([instance.hotel_id])
+
+# ======================
+# Inventori & Statistik Reservasi
+# ======================
+def inventory_hold(room_type_id, check_in, check_out, status):
+    if room_type_id is None or status not in HOLDING_STATUSES:
+        return None
+    return room_type_id, check_in, check_out
+
+
+def state_hold(state):
+    room_type_id, _hotel_id, check_in, check_out, _total_price, status = state
+    return room_type_id, check_in, check_out, status
+
+
+@receiver(pre_save, sender=Reservation)
+def reservation_remember_state(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        return
+    instance._previous_state = Reservation.objects.filter(pk=instance.pk).values_list(*STATE_FIELDS).first()
+
+
+@receiver(post_save, sender=Reservation)
+def reservation_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = instance.__dict__.pop('_previous_state', None)
+    current = reservation_state(instance)
+    record_change(previous, current)
+
+    # Alur pemesanan sudah mengurangi inventori dengan UPDATE bersyarat
+    if instance.__dict__.pop('_inventory_reserved', False):
+        return
+    previous_hold = inventory_hold(*state_hold(previous)) if previous else None
+    current_hold = inventory_hold(*state_hold(current))
+    if previous_hold == current_hold:
+        return
+    if previous_hold:
+        adjust(*previous_hold, -1)
+    if current_hold:
+        adjust(*current_hold, 1)
+
+
+@receiver(post_delete, sender=Reservation)
+def reservation_deleted(sender, instance, **kwargs):
+    if archiving():
+        return
+    state = reservation_state(instance)
+    record_change(state, None)
+    hold = inventory_hold(*state_hold(state))
+    if hold:
+        adjust(*hold, -1)
+
+# ======================
+# Ringkasan Ulasan
+# ======================
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_review_summary(instance.hotel_id)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    invalidate_review_summary(instance.hotel_id)
+    average = Review.objects.filter(hotel_id=instance.hotel_id).aggregate(Avg('rating'))['rating__avg'] or 0.0
+    Hotel.objects.filter(pk=instance.hotel_id).update(average_rating=average)
+    bump_catalog_version()
+
+# ======================
+# Referensi Berkas Media
+# ======================
+MEDIA_FIELD_BY_MODEL = dict(MEDIA_FIELDS)
+
+
+def media_remember_name(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        return
+    instance._previous_media = sender.objects.filter(pk=instance.pk).values_list(MEDIA_FIELD_BY_MODEL[sender], flat=True).first()
+
+
+def media_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = instance.__dict__.pop('_previous_media', None)
+    current = getattr(instance, MEDIA_FIELD_BY_MODEL[sender]).name
+    if previous != current:
+        change_references({current: 1, previous: -1} if previous else {current: 1})
+
+
+def media_deleted(sender, instance, **kwargs):
+    change_references({getattr(instance, MEDIA_FIELD_BY_MODEL[sender]).name: -1})
+
+
+for model in MEDIA_FIELD_BY_MODEL:
+    pre_save.connect(media_remember_name, sender=model, dispatch_uid=f'media_pre_save_{model.__name__}')
+    post_save.connect(media_saved, sender=model, dispatch_uid=f'media_save_{model.__name__}')
+    post_delete.connect(media_deleted, sender=model, dispatch_uid=f'media_delete_{model.__name__}')
+
+# ======================
+# Bus Invalidasi Antar Proses
+# ======================
+NAMESPACE_MODELS = {
+    Hotel: 'hotel',
+    RoomType: 'room_type',
+    Room: 'room',
+    Reservation: 'reservation',
+    Review: 'review',
+    User: 'user',
+    Facility: 'facility',
+}
+
+
+def namespace_changed(sender, raw=False, **kwargs):
+    if not raw:
+        bump(NAMESPACE_MODELS[sender])
+
+
+for model in NAMESPACE_MODELS:
+    post_save.connect(namespace_changed, sender=model, dispatch_uid=f'namespace_save_{model.__name__}')
+    post_delete.connect(namespace_changed, sender=model, dispatch_uid=f'namespace_delete_{model.__name__}')
+
+# ======================
+# Versi Halaman per Hotel
+# ======================
+def hotel_page_changed(sender, instance, raw=False, **kwargs):
+    # Kamar/tipe kamar yang pindah hotel membuat halaman hotel lamanya ikut basi
+    if not raw:
+        bump_hotels(instance.pk if sender is Hotel else instance.hotel_id, getattr(instance, '_previous_hotel_id', None))
+
+
+for model in (Hotel, HotelGallery, RoomType, Room, Review):
+    post_save.connect(hotel_page_changed, sender=model, dispatch_uid=f'hotel_page_save_{model.__name__}')
+    post_delete.connect(hotel_page_changed, sender=model, dispatch_uid=f'hotel_page_delete_{model.__name__}')
+
+# ======================
+# Versi Katalog
+# ======================
+def catalog_changed(sender, raw=False, **kwargs):
+    if not raw:
+        bump_catalog_version()
+
+
+for model in (Hotel, HotelGallery, RoomType, Room, Facility):
+    post_save.connect(catalog_changed, sender=model, dispatch_uid=f'catalog_save_{model.__name__}')
+    post_delete.connect(catalog_changed, sender=model, dispatch_uid=f'catalog_delete_{model.__name__}')
+
+
+@receiver(m2m_changed, sender=Room.facilities.through)
+def room_facilities_catalog_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_catalog_version()
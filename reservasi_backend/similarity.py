@@ -0,0 +1,144 @@
+import numpy as np
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef
+from .invalidation import bump_hotels
+from .models import ArchivedReservation, Hotel, HotelSimilarity, Reservation
+
+# ======================
+# Hotel Serupa
+# ======================
+TOP_K = 6
+# Riwayat sepanjang ini (akun korporat/uji) dilewati karena pasangannya tumbuh kuadratik
+MAX_USER_HOTELS = 50
+CO_BOOKING_WEIGHT = 1.0
+REGION_WEIGHT = 0.3
+STAR_WEIGHT = 0.2
+PRICE_WEIGHT = 0.2
+SIMILARITY_BATCH_SIZE = 1000
+
+
+def hotel_features():
+    rows = list(Hotel.objects.order_by('pk').values_list('pk', 'region', 'star_rating', 'min_price'))
+    keys = np.array([row[0] for row in rows], dtype=np.int64)
+    _labels, regions = np.unique(np.array([row[1] or '' for row in rows], dtype=object), return_inverse=True)
+    stars = np.array([row[2] for row in rows], dtype=np.float64)
+    prices = np.array([float(row[3]) if row[3] else np.nan for row in rows], dtype=np.float64)
+    return keys, regions, stars, prices
+
+
+def booking_pairs(keys):
+    # Pasangan (user_id, indeks hotel) unik dari reservasi aktif & arsip yang tidak dibatalkan
+    pairs = set()
+    for model, field in ((Reservation, 'hotel_id'), (ArchivedReservation, 'room__hotel_id')):
+        pairs.update(
+            model.objects.exclude(status='CANCELLED').filter(**{f'{field}__isnull': False})
+            .values_list('user_id', field).distinct()
+        )
+    if not pairs:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    users, hotels = (np.array(column, dtype=np.int64) for column in zip(*pairs))
+    index = np.searchsorted(keys, hotels)
+    known = (index < len(keys)) & (keys[np.minimum(index, len(keys) - 1)] == hotels)
+    users, index = users[known], index[known]
+    _user_ids, inverse, counts = np.unique(users, return_inverse=True, return_counts=True)
+    light = counts[inverse] <= MAX_USER_HOTELS
+    return users[light], index[light]
+
+
+def co_bookings(users, hotels, sources, size):
+    # Matriks BᵀB (pengguna x hotel) dalam bentuk COO: setiap baris hotel sumber dipasangkan dengan semua
+    # hotel lain milik pengguna yang sama, lalu np.unique menjumlahkan pasangan yang sama
+    order = np.lexsort((hotels, users))
+    users, hotels = users[order], hotels[order]
+    starts = np.searchsorted(users, users, side='left')
+    sizes = np.searchsorted(users, users, side='right') - starts
+    rows = np.nonzero(sources[hotels])[0]
+    a = np.repeat(rows, sizes[rows])
+    offsets = np.arange(len(a)) - np.repeat(np.cumsum(sizes[rows]) - sizes[rows], sizes[rows])
+    b = starts[a] + offsets
+    keep = hotels[a] != hotels[b]
+    pair, count = np.unique(hotels[a][keep] * size + hotels[b][keep], return_counts=True)
+    return pair // size, pair % size, count
+
+
+def dirty_hotels(keys, users, hotels, full):
+    # Hotel yang perlu dihitung ulang: semua hotel milik pengguna yang memesan sejak run terakhir,
+    # ditambah hotel yang belum punya tetangga
+    dirty = np.ones(len(keys), dtype=bool)
+    last_run = HotelSimilarity.objects.aggregate(last=Max('computed_at'))['last']
+    if full or last_run is None:
+        return dirty
+    dirty[:] = False
+    recent_users = np.array(
+        list(Reservation.objects.filter(created_at__gt=last_run).values_list('user_id', flat=True).distinct()),
+        dtype=np.int64,
+    )
+    dirty[hotels[np.isin(users, recent_users)]] = True
+    missing = Hotel.objects.exclude(Exists(HotelSimilarity.objects.filter(hotel=OuterRef('pk'))))
+    dirty |= np.isin(keys, np.array(list(missing.values_list('pk', flat=True)), dtype=np.int64))
+    return dirty
+
+
+def neighbours(i, candidates, co_weight, regions, stars, prices, k):
+    # Skor gabungan kandidat untuk hotel i; co_weight sejajar dengan candidates
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price = np.clip(1 - np.abs(np.log(prices[candidates] / prices[i])), 0, 1)
+    score = (
+        CO_BOOKING_WEIGHT * co_weight
+        + REGION_WEIGHT * (regions[candidates] == regions[i])
+        + STAR_WEIGHT * (1 - np.abs(stars[candidates] - stars[i]) / 5)
+        + PRICE_WEIGHT * np.nan_to_num(price)
+    )
+    # Skor tertinggi dulu, seri diurutkan menurut id
+    order = np.lexsort((candidates, -score))[:k]
+    return candidates[order], score[order]
+
+
+def build_similarities(full=False, k=TOP_K, batch_size=SIMILARITY_BATCH_SIZE):
+    # Mengembalikan (jumlah hotel yang dihitung ulang, jumlah baris tetangga yang ditulis)
+    keys, regions, stars, prices = hotel_features()
+    if not len(keys):
+        return 0, 0
+    users, hotels = booking_pairs(keys)
+    dirty = dirty_hotels(keys, users, hotels, full)
+    source, target, count = co_bookings(users, hotels, dirty, len(keys))
+    # Kemiripan kosinus: bersama / sqrt(pemesan A x pemesan B)
+    bookers = np.bincount(hotels, minlength=len(keys))
+    cosine = count / np.sqrt(bookers[source] * bookers[target])
+    bounds = np.searchsorted(source, np.arange(len(keys) + 1))
+    same_region = {region: np.nonzero(regions == region)[0] for region in np.unique(regions)}
+
+    dirty_index = np.nonzero(dirty)[0]
+    written = 0
+    for offset in range(0, len(dirty_index), batch_size):
+        batch = dirty_index[offset:offset + batch_size]
+        objects = []
+        for i in batch.tolist():
+            co_target = target[bounds[i]:bounds[i + 1]]
+            candidates = np.union1d(co_target, same_region[regions[i]])
+            candidates = candidates[candidates != i]
+            co_weight = np.zeros(len(candidates))
+            co_weight[np.searchsorted(candidates, co_target)] = cosine[bounds[i]:bounds[i + 1]]
+            top, score = neighbours(i, candidates, co_weight, regions, stars, prices, k)
+            objects += [
+                HotelSimilarity(hotel_id=int(keys[i]), similar_hotel_id=int(keys[j]), rank=rank, score=float(value))
+                for rank, (j, value) in enumerate(zip(top.tolist(), score.tolist()), start=1)
+            ]
+        with transaction.atomic():
+            HotelSimilarity.objects.filter(hotel_id__in=keys[batch].tolist()).delete()
+            HotelSimilarity.objects.bulk_create(objects)
+        written += len(objects)
+    # Halaman detail yang rekomendasinya berubah ikut basi di page cache
+    bump_hotels(*keys[dirty_index].tolist())
+    return len(dirty_index), written
+
+
+def similar_hotels(hotel_id):
+    # Satu query lewat index unik (hotel, rank)
+    return [
+        row.similar_hotel
+        for row in HotelSimilarity.objects.filter(hotel_id=hotel_id).select_related(
+            'similar_hotel__cover_image'
+        ).order_by('rank')
+    ]
@@ -0,0 +1,90 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import F
+from .models import DailyHotelStats
+
+# ======================
+# Rollup Statistik Harian
+# ======================
+# Status yang dihitung sebagai kamar terjual; PENDING belum dibayar
+SOLD_STATUSES = ('PAID', 'CHECKED_IN', 'CHECKED_OUT')
+STATE_FIELDS = ('room_type_id', 'room__hotel_id', 'check_in', 'check_out', 'total_price', 'status')
+CENT = Decimal('0.01')
+
+
+def reservation_state(reservation):
+    return (
+        reservation.room_type_id, reservation.room.hotel_id, reservation.check_in,
+        reservation.check_out, reservation.total_price, reservation.status,
+    )
+
+
+def night_rate(total_price, nights):
+    return (Decimal(total_price) / nights).quantize(CENT) if nights > 0 else Decimal(0)
+
+
+def contributions(states, sign=1, deltas=None):
+    # {(room_type_id, hotel_id, tanggal): [terjual, pendapatan, pembatalan]}
+    if deltas is None:
+        deltas = defaultdict(lambda: [0, Decimal(0), 0])
+    for room_type_id, hotel_id, check_in, check_out, total_price, status in states:
+        if room_type_id is None:
+            continue
+        if status in SOLD_STATUSES:
+            nights = (check_out - check_in).days
+            rate = night_rate(total_price, nights)
+            for i in range(nights):
+                delta = deltas[room_type_id, hotel_id, check_in + timedelta(days=i)]
+                delta[0] += sign
+                delta[1] += sign * rate
+        elif status == 'CANCELLED':
+            # Pembatalan dicatat pada tanggal check-in
+            deltas[room_type_id, hotel_id, check_in][2] += sign
+    return deltas
+
+
+def apply_deltas(deltas):
+    deltas = {key: value for key, value in deltas.items() if any(value)}
+    if not deltas:
+        return
+    with transaction.atomic():
+        # Baris baru hanya perlu untuk kontribusi positif
+        DailyHotelStats.objects.bulk_create(
+            [
+                DailyHotelStats(room_type_id=room_type_id, hotel_id=hotel_id, date=day)
+                for (room_type_id, hotel_id, day), (sold, revenue, cancelled) in deltas.items()
+                if sold > 0 or revenue > 0 or cancelled > 0
+            ],
+            ignore_conflicts=True,
+        )
+        # Satu UPDATE per (tipe kamar, delta), bukan per malam
+        grouped = defaultdict(list)
+        for (room_type_id, _hotel_id, day), (sold, revenue, cancelled) in deltas.items():
+            grouped[room_type_id, sold, revenue, cancelled].append(day)
+        for (room_type_id, sold, revenue, cancelled), days in grouped.items():
+            DailyHotelStats.objects.filter(room_type_id=room_type_id, date__in=days).update(
+                rooms_sold=F('rooms_sold') + sold,
+                revenue=F('revenue') + revenue,
+                cancellations=F('cancellations') + cancelled,
+            )
+
+
+def record_states(states):
+    apply_deltas(contributions(states))
+
+
+def record_change(previous, current):
+    # previous/current: tuple STATE_FIELDS atau None
+    if previous == current:
+        return
+    deltas = contributions([previous] if previous else [], -1)
+    apply_deltas(contributions([current] if current else [], 1, deltas))
+
+
+def record_status_change(queryset, status):
+    # Untuk update() massal yang melewati signal; panggil sebelum update()
+    states = list(queryset.exclude(status=status).values_list(*STATE_FIELDS))
+    deltas = contributions(states, -1)
+    apply_deltas(contributions([state[:-1] + (status,) for state in states], 1, deltas))
@@ -0,0 +1,57 @@
+import hashlib
+import os
+import re
+import uuid
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+# ======================
+# Hash Isi Berkas
+# ======================
+HASH_CHUNK_SIZE = 64 * 1024
+# <folder>/<2 hex>/<sha256><ext>
+CONTENT_NAME_RE = re.compile(r'^(?:.+/)?[0-9a-f]{2}/([0-9a-f]{64})(?:\.[0-9a-z]+)?$')
+
+
+def file_digest(file, chunk_size=HASH_CHUNK_SIZE):
+    # SHA-256 dibaca per potongan, berkas tidak pernah dimuat utuh ke memori
+    digest = hashlib.sha256()
+    for chunk in file.chunks(chunk_size):
+        digest.update(chunk)
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    return digest.hexdigest()
+
+
+def is_content_name(name):
+    return bool(name and CONTENT_NAME_RE.match(name))
+
+# ======================
+# Storage Berbasis Isi
+# ======================
+@deconstructible(path='reservasi_backend.storage.ContentAddressedStorage')
+class ContentAddressedStorage(FileSystemStorage):
+    # Nama berkas = SHA-256 isinya, jadi unggahan identik berbagi satu berkas
+
+    def content_name(self, name, digest):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()[:10]
+        return '/'.join(part for part in (directory, digest[:2], digest + extension) if part)
+
+    def get_available_name(self, name, max_length=None):
+        # Nama akhir ditentukan di _save dari isi berkas, bukan dari nama unggahan
+        return name
+
+    def _save(self, name, content):
+        target = self.content_name(name, file_digest(content))
+        if self.exists(target):
+            return target
+        # Tulis ke nama sementara lalu rename atomik; dua penulis isi yang sama tetap aman
+        directory, filename = os.path.split(name)
+        temporary = super()._save(os.path.join(directory, f'.tmp-{uuid.uuid4().hex}-{filename}'), content)
+        os.makedirs(os.path.dirname(self.path(target)), exist_ok=True)
+        os.replace(self.path(temporary), self.path(target))
+        return target
+
+
+content_storage = ContentAddressedStorage()
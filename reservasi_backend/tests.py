@@ -1,3 +1,1544 @@
-from django.test import TestCase
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+from PIL import Image
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.cache import cache
+from django.http import QueryDict
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from .analytics import sweep, summary, rebuild_daily_stats
+from .booking import create_group_booking
+from .gallery import upload_gallery_images
+from .inventory import availability
+from .models import (
+    Hotel, HotelGallery, RoomType, RoomTypeInventory, Room, Booking, Reservation, Payment, Review, DailyHotelStats,
+    ArchivedReservation, ArchivedPayment, MediaBlob, AvailabilityChange, StatementLine, WaitlistEntry,
+    RoomRate, HotelSimilarity, Facility,
+)
+from .invalidation import ProcessCache, bump, version
+from .middleware import ProfilingMiddleware, QueryTimer
+from .admin import ReservationAdmin
+from .paginators import EstimatedCountPaginator
+from .pricing import stay_subtotals
+from .reconciliation import parse_amount
+from .reviews import review_summary, summary_cache_key, REVIEW_PAGE_SIZE
+from .search import catalog_snapshot, catalog_version, compute_facets, encode_cursor, get_facets, keyset_page, normalize_filters
+from .similarity import build_similarities
+from .storage import content_storage
+from .waitlist import IntervalIndex, expire_offers
 
-# Create your tests here.
+
+class CatalogFixtureMixin:
+    def setUp(self):
+        # Halaman selalu dirender ulang agar jumlah query terukur; cache halaman diuji tersendiri
+        page_cache = override_settings(PAGE_CACHE_SECONDS=0)
+        page_cache.enable()
+        self.addCleanup(page_cache.disable)
+        self.user = User.objects.create_user('tamu', 'tamu@example.com', 'rahasia123')
+        self.counter = 0
+
+    def make_hotel(self):
+        self.counter += 1
+        hotel = Hotel.objects.create(name=f'Hotel {self.counter}', location='Jl. Merdeka', region='Bandung', star_rating=4)
+        HotelGallery.objects.create(hotel=hotel, image=f'hotel_images/{self.counter}-a.jpg')
+        HotelGallery.objects.create(hotel=hotel, image=f'hotel_images/{self.counter}-b.jpg')
+        room_type = RoomType.objects.create(hotel=hotel, name='Deluxe', base_price=500000)
+        room = Room.objects.create(hotel=hotel, number=f'R{self.counter}', room_type=room_type)
+        return hotel, room
+
+    def make_reservation(self, room, status='CHECKED_OUT', review=False):
+        check_out = date.today() - timedelta(days=1)
+        reservation = Reservation.objects.create(
+            user=self.user, room=room, first_name='Tamu', last_name='Hotel',
+            check_in=check_out - timedelta(days=2), check_out=check_out, status=status,
+        )
+        if review:
+            Review.objects.create(reservation=reservation, rating=5)
+        return reservation
+
+    def login(self):
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['app_auth'] = {'user_id': self.user.id}
+        session.save()
+
+    def count_queries(self, url):
+        # Request pertama mengisi cache (facet, snapshot), yang kedua diukur
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+
+class SearchMixin:
+    def search(self, **params):
+        response = self.client.get(reverse('hotel_search'), params)
+        self.assertEqual(response.status_code, 200)
+        return [item['obj'].pk for item in response.context['hotel_data']]
+
+
+class FacilityBitmaskTests(SearchMixin, CatalogFixtureMixin, TestCase):
+    def test_masks_follow_room_facilities_and_availability(self):
+        hotel, room = self.make_hotel()
+        ac = Facility.objects.create(name='AC')
+        tv = Facility.objects.create(name='TV')
+        room.facilities.add(ac, tv)
+        hotel.refresh_from_db()
+        self.assertEqual(hotel.facility_mask, ac.mask | tv.mask)
+        room.facilities.remove(tv)
+        hotel.refresh_from_db()
+        self.assertEqual(hotel.facility_mask, ac.mask)
+        room.is_available = False
+        room.save()
+        hotel.refresh_from_db()
+        self.assertEqual(hotel.facility_mask, 0)
+        ac.delete()
+        room.refresh_from_db()
+        self.assertEqual(room.facility_mask, 0)
+
+    def test_filter_all_and_any_falls_back_to_m2m_without_bit(self):
+        ac = Facility.objects.create(name='AC')
+        tv = Facility.objects.create(name='TV')
+        # Seperti fasilitas ke-64 setelah semua bit terpakai
+        sauna = Facility.objects.create(name='Sauna')
+        Facility.objects.filter(pk=sauna.pk).update(bit=None)
+        (first, first_room), (second, second_room), (third, third_room) = (self.make_hotel() for _ in range(3))
+        first_room.facilities.add(ac, tv)
+        second_room.facilities.add(ac)
+        third_room.facilities.add(sauna)
+
+        self.assertEqual(self.search(facility=[ac.pk, tv.pk]), [first.pk])
+        self.assertEqual(self.search(facility=[ac.pk, tv.pk], facility_mode='any'), [first.pk, second.pk])
+        self.assertEqual(self.search(facility=[sauna.pk]), [third.pk])
+        self.assertEqual(self.search(facility=[ac.pk, sauna.pk]), [])
+        self.assertEqual(self.search(facility=[tv.pk, sauna.pk], facility_mode='any'), [first.pk, third.pk])
+        response = self.client.get(reverse('hotel_search'), {'facility': [sauna.pk]})
+        self.assertEqual(response.context['facets']['total'], 1)
+
+    def test_bit_collision_retries_next_free_bit(self):
+        ac = Facility.objects.create(name='AC')
+        original = Facility.free_bit
+        stale = [ac.bit]
+        # Proses lain sudah mengambil bit yang dipilih
+        with patch.object(Facility, 'free_bit', autospec=True,
+                          side_effect=lambda facility: stale.pop() if stale else original(facility)):
+            tv = Facility.objects.create(name='TV')
+        self.assertIsNotNone(tv.bit)
+        self.assertNotEqual(tv.bit, ac.bit)
+
+
+class GeoSearchTests(SearchMixin, CatalogFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.bandung, self.jakarta, self.surabaya = (
+            self.place(lat, lng) for lat, lng in ((-6.91, 107.61), (-6.2, 106.82), (-7.25, 112.75))
+        )
+
+    def place(self, lat, lng):
+        hotel, _room = self.make_hotel()
+        hotel.latitude, hotel.longitude = lat, lng
+        hotel.save()
+        return hotel.pk
+
+    def test_radius_orders_by_distance_and_clamps(self):
+        self.assertEqual(self.search(lat=-6.9, lng=107.6, radius=50), [self.bandung])
+        self.assertEqual(self.search(lat=-6.9, lng=107.6, radius=200), [self.bandung, self.jakarta])
+        # Radius dibatasi 500 km, Surabaya sekitar 570 km dari Bandung
+        self.assertEqual(self.search(lat=-6.9, lng=107.6, radius=10000), [self.bandung, self.jakarta])
+
+    def test_bbox(self):
+        # Tanpa lat/lng jarak diukur dari tengah kotak (-6.5, 107)
+        self.assertEqual(self.search(bbox='-7,106,-6,108'), [self.jakarta, self.bandung])
+        self.assertEqual(self.search(bbox='-8,112,-7,113'), [self.surabaya])
+
+    def test_invalid_coordinates_are_ignored(self):
+        everything = [self.bandung, self.jakarta, self.surabaya]
+        self.assertEqual(self.search(lat='inf', lng=1), everything)
+        self.assertEqual(self.search(lat=91, lng=107.6), everything)
+        self.assertEqual(self.search(bbox='nan,1,2,3'), everything)
+        self.assertEqual(self.search(bbox='-6,106,-7,108'), everything)
+        self.assertEqual(self.search(bbox='1,2,3'), everything)
+        # Radius tidak valid memakai default 10 km
+        self.assertEqual(self.search(lat=-6.9, lng=107.6, radius='nan'), [self.bandung])
+        self.assertEqual(self.search(lat=-6.9, lng=107.6, radius='-inf'), [self.bandung])
+
+
+class FacetTests(CatalogFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.ac = Facility.objects.create(name='AC')
+        self.tv = Facility.objects.create(name='TV')
+        self.first = self.add('Bandung', 4, 500000, self.ac)
+        self.second = self.add('Jakarta', 5, 1500000, self.ac, self.tv)
+        self.third = self.add('Bandung', 3, 300000)
+
+    def add(self, region, stars, price, *facilities):
+        hotel, room = self.make_hotel()
+        hotel.region, hotel.star_rating = region, stars
+        hotel.save()
+        room.room_type.base_price = price
+        room.room_type.save()
+        room.facilities.add(*facilities)
+        return hotel
+
+    def facets(self, query=''):
+        facets = compute_facets(normalize_filters(QueryDict(query)))
+        counts = {
+            name: {item['value']: item['count'] for item in facets[name]}
+            for name in ('region', 'star_rating', 'price_bucket', 'facility')
+        }
+        return facets['total'], counts
+
+    def test_each_dimension_counts_with_the_other_filters(self):
+        total, counts = self.facets()
+        self.assertEqual(total, 3)
+        self.assertEqual(counts['region']['Bandung'], 2)
+        self.assertEqual(counts['price_bucket'], {'lt500': 1, '500-1000': 1, '1000-2000': 1, 'gte2000': 0})
+
+        total, counts = self.facets('region=Bandung')
+        self.assertEqual(total, 2)
+        # Region tidak menyaring facet region sendiri, tapi menyaring bintang & harga
+        self.assertEqual(counts['region']['Jakarta'], 1)
+        self.assertEqual(counts['star_rating'], {5: 0, 4: 1, 3: 1, 2: 0, 1: 0})
+        self.assertEqual(counts['price_bucket']['1000-2000'], 0)
+
+        total, counts = self.facets('min_price=400000')
+        self.assertEqual(total, 2)
+        self.assertEqual(counts['region']['Bandung'], 1)
+
+    def test_facility_counts_in_all_and_any_mode(self):
+        total, counts = self.facets(f'facility={self.ac.pk}')
+        self.assertEqual(total, 2)
+        # Mode 'all': sisa hotel bila fasilitas itu ikut dipilih
+        self.assertEqual(counts['facility'], {self.ac.pk: 2, self.tv.pk: 1})
+        total, counts = self.facets(f'facility={self.tv.pk}&facility_mode=any')
+        self.assertEqual(total, 1)
+        self.assertEqual(counts['facility'], {self.ac.pk: 2, self.tv.pk: 1})
+
+    def test_cached_per_catalog_version(self):
+        filters = normalize_filters(QueryDict('region=Bandung'))
+        self.assertEqual(get_facets(filters)['total'], 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_facets(filters)['total'], 2)
+        self.add('Bandung', 2, 200000)
+        self.assertEqual(get_facets(filters)['total'], 3)
+
+    def test_snapshot_reused_until_catalog_changes(self):
+        snapshot = catalog_snapshot()
+        with self.assertNumQueries(0):
+            self.assertIs(catalog_snapshot(), snapshot)
+        self.add('Bandung', 2, 200000)
+        self.assertEqual(len(catalog_snapshot()['columns']['id']), 4)
+
+
+class PriceSortTests(SearchMixin, CatalogFixtureMixin, TestCase):
+    def priced(self, price, rating=0.0, stars=4):
+        hotel, room = self.make_hotel()
+        if price is None:
+            room.room_type.delete()
+        else:
+            RoomType.objects.filter(pk=room.room_type_id).update(base_price=price)
+        Hotel.objects.filter(pk=hotel.pk).update(min_price=price, average_rating=rating, star_rating=stars)
+        return hotel.pk
+
+    def walk(self, sort, page_size=2):
+        seen, cursor = [], None
+        while True:
+            items, cursor = keyset_page(Hotel.objects.all(), sort, cursor, page_size)
+            seen += [hotel.pk for hotel in items]
+            if cursor is None:
+                return seen
+
+    def test_min_price_follows_room_types(self):
+        hotel, room = self.make_hotel()
+        hotel.refresh_from_db()
+        self.assertEqual(hotel.min_price, Decimal('500000'))
+        cheap = RoomType.objects.create(hotel=hotel, name='Standard', base_price=300000)
+        hotel.refresh_from_db()
+        self.assertEqual(hotel.min_price, Decimal('300000'))
+        cheap.base_price = 800000
+        cheap.save()
+        hotel.refresh_from_db()
+        self.assertEqual(hotel.min_price, Decimal('500000'))
+        room.room_type.delete()
+        hotel.refresh_from_db()
+        self.assertEqual(hotel.min_price, Decimal('800000'))
+        cheap.delete()
+        hotel.refresh_from_db()
+        self.assertIsNone(hotel.min_price)
+
+    def test_price_range_filter(self):
+        low, mid, high = self.priced(300000), self.priced(500000), self.priced(900000)
+        self.assertEqual(self.search(min_price=400000), [mid, high])
+        self.assertEqual(self.search(max_price=500000), [low, mid])
+        self.assertEqual(self.search(min_price=400000, max_price=600000), [mid])
+        self.assertEqual(self.search(min_price='abc'), [low, mid, high])
+
+    def test_keyset_cursor_walks_ties_without_gaps_or_repeats(self):
+        ids = [self.priced(price, rating) for price, rating in (
+            (500000, 4.5), (300000, 4.0), (500000, 4.5), (500000, 3.0), (700000, 4.5),
+        )]
+        # Hotel tanpa harga tidak ikut urutan harga
+        no_price = self.priced(None)
+        self.assertEqual(self.walk('price'), [ids[1], ids[0], ids[2], ids[3], ids[4]])
+        # Urutan menurun: seri diurutkan id menurun
+        self.assertEqual(self.walk('rating'), [ids[4], ids[2], ids[0], ids[1], ids[3], no_price])
+        self.assertEqual(self.walk(''), sorted(ids + [no_price]))
+        _items, cursor = keyset_page(Hotel.objects.all(), 'price', 'bukan-cursor', 2)
+        self.assertIsNotNone(cursor)
+
+    def test_search_view_sort_and_next_page(self):
+        ids = [self.priced(300000, stars=3), self.priced(500000, stars=5), self.priced(400000, stars=4)]
+        self.assertEqual(self.search(sort='stars'), [ids[1], ids[2], ids[0]])
+        self.assertEqual(self.search(sort='price'), [ids[0], ids[2], ids[1]])
+
+    def test_forged_cursor_is_ignored_for_every_sort(self):
+        ids = [self.priced(300000, 4.0, 3), self.priced(500000, 4.5, 5)]
+        forged = [['abc', 1], [None, 1], [True, 1], [[1], 1], [float('inf'), 1], ['300000', 'x'], [4, True]]
+        expected = {'price': [ids[0], ids[1]], 'rating': [ids[1], ids[0]], 'stars': [ids[1], ids[0]], '': ids}
+        for sort, order in expected.items():
+            for values in forged + ([[4.5, 1]] if sort == 'stars' else []):
+                with self.subTest(sort=sort, cursor=values):
+                    self.assertEqual(self.search(sort=sort, cursor=encode_cursor(values)), order)
+
+
+class CoverImageTests(CatalogFixtureMixin, TestCase):
+    def test_cover_image_follows_gallery(self):
+        hotel, _room = self.make_hotel()
+        hotel.refresh_from_db()
+        first = hotel.gallery.order_by('pk').first()
+        self.assertEqual(hotel.cover_image, first)
+
+        first.delete()
+        hotel.refresh_from_db()
+        self.assertEqual(hotel.cover_image, hotel.gallery.order_by('pk').first())
+
+        hotel.gallery.all().delete()
+        hotel.refresh_from_db()
+        self.assertIsNone(hotel.cover_image)
+
+
+class CardQueryCountTests(CatalogFixtureMixin, TestCase):
+    def assertConstantQueries(self, url, add_row):
+        add_row()
+        before = self.count_queries(url)
+        for _ in range(3):
+            add_row()
+        self.assertEqual(self.count_queries(url), before)
+
+    def add_reviewed_hotel(self):
+        _hotel, room = self.make_hotel()
+        self.make_reservation(room, review=True)
+
+    def test_hotel_list(self):
+        self.assertConstantQueries(reverse('hotel_list'), self.add_reviewed_hotel)
+
+    def test_hotel_search(self):
+        self.assertConstantQueries(reverse('hotel_search'), self.add_reviewed_hotel)
+
+    def test_reservation_history(self):
+        self.login()
+        self.assertConstantQueries(reverse('reservation_history'), self.add_reviewed_hotel)
+
+    def test_reservation_list(self):
+        self.login()
+        self.assertConstantQueries(
+            reverse('reservation'),
+            lambda: self.make_reservation(self.make_hotel()[1], status='PAID'),
+        )
+
+    def test_reservation_detail(self):
+        self.login()
+        _hotel, room = self.make_hotel()
+        reservation = self.make_reservation(room)
+        url = reverse('reservation_detail', args=[reservation.id])
+        before = self.count_queries(url)
+        for _ in range(3):
+            HotelGallery.objects.create(hotel=room.hotel, image='hotel_images/extra.jpg')
+        self.assertEqual(self.count_queries(url), before)
+        # Sesi, pengguna, lalu satu query reservasi lengkap dengan gambar sampul
+        self.assertLessEqual(before, 4)
+
+
+class HotelReviewTests(CatalogFixtureMixin, TestCase):
+    def add_reviews(self, room, ratings):
+        for rating in ratings:
+            reservation = self.make_reservation(room)
+            Review.objects.create(reservation=reservation, rating=rating)
+
+    def test_summary_follows_reviews(self):
+        hotel, room = self.make_hotel()
+        self.add_reviews(room, [5, 5, 4, 2])
+        summary = review_summary(hotel.pk)
+        self.assertEqual(summary['count'], 4)
+        self.assertEqual(summary['average'], 4.0)
+        self.assertEqual([bar['count'] for bar in summary['histogram']], [2, 1, 0, 1, 0])
+
+        Review.objects.filter(rating=2).get().delete()
+        hotel.refresh_from_db()
+        self.assertEqual(review_summary(hotel.pk)['count'], 3)
+        self.assertAlmostEqual(hotel.average_rating, 14 / 3)
+
+    def test_reviews_paginate_with_cursor(self):
+        hotel, room = self.make_hotel()
+        self.add_reviews(room, [4] * (REVIEW_PAGE_SIZE + 3))
+        url = reverse('hotel_reviews', args=[hotel.id])
+        first = self.client.get(url).json()
+        self.assertEqual(len(first['reviews']), REVIEW_PAGE_SIZE)
+        second = self.client.get(url, {'cursor': first['next_cursor']}).json()
+        self.assertEqual(len(second['reviews']), 3)
+        self.assertIsNone(second['next_cursor'])
+        ids = [r['id'] for r in first['reviews'] + second['reviews']]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+
+    def test_detail_page_queries_do_not_grow_with_reviews(self):
+        hotel, room = self.make_hotel()
+        url = reverse('hotel_detail', args=[hotel.id])
+        self.add_reviews(room, [5])
+        before = self.count_queries(url)
+        self.add_reviews(room, [3] * 5)
+        self.assertEqual(self.count_queries(url), before)
+
+
+class RoomTypeInventoryTests(CatalogFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.hotel, room = self.make_hotel()
+        self.room_type = room.room_type
+        Room.objects.create(hotel=self.hotel, number='R1-2', room_type=self.room_type)
+        self.check_in = date.today() + timedelta(days=7)
+        self.check_out = self.check_in + timedelta(days=3)
+
+    def book(self):
+        self.login()
+        return self.client.post(reverse('reservation_form', args=[self.hotel.id]), {
+            'room_type': self.room_type.id,
+            'check_in': self.check_in.isoformat(),
+            'check_out': self.check_out.isoformat(),
+            'first_name': 'Tamu',
+            'last_name': 'Hotel',
+        })
+
+    def free(self):
+        return availability([self.room_type.id], self.check_in, self.check_out)[self.room_type.id]
+
+    def test_booking_allocates_distinct_rooms_until_full(self):
+        self.assertEqual(self.free(), 2)
+        self.assertEqual(self.book().status_code, 302)
+        self.assertEqual(self.book().status_code, 302)
+        self.assertEqual(self.free(), 0)
+        rooms = set(Reservation.objects.values_list('room_id', flat=True))
+        self.assertEqual(len(rooms), 2)
+
+        response = self.book()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors['room_type'])
+        self.assertEqual(Reservation.objects.count(), 2)
+        booked = RoomTypeInventory.objects.filter(room_type=self.room_type).values_list('booked', flat=True)
+        self.assertEqual(list(booked), [2, 2, 2])
+
+    def test_cancellation_returns_inventory(self):
+        self.book()
+        reservation = Reservation.objects.get()
+        self.client.post(reverse('cancel_reservation', args=[reservation.id]))
+        self.assertEqual(self.free(), 2)
+
+    def test_room_changes_refresh_totals(self):
+        self.book()
+        Room.objects.create(hotel=self.hotel, number='R1-3', room_type=self.room_type)
+        self.assertEqual(self.free(), 2)
+        Room.objects.filter(number='R1-3').get().delete()
+        self.assertEqual(self.free(), 1)
+
+
+class GroupBookingTests(CatalogFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.hotel, room = self.make_hotel()
+        self.room_type = room.room_type
+        for i in range(2, 6):
+            Room.objects.create(hotel=self.hotel, number=f'R1-{i}', room_type=self.room_type)
+        self.check_in = date.today() + timedelta(days=7)
+        self.check_out = self.check_in + timedelta(days=2)
+        self.login()
+
+    def book(self, quantity):
+        return self.client.post(reverse('group_booking', args=[self.hotel.id]), {
+            'check_in': self.check_in.isoformat(),
+            'check_out': self.check_out.isoformat(),
+            'first_name': 'Tamu',
+            'last_name': 'Grup',
+            f'qty_{self.room_type.id}': quantity,
+        })
+
+    def test_books_all_rooms_under_one_booking(self):
+        response = self.book(3)
+        booking = Booking.objects.get()
+        self.assertRedirects(response, reverse('booking_payment', args=[booking.id]))
+        reservations = booking.reservations.all()
+        self.assertEqual(len({r.room_id for r in reservations}), 3)
+        self.assertEqual(booking.total_price, sum(r.total_price for r in reservations))
+        self.assertEqual(availability([self.room_type.id], self.check_in, self.check_out)[self.room_type.id], 2)
+
+    def test_all_or_nothing(self):
+        self.book(4)
+        response = self.book(2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(Reservation.objects.count(), 4)
+        self.assertEqual(availability([self.room_type.id], self.check_in, self.check_out)[self.room_type.id], 1)
+
+    def test_queries_do_not_grow_with_rooms(self):
+        with CaptureQueriesContext(connection) as one:
+            self.book(1)
+        self.check_in += timedelta(days=10)
+        self.check_out += timedelta(days=10)
+        with CaptureQueriesContext(connection) as many:
+            self.book(4)
+        self.assertEqual(len(many), len(one))
+
+
+class AnalyticsTests(CatalogFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.hotel, self.room = self.make_hotel()
+        Room.objects.create(hotel=self.hotel, number='R1-2', room_type=self.room.room_type)
+        self.start = date(2025, 1, 1)
+
+    def stay(self, offset, nights, price, status='PAID'):
+        check_in = self.start + timedelta(days=offset)
+        return Reservation.objects.create(
+            user=self.user, room=self.room, first_name='Tamu', last_name='Hotel', status=status,
+            check_in=check_in, check_out=check_in + timedelta(days=nights), total_price=price,
+        )
+
+    def test_sweep_matches_reservations(self):
+        self.stay(-1, 3, 300)   # dua malam pertama masuk rentang
+        self.stay(1, 2, 500)
+        self.stay(3, 1, 100, status='CANCELLED')
+        data = sweep(self.start, self.start + timedelta(days=4))
+        self.assertEqual(data['sold'].tolist(), [[1, 2, 1, 0]])
+        self.assertEqual(data['revenue'].tolist(), [[100.0, 350.0, 250.0, 0.0]])
+
+        report = summary(self.start, self.start + timedelta(days=4))
+        row = report['groups'][0]
+        self.assertEqual((row['rooms'], row['sold'], row['revenue']), (2, 4, 700.0))
+        self.assertAlmostEqual(row['occupancy'], 0.5)
+        self.assertAlmostEqual(row['adr'], 175.0)
+        self.assertAlmostEqual(row['revpar'], 87.5)
+
+    def test_admin_dashboard_and_export(self):
+        self.stay(0, 2, 200)
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'rahasia123')
+        self.client.force_login(admin_user)
+        params = {'start': '2025-01-01', 'end': '2025-01-03', 'group_by': 'room_type'}
+        response = self.client.get(reverse('admin:reservasi_backend_reservation_analytics'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report']['groups'][0]['sold'], 2)
+        response = self.client.get(reverse('admin:reservasi_backend_reservation_analytics_export'), params)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].endswith('2,1,100.0,0.5,100.0,50.0,0'))
+
+
+class DailyStatsRollupTests(CatalogFixtureMixin, TestCase):
+    def snapshot(self):
+        return sorted(DailyHotelStats.objects.exclude(
+            rooms_sold=0, revenue=0, cancellations=0
+        ).values_list('room_type_id', 'date', 'rooms_sold', 'revenue', 'cancellations'))
+
+    def test_incremental_rollup_matches_rebuild(self):
+        hotel, room = self.make_hotel()
+        for i in range(2, 5):
+            Room.objects.create(hotel=hotel, number=f'R1-{i}', room_type=room.room_type)
+        check_in = date.today() + timedelta(days=3)
+        paid = Reservation.objects.create(
+            user=self.user, room=room, first_name='A', last_name='B', status='PAID',
+            check_in=check_in, check_out=check_in + timedelta(days=3), total_price=330,
+        )
+        pending = self.make_reservation(room, status='PENDING')
+        pending.status = 'PAID'
+        pending.save()
+        self.login()
+        self.client.post(reverse('cancel_reservation', args=[paid.id]))
+
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'rahasia123')
+        self.client.force_login(admin_user)
+        group = create_group_booking(self.user, hotel, check_in, check_in + timedelta(days=2), {room.room_type_id: 2},
+                                     {'first_name': 'G', 'last_name': 'R'})
+        Payment.objects.create(booking=group)
+        self.client.post(reverse('admin:reservasi_backend_payment_changelist'), {
+            'action': 'mark_as_paid', '_selected_action': [group.payment.pk],
+        })
+        self.client.post(reverse('admin:reservasi_backend_reservation_changelist'), {
+            'action': 'mark_as_checked_in', '_selected_action': [pending.pk],
+        })
+
+        incremental = self.snapshot()
+        self.assertTrue(incremental)
+        start, end = date.today() - timedelta(days=10), date.today() + timedelta(days=10)
+        rebuild_daily_stats(start, end)
+        self.assertEqual(self.snapshot(), incremental)
+
+        row = DailyHotelStats.objects.get(date=check_in)
+        self.assertEqual((row.rooms_sold, row.cancellations), (2, 1))
+
+
+class ReservationArchiveTests(CatalogFixtureMixin, TestCase):
+    def old_stay(self, room, status, days_ago):
+        check_out = date.today() - timedelta(days=days_ago)
+        return Reservation.objects.create(
+            user=self.user, room=room, first_name='Tamu', last_name='Hotel', status=status,
+            check_in=check_out - timedelta(days=2), check_out=check_out, total_price=200,
+        )
+
+    def test_archive_moves_finished_stays_and_keeps_reads(self):
+        hotel, room = self.make_hotel()
+        reviewed = self.old_stay(room, 'CHECKED_OUT', 400)
+        Payment.objects.create(reservation=reviewed, is_paid=True, proof='payment_proofs/bukti.jpg')
+        Review.objects.create(reservation=reviewed, rating=4)
+        unreviewed = self.old_stay(room, 'CHECKED_OUT', 380)
+        cancelled = self.old_stay(room, 'CANCELLED', 390)
+        recent = self.make_reservation(room)
+        stats = sorted(DailyHotelStats.objects.values_list('room_type_id', 'date', 'rooms_sold', 'revenue', 'cancellations'))
+
+        call_command('archive_reservations', days=365, batch_size=2, stdout=StringIO())
+
+        self.assertEqual(list(Reservation.objects.values_list('pk', flat=True)), [recent.pk])
+        self.assertEqual(
+            set(ArchivedReservation.objects.values_list('pk', flat=True)), {reviewed.pk, unreviewed.pk, cancelled.pk}
+        )
+        payment = ArchivedPayment.objects.get(reservation_id=reviewed.pk)
+        self.assertEqual(payment.proof.name, 'payment_proofs/bukti.jpg')
+        review = Review.objects.get()
+        self.assertEqual((review.reservation_id, review.archived_reservation_id), (None, reviewed.pk))
+        self.assertEqual(review_summary(hotel.id)['count'], 1)
+        # Statistik yang sudah tercatat tidak ikut berkurang, dan rebuild membaca arsip
+        self.assertEqual(sorted(DailyHotelStats.objects.values_list(
+            'room_type_id', 'date', 'rooms_sold', 'revenue', 'cancellations'
+        )), stats)
+        start = date.today() - timedelta(days=410)
+        rebuild_daily_stats(start, date.today())
+        self.assertEqual(sorted(DailyHotelStats.objects.values_list(
+            'room_type_id', 'date', 'rooms_sold', 'revenue', 'cancellations'
+        )), stats)
+
+        self.login()
+        response = self.client.get(reverse('reservation_history'))
+        self.assertEqual(
+            [r.pk for r in response.context['reservations']], [cancelled.pk, recent.pk, unreviewed.pk, reviewed.pk]
+        )
+        self.assertEqual(self.client.get(reverse('reservation_detail', args=[reviewed.pk])).status_code, 200)
+        self.client.post(reverse('review', args=[unreviewed.pk]), {'rating': 5, 'comment': 'Nyaman'})
+        self.assertEqual(Review.objects.get(archived_reservation_id=unreviewed.pk).hotel_id, hotel.pk)
+        response = self.client.get(reverse('hotel_reviews', args=[hotel.id]))
+        self.assertEqual(len(response.json()['reviews']), 2)
+
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'rahasia123')
+        self.client.force_login(admin_user)
+        response = self.client.get(reverse('admin:reservasi_backend_reservation_change', args=[cancelled.pk]))
+        self.assertRedirects(response, reverse('admin:reservasi_backend_archivedreservation_change', args=[cancelled.pk]))
+        # Pencarian di changelist aktif ikut memeriksa arsip
+        changelist = reverse('admin:reservasi_backend_reservation_changelist')
+        response = self.client.get(changelist, {'q': str(cancelled.pk)})
+        self.assertRedirects(
+            response, f"{reverse('admin:reservasi_backend_archivedreservation_changelist')}?q={cancelled.pk}"
+        )
+        response = self.client.get(changelist, {'q': 'tamu'})
+        self.assertEqual([r.pk for r in response.context['cl'].result_list], [recent.pk])
+        self.assertContains(response, 'Lihat hasil di arsip')
+
+
+class AdminChangelistTests(CatalogFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.hotel, self.room = self.make_hotel()
+        self.other_hotel, self.other_room = self.make_hotel()
+        self.reservations = [self.make_reservation(self.room) for _ in range(3)]
+        self.other = self.make_reservation(self.other_room)
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'rahasia123')
+        self.client.force_login(admin_user)
+        self.url = reverse('admin:reservasi_backend_reservation_changelist')
+
+    def changelist_ids(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return {obj.pk for obj in response.context['cl'].result_list}
+
+    def test_estimated_count_paginator(self):
+        class SmallPaginator(EstimatedCountPaginator):
+            exact_limit = 2
+
+        # Tanpa statistik tabel hitungan terbatas ditandai sebagai batas bawah
+        self.assertEqual(str(SmallPaginator(Reservation.objects.all(), 10).count), '2+')
+        call_command('archive_reservations', stdout=StringIO())
+        self.assertEqual(SmallPaginator(Reservation.objects.all(), 10).count, 4)
+        count = SmallPaginator(Reservation.objects.filter(hotel=self.hotel), 10).count
+        self.assertEqual((count, str(count)), (2, '2+'))
+
+    def test_pages_past_the_count_limit_stay_reachable(self):
+        with patch.object(EstimatedCountPaginator, 'exact_limit', 2), \
+                patch.object(ReservationAdmin, 'list_per_page', 1):
+            response = self.client.get(self.url, {'hotel': self.hotel.pk, 'p': 3})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['cl'].result_list), 1)
+            self.assertEqual(response.context['cl'].result_count, 3)
+            with patch.object(ReservationAdmin, 'count_pages_ahead', 0):
+                response = self.client.get(self.url, {'hotel': self.hotel.pk})
+            self.assertContains(response, '2+')
+
+    def test_filters_and_bounded_search(self):
+        self.assertEqual(self.other.hotel_id, self.other_hotel.pk)
+        self.assertEqual(self.changelist_ids({'hotel': self.hotel.pk}), {r.pk for r in self.reservations})
+        self.assertEqual(self.changelist_ids({'q': str(self.other.pk)}), {self.other.pk})
+        self.assertEqual(self.changelist_ids({'q': 'Hotel 2'}), {self.other.pk})
+        self.assertEqual(self.changelist_ids({'q': 'tam'}), {r.pk for r in self.reservations} | {self.other.pk})
+        check_in = self.other.check_in
+        self.assertEqual(len(self.changelist_ids({
+            'check_in__year': check_in.year, 'check_in__month': check_in.month, 'check_in__day': check_in.day,
+        })), 4)
+
+        Review.objects.create(reservation=self.other, rating=3, comment='Sarapan enak')
+        response = self.client.get(reverse('admin:reservasi_backend_review_changelist'), {'q': 'sarapan'})
+        self.assertEqual(len(response.context['cl'].result_list), 1)
+
+    def test_search_term_matching_an_id_and_a_room_number(self):
+        # Nomor kamar sama dengan id reservasi lain: keduanya harus muncul
+        first = self.reservations[0]
+        room = Room.objects.create(hotel=self.hotel, number=str(first.pk), room_type=self.room.room_type)
+        in_room = self.make_reservation(room)
+        self.assertNotEqual(in_room.pk, first.pk)
+        self.assertEqual(self.changelist_ids({'q': str(first.pk)}), {first.pk, in_room.pk})
+
+        review_url = reverse('admin:reservasi_backend_review_changelist')
+        Review.objects.create(reservation=in_room, rating=4)
+        response = self.client.get(review_url, {'q': room.number})
+        self.assertEqual([review.reservation_id for review in response.context['cl'].result_list], [in_room.pk])
+
+    def test_prefix_hits_keep_like_search_and_truncation_falls_back(self):
+        # Awalan nama pengguna cocok, tapi komentar yang menyebut kata itu tetap ditemukan
+        other_user = User.objects.create_user('budi', 'budi@example.com', 'rahasia123')
+        guest = Reservation.objects.create(
+            user=other_user, room=self.other_room, first_name='Budi', last_name='Hotel',
+            check_in=self.other.check_in, check_out=self.other.check_out, status='CHECKED_OUT',
+        )
+        Review.objects.create(reservation=guest, rating=5, comment='Staf ramah ke semua tamu')
+        Review.objects.create(reservation=self.other, rating=3)
+        review_url = reverse('admin:reservasi_backend_review_changelist')
+        response = self.client.get(review_url, {'q': 'tamu'})
+        self.assertEqual({review.reservation_id for review in response.context['cl'].result_list}, {guest.pk, self.other.pk})
+
+        # Daftar id awalan yang mencapai batas tidak memotong hasil
+        with patch.object(ReservationAdmin, 'search_id_limit', 1):
+            self.assertEqual(self.changelist_ids({'q': 'Hotel'}), {r.pk for r in self.reservations} | {self.other.pk, guest.pk})
+
+
+class TempMediaMixin:
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def image(self, name, color):
+        buffer = BytesIO()
+        Image.new('RGB', (8, 8), color).save(buffer, 'PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class GalleryUploadTests(TempMediaMixin, CatalogFixtureMixin, TestCase):
+    def test_bulk_upload_reports_each_file(self):
+        hotel = Hotel.objects.create(name='Hotel Galeri', location='Jl. Asia Afrika', region='Bandung')
+        HotelGallery.objects.create(hotel=hotel, image=self.image('lama.png', 'red'))
+        uploads = [
+            self.image('merah.png', 'red'),
+            self.image('biru.png', 'blue'),
+            self.image('biru-lagi.png', 'blue'),
+            SimpleUploadedFile('rusak.jpg', b'bukan gambar', content_type='image/jpeg'),
+            self.image('hijau.png', 'green'),
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            results = upload_gallery_images(hotel, uploads, caption='Galeri')
+        self.assertEqual(
+            [(name, status) for name, status, _message in results],
+            [('merah.png', 'duplicate'), ('biru.png', 'saved'), ('biru-lagi.png', 'duplicate'),
+             ('rusak.jpg', 'invalid'), ('hijau.png', 'saved')],
+        )
+        self.assertEqual(sum(
+            q['sql'].startswith('INSERT INTO "reservasi_backend_hotelgallery"') for q in queries.captured_queries
+        ), 1)
+        self.assertEqual(hotel.gallery.count(), 3)
+        self.assertEqual(len(set(hotel.gallery.values_list('content_hash', flat=True))), 3)
+        hotel.refresh_from_db()
+        self.assertIsNotNone(hotel.cover_image_id)
+
+    def test_failed_insert_keeps_shared_blobs(self):
+        first, _room = self.make_hotel()
+        second, _room = self.make_hotel()
+        shared = HotelGallery.objects.create(hotel=first, image=self.image('lama.png', 'red'))
+        before = set(MediaBlob.objects.values_list('name', flat=True))
+        with patch.object(HotelGallery.objects, 'bulk_create', side_effect=RuntimeError('gagal')):
+            with self.assertRaises(RuntimeError):
+                upload_gallery_images(second, [self.image('sama.png', 'red'), self.image('baru.png', 'blue')])
+        # Blob yang dipakai galeri hotel lain tetap ada dengan refcount utuh
+        self.assertTrue(content_storage.exists(shared.image.name))
+        self.assertEqual(MediaBlob.objects.get(name=shared.image.name).refcount, 1)
+        # Blob baru tercatat tanpa rujukan sehingga gc_media membersihkannya setelah masa tenggang
+        orphan = MediaBlob.objects.exclude(name__in=before).get()
+        self.assertEqual(orphan.refcount, 0)
+        self.assertTrue(content_storage.exists(orphan.name))
+
+
+class ContentAddressedMediaTests(TempMediaMixin, CatalogFixtureMixin, TestCase):
+    def test_identical_uploads_share_one_blob(self):
+        first, _room = self.make_hotel()
+        second, _room = self.make_hotel()
+        a = HotelGallery.objects.create(hotel=first, image=self.image('a.png', 'red'))
+        b = HotelGallery.objects.create(hotel=second, image=self.image('b.png', 'red'))
+        self.assertEqual(a.image.name, b.image.name)
+        self.assertEqual(a.image.name, f'hotel_images/{a.content_hash[:2]}/{a.content_hash}.png')
+        self.assertEqual(MediaBlob.objects.get(name=a.image.name).refcount, 2)
+
+        a.delete()
+        b.delete()
+        self.assertEqual(MediaBlob.objects.get(name=a.image.name).refcount, 0)
+        call_command('gc_media', grace_hours=0, stdout=StringIO())
+        self.assertFalse(content_storage.exists(a.image.name))
+        self.assertFalse(MediaBlob.objects.filter(name=a.image.name).exists())
+
+    def test_dedupe_existing_media(self):
+        hotel, _room = self.make_hotel()
+        legacy = FileSystemStorage()
+        data = self.image('x.png', 'blue').read()
+        names = [legacy.save('hotel_images/lama.png', ContentFile(data)) for _ in range(2)]
+        self.assertNotEqual(names[0], names[1])
+        for name in names:
+            HotelGallery.objects.create(hotel=hotel, image=name)
+
+        call_command('dedupe_media', stdout=StringIO())
+
+        stored = set(hotel.gallery.exclude(image__startswith='hotel_images/1-').values_list('image', flat=True))
+        self.assertEqual(len(stored), 1)
+        name = stored.pop()
+        self.assertTrue(content_storage.exists(name))
+        self.assertFalse(any(legacy.exists(old) for old in names))
+        self.assertEqual(MediaBlob.objects.get(name=name).refcount, 2)
+
+
+class ProfilingMiddlewareTests(CatalogFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir, ignore_errors=True)
+        self.make_hotel()
+
+    def test_disabled_by_default(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(lambda request: None)
+
+    def test_header_triggers_rotating_dumps_and_report(self):
+        with self.settings(PROFILING_TOKEN='rahasia', PROFILING_DIR=self.profile_dir, PROFILING_MAX_FILES=2):
+            response = self.client.get(reverse('hotel_list'))
+            self.assertNotIn('Server-Timing', response)
+            self.assertFalse(os.listdir(self.profile_dir))
+            for _ in range(3):
+                response = self.client.get(reverse('hotel_list'), headers={'X-Profile': 'rahasia'})
+                self.assertEqual(response.status_code, 200)
+            self.assertIn('tpl;dur=', response['Server-Timing'])
+
+            dumps = sorted(os.listdir(os.path.join(self.profile_dir, 'hotel_list')))
+            self.assertEqual(len(dumps), 4)
+            with open(os.path.join(self.profile_dir, 'hotel_list', dumps[0])) as f:
+                timings = json.load(f)
+            self.assertGreater(timings['template_ms'], 0)
+            self.assertGreater(timings['queries'], 0)
+
+            out = StringIO()
+            call_command('profile_report', top=5, stdout=out)
+            self.assertIn('hotel_list (2 sampel)', out.getvalue())
+
+    def test_query_timer_separates_template_queries(self):
+        timer = QueryTimer()
+        with connection.execute_wrapper(timer):
+            list(Hotel.objects.all())
+            Template('{{ hotels|length }}').render(Context({'hotels': Hotel.objects.all()}))
+        self.assertEqual(timer.count, 2)
+        self.assertGreater(timer.template_seconds, 0)
+        self.assertLess(timer.template_seconds, timer.seconds)
+
+
+class WarmCacheTests(CatalogFixtureMixin, TestCase):
+    def test_command_fills_detail_and_review_caches(self):
+        hotel, _room = self.make_hotel()
+        out = StringIO()
+        call_command('warm_cache', workers=1, top=5, stdout=out)
+        self.assertIn('detik', out.getvalue())
+        self.assertIsNotNone(cache.get(f'hotel_detail:{catalog_version()}:{hotel.pk}'))
+        self.assertIsNotNone(cache.get(summary_cache_key(hotel.pk)))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('hotel_detail', args=[hotel.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in queries if 'reservasi_backend_room"' in q['sql']])
+
+    def test_detail_cache_follows_catalog_changes(self):
+        hotel, room = self.make_hotel()
+        call_command('warm_cache', workers=1, top=5, stdout=StringIO())
+        room.is_available = False
+        room.save()
+        response = self.client.get(reverse('hotel_detail', args=[hotel.id]))
+        self.assertEqual(list(response.context['rooms']), [])
+
+
+class PageCacheTests(CatalogFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        page_cache = override_settings(PAGE_CACHE_SECONDS=60, PAGE_CACHE_STALE_SECONDS=600, PAGE_CACHE_BACKGROUND=False)
+        page_cache.enable()
+        self.addCleanup(page_cache.disable)
+        cache.clear()
+
+    def test_anonymous_repeat_is_served_without_queries(self):
+        hotel, _room = self.make_hotel()
+        url = reverse('hotel_detail', args=[hotel.id])
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'miss')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertEqual(len(queries), 0)
+
+        self.login()
+        self.assertNotIn('X-Page-Cache', self.client.get(url))
+
+    def test_purge_is_targeted_by_hotel(self):
+        hotel, room = self.make_hotel()
+        other, _room = self.make_hotel()
+        urls = [reverse('hotel_detail', args=[h.id]) for h in (hotel, other)]
+        first = [self.client.get(url).content for url in urls]
+
+        self.make_reservation(room, review=True)
+        stale = self.client.get(urls[0])
+        self.assertEqual(stale['X-Page-Cache'], 'stale')
+        self.assertEqual(stale.content, first[0])
+        fresh = self.client.get(urls[0])
+        self.assertEqual(fresh['X-Page-Cache'], 'hit')
+        self.assertNotEqual(fresh.content, first[0])
+        self.assertEqual(self.client.get(urls[1])['X-Page-Cache'], 'hit')
+
+    def test_irrelevant_params_share_entry(self):
+        self.make_hotel()
+        url = reverse('hotel_search')
+        self.assertEqual(self.client.get(url, {'region': 'Bandung', 'utm_source': 'a'})['X-Page-Cache'], 'miss')
+        self.assertEqual(self.client.get(url, {'utm_source': 'b', 'region': 'Bandung'})['X-Page-Cache'], 'hit')
+        self.assertEqual(self.client.get(url, {'region': 'Jakarta'})['X-Page-Cache'], 'miss')
+
+
+def bump_many(namespace, times):
+    for _ in range(times):
+        bump(namespace)
+
+
+def watch_process_cache(ready, bumped, results):
+    cache = ProcessCache('review')
+    cache.get_or_set('ringkasan', lambda: 'lama')
+    ready.set()
+    bumped.wait(10)
+    results.put(cache.get('ringkasan'))
+
+
+@skipUnless('fork' in multiprocessing.get_all_start_methods(), "butuh start method fork")
+class InvalidationBusTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings_override = override_settings(INVALIDATION_BUS_PATH=os.path.join(directory, 'bus.bin'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.context = multiprocessing.get_context('fork')
+
+    def test_concurrent_bumps_are_not_lost(self):
+        cache = ProcessCache('hotel')
+        self.assertEqual(cache.get_or_set('ringkasan', lambda: 'lama'), 'lama')
+        before = version('hotel')
+        workers = [self.context.Process(target=bump_many, args=('hotel', 200)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+            self.assertEqual(worker.exitcode, 0)
+        self.assertEqual(version('hotel'), before + 800)
+        self.assertIsNone(cache.get('ringkasan'))
+        self.assertEqual(cache.get_or_set('ringkasan', lambda: 'baru'), 'baru')
+
+    def test_other_process_drops_stale_entries(self):
+        ready, bumped = self.context.Event(), self.context.Event()
+        results = self.context.Queue()
+        worker = self.context.Process(target=watch_process_cache, args=(ready, bumped, results))
+        worker.start()
+        self.assertTrue(ready.wait(10))
+        bump('review')
+        bumped.set()
+        self.assertIsNone(results.get(timeout=10))
+        worker.join(10)
+
+
+class MockChannel:
+    # Channel manager tiruan: menarik feed per batch dan menyimpan sisa kamar per (tipe, malam)
+    def __init__(self, client, token):
+        self.client = client
+        self.token = token
+        self.cursor = 0
+        self.rooms = defaultdict(list)
+        self.nights = Counter()
+        self.prices = {}
+
+    def sync(self, limit=2):
+        while True:
+            batch = self.client.get(
+                reverse('availability_feed'), {'cursor': self.cursor, 'limit': limit},
+                HTTP_AUTHORIZATION=f'Bearer {self.token}',
+            ).json()
+            for item in batch['rooms']:
+                self.rooms[item['room_type']].append((date.fromisoformat(item['from']), item['delta']))
+            for item in batch['nights']:
+                self.nights[item['room_type'], date.fromisoformat(item['date'])] += item['delta']
+            for item in batch['prices']:
+                self.prices[item['room_type']] = Decimal(item['base_price'])
+            self.cursor = batch['cursor']
+            if not batch['has_more']:
+                return
+
+    def available(self, room_type_id, night):
+        rooms = sum(delta for start, delta in self.rooms[room_type_id] if start <= night)
+        return rooms + self.nights[room_type_id, night]
+
+
+@override_settings(CHANNEL_FEED_TOKEN='rahasia-channel')
+class AvailabilityFeedTests(CatalogFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.hotel, room = self.make_hotel()
+        self.room_type = room.room_type
+        self.room = Room.objects.create(hotel=self.hotel, number='R1-2', room_type=self.room_type)
+        self.check_in = date.today() + timedelta(days=7)
+        self.channel = MockChannel(self.client, 'rahasia-channel')
+
+    def reserve(self, days, status='PENDING'):
+        return Reservation.objects.create(
+            user=self.user, room=self.room, first_name='Tamu', last_name='Hotel',
+            check_in=self.check_in, check_out=self.check_in + timedelta(days=days), status=status,
+        )
+
+    def assert_mirrors_inventory(self):
+        self.channel.sync()
+        for offset in range(-1, 6):
+            night = self.check_in + timedelta(days=offset)
+            free = availability([self.room_type.id], night, night + timedelta(days=1))[self.room_type.id]
+            self.assertEqual(self.channel.available(self.room_type.id, night), free, night)
+
+    def test_channel_follows_reservations_rooms_and_prices(self):
+        self.assert_mirrors_inventory()
+        first = self.reserve(3)
+        self.reserve(2)
+        self.assert_mirrors_inventory()
+
+        first.status = 'CANCELLED'
+        first.save()
+        self.room.is_available = False
+        self.room.save()
+        self.room_type.base_price = Decimal('650000')
+        self.room_type.save()
+        self.assert_mirrors_inventory()
+        self.assertEqual(self.channel.prices[self.room_type.id], Decimal('650000'))
+
+        cursor = self.channel.cursor
+        self.channel.sync()
+        self.assertEqual(self.channel.cursor, cursor)
+
+    def test_log_rolls_back_with_its_reservation(self):
+        before = AvailabilityChange.objects.count()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.reserve(2)
+            raise RuntimeError
+        self.assertEqual(AvailabilityChange.objects.count(), before)
+
+    def test_feed_requires_token(self):
+        self.assertEqual(self.client.get(reverse('availability_feed')).status_code, 403)
+        out = StringIO()
+        call_command('availability_feed', all=True, batch_size=1, stdout=out, stderr=StringIO())
+        batches = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertFalse(batches[-1]['has_more'])
+        self.assertEqual(batches[-1]['cursor'], AvailabilityChange.objects.latest('pk').pk)
+
+
+class PaymentReconciliationTests(CatalogFixtureMixin, TestCase):
+    def pending(self, room, total):
+        reservation = self.make_reservation(room, status='PENDING')
+        Reservation.objects.filter(pk=reservation.pk).update(total_price=total)
+        Payment.objects.create(reservation=reservation)
+        return reservation
+
+    def reconcile(self, lines, source='mutasi.csv'):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, source)
+        with open(path, 'w', newline='') as statement:
+            statement.write('tanggal,jumlah,keterangan\n')
+            statement.writelines(f'{line}\n' for line in lines)
+        out = StringIO()
+        call_command('reconcile_payments', path, batch_size=2, stdout=out)
+        return out.getvalue()
+
+    def test_amounts_in_local_formats(self):
+        self.assertEqual(parse_amount('Rp 1.650.000,00'), Decimal('1650000.00'))
+        self.assertEqual(parse_amount('1,650,000.50'), Decimal('1650000.50'))
+        self.assertEqual(parse_amount('1.650.000'), Decimal('1650000'))
+        self.assertIsNone(parse_amount('abc'))
+
+    def test_statement_marks_matches_paid_and_queues_the_rest(self):
+        hotel, room = self.make_hotel()
+        by_reference = self.pending(room, 1100000)
+        by_amount = self.pending(room, 750000)
+        twins = [self.pending(room, 500000), self.pending(room, 500000)]
+        Room.objects.create(hotel=hotel, number='R1-2', room_type=room.room_type)
+        check_in = date.today() + timedelta(days=5)
+        group = create_group_booking(self.user, hotel, check_in, check_in + timedelta(days=2), {room.room_type_id: 2},
+                                     {'first_name': 'G', 'last_name': 'R'})
+        Payment.objects.create(booking=group)
+        today = date.today().isoformat()
+
+        lines = [
+            f'{today},"1.100.000,00",TRF {by_reference.payment_reference.replace("RSV", "RSV-")} BUDI',
+            f'{today},750000,SETORAN TUNAI',
+            f'{today},500000,TRANSFER',
+            f'{today},{group.total_price:.2f},{group.payment_reference}',
+            f'{today},-15.000,BIAYA ADMIN',
+            f'kemarin,100000,{by_amount.payment_reference}',
+            f'{today},999,{by_reference.payment_reference}',
+        ]
+        output = self.reconcile(lines)
+        self.assertIn('7 baris: 3 pembayaran dilunasi, 3 masuk antrean tinjauan, 1 debit dilewati', output)
+
+        for reservation in (by_reference, by_amount):
+            reservation.refresh_from_db()
+            self.assertEqual(reservation.status, 'PAID')
+            self.assertTrue(reservation.payment.is_paid)
+        group.refresh_from_db()
+        self.assertEqual(group.status, 'PAID')
+        self.assertEqual(set(group.reservations.values_list('status', flat=True)), {'PAID'})
+        self.assertFalse(Payment.objects.filter(reservation__in=twins, is_paid=True).exists())
+        self.assertEqual(
+            sorted(StatementLine.objects.filter(is_resolved=False).values_list('line_number', 'reason')),
+            [(4, 'AMBIGUOUS'), (7, 'INVALID'), (8, 'NO_MATCH')],
+        )
+        self.assertEqual(StatementLine.objects.get(line_number=2).payment, by_reference.payment)
+
+        # Impor ulang mutasi yang sama tidak melunasi ulang maupun menggandakan antrean
+        output = self.reconcile(lines)
+        self.assertIn('0 pembayaran dilunasi', output)
+        self.assertIn('6 sudah pernah diimpor', output)
+        self.assertEqual(StatementLine.objects.count(), 6)
+
+    def test_overlapping_export_under_new_name_is_deduplicated(self):
+        yesterday, today = (date.today() - timedelta(days=1)).isoformat(), date.today().isoformat()
+        first = [f'{yesterday},200000,TRANSFER', f'{yesterday},200000,TRANSFER', f'{today},300000,BUDI']
+        self.assertIn('3 masuk antrean tinjauan', self.reconcile(first, 'mutasi-senin.csv'))
+
+        # Ekspor berikutnya bertumpuk sehari, dengan nama berkas dan nomor baris berbeda
+        second = [f'{yesterday},200000,TRANSFER', f'{yesterday},200000,TRANSFER', f'{today},300000,BUDI',
+                  f'{today},200000,TRANSFER']
+        output = self.reconcile(['2000-01-01,1,SALDO AWAL'] + second, 'mutasi-selasa.csv')
+        self.assertIn('3 sudah pernah diimpor', output)
+        self.assertEqual(StatementLine.objects.count(), 5)
+        self.assertEqual(StatementLine.objects.filter(description='TRANSFER').count(), 3)
+
+
+class WaitlistTests(CatalogFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.hotel, room = self.make_hotel()
+        self.room_type = room.room_type
+        self.check_in = date.today() + timedelta(days=7)
+        self.check_out = self.check_in + timedelta(days=3)
+
+    def request(self, username, check_in=None, check_out=None, waitlist=False):
+        self.user = User.objects.get_or_create(username=username)[0]
+        self.login()
+        data = {
+            'room_type': self.room_type.id,
+            'check_in': (check_in or self.check_in).isoformat(),
+            'check_out': (check_out or self.check_out).isoformat(),
+            'first_name': username,
+            'last_name': 'Hotel',
+        }
+        if waitlist:
+            data['waitlist'] = '1'
+        return self.client.post(reverse('reservation_form', args=[self.hotel.id]), data)
+
+    def test_interval_index_matches_brute_force(self):
+        start = date.today()
+        intervals = [
+            (start + timedelta(days=i % 37), start + timedelta(days=i % 37 + 1 + i % 5), i) for i in range(300)
+        ]
+        index = IntervalIndex(intervals)
+        for offset in range(0, 45, 3):
+            lo, hi = start + timedelta(days=offset), start + timedelta(days=offset + 2)
+            expected = {value for a, b, value in intervals if a < hi and b > lo}
+            self.assertEqual(set(index.overlapping(lo, hi)), expected)
+        self.assertEqual(IntervalIndex([]).overlapping(lo, hi), [])
+
+    def test_cancellation_offers_hold_in_waitlist_order(self):
+        self.assertEqual(self.request('pertama').status_code, 302)
+        response = self.request('kedua')
+        self.assertTrue(response.context['waitlist'])
+        self.assertEqual(self.request('kedua', waitlist=True).status_code, 302)
+        self.request('ketiga', waitlist=True)
+        # Rentang yang tidak beririsan dengan malam yang dilepas tidak ikut dicocokkan
+        later = (self.check_out + timedelta(days=10), self.check_out + timedelta(days=11))
+        self.request('penghuni', *later)
+        self.request('lain', *later, waitlist=True)
+        self.assertEqual(WaitlistEntry.objects.filter(status='WAITING').count(), 3)
+
+        reservation = Reservation.objects.get(user__username='pertama')
+        self.user = reservation.user
+        self.login()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('cancel_reservation', args=[reservation.id]))
+
+        offered = WaitlistEntry.objects.get(status='OFFERED')
+        self.assertEqual(offered.user.username, 'kedua')
+        self.assertEqual(offered.reservation.status, 'PENDING')
+        self.assertEqual(offered.reservation.total_price, Decimal('1650000'))
+        self.assertEqual(availability([self.room_type.id], self.check_in, self.check_out)[self.room_type.id], 0)
+        self.assertEqual(
+            set(WaitlistEntry.objects.filter(status='WAITING').values_list('user__username', flat=True)),
+            {'ketiga', 'lain'},
+        )
+
+        # Hold yang tidak dibayar dilepas dan berpindah ke antrean berikutnya
+        expired, booked, offered_now = expire_offers(timezone.now() + timedelta(hours=2))
+        self.assertEqual((expired, booked, offered_now), (1, 0, 1))
+        offered.refresh_from_db()
+        self.assertEqual(offered.status, 'EXPIRED')
+        self.assertEqual(offered.reservation.status, 'CANCELLED')
+        self.assertEqual(WaitlistEntry.objects.get(status='OFFERED').user.username, 'ketiga')
+
+    def test_waitlist_request_books_directly_when_rooms_are_free(self):
+        response = self.request('tamu', waitlist=True)
+        reservation = Reservation.objects.get(user__username='tamu')
+        self.assertRedirects(response, reverse('payment', args=[reservation.id]), fetch_redirect_response=False)
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_bulk_admin_cancel_offers_every_freed_room(self):
+        for number in range(2, 5):
+            Room.objects.create(hotel=self.hotel, number=f'R1-{number}', room_type=self.room_type)
+        for i in range(4):
+            self.request(f'tamu{i}')
+        for i in range(5):
+            self.request(f'tunggu{i}', waitlist=True)
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'rahasia123')
+        self.client.force_login(admin)
+        cancelled = Reservation.objects.filter(user__username__in=['tamu0', 'tamu1', 'tamu2'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('admin:reservasi_backend_reservation_changelist'), {
+                'action': 'mark_as_cancelled', '_selected_action': list(cancelled.values_list('pk', flat=True)),
+            })
+        self.assertEqual(
+            sorted(WaitlistEntry.objects.filter(status='OFFERED').values_list('user__username', flat=True)),
+            ['tunggu0', 'tunggu1', 'tunggu2'],
+        )
+        self.assertEqual(Reservation.objects.filter(status='PENDING').count(), 4)
+        self.assertEqual(availability([self.room_type.id], self.check_in, self.check_out)[self.room_type.id], 0)
+
+
+class DynamicPricingTests(CatalogFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.hotel, room = self.make_hotel()
+        self.room_type = room.room_type
+        for number in range(2, 5):
+            Room.objects.create(hotel=self.hotel, number=f'R1-{number}', room_type=self.room_type)
+
+    def reprice(self, **options):
+        out = StringIO()
+        call_command('reprice', days=30, stdout=out, **options)
+        return out.getvalue()
+
+    def test_reprice_writes_only_changed_nights_and_quotes_read_them(self):
+        self.assertIn('30 dari 30 malam', self.reprice())
+        rates = dict(RoomRate.objects.values_list('date', 'multiplier'))
+        self.assertEqual(len(rates), 30)
+        # Malam kosong diberi potongan, malam Sabtu tetap lebih mahal dari malam Senin
+        saturday = next(day for day in rates if day.weekday() == 5)
+        monday = next(day for day in rates if day.weekday() == 0)
+        self.assertEqual(rates[monday], Decimal('0.85'))
+        self.assertGreater(rates[saturday], rates[monday])
+        self.assertIn('0 dari 30 malam', self.reprice())
+
+        check_in = monday
+        Reservation.objects.create(
+            user=self.user, room=Room.objects.filter(room_type=self.room_type).first(), first_name='Tamu', last_name='Hotel',
+            check_in=check_in, check_out=check_in + timedelta(days=2), status='PAID',
+        )
+        self.assertIn('2 dari 30 malam', self.reprice())
+        # Okupansi 1/4 dan satu pesanan baru dari 4 kamar
+        self.assertEqual(RoomRate.objects.get(date=check_in).multiplier, Decimal('1.04'))
+        self.assertEqual(RoomRate.objects.get(date=check_in).price, Decimal('520000.00'))
+
+        self.login()
+        response = self.client.get(reverse('reservation_form', args=[self.hotel.id]), {
+            'room_type_id': self.room_type.id,
+            'check_in': check_in.isoformat(),
+            'check_out': (check_in + timedelta(days=3)).isoformat(),
+        })
+        expected = sum(
+            RoomRate.objects.filter(date__gte=check_in, date__lt=check_in + timedelta(days=3)).values_list('price', flat=True)
+        )
+        self.assertEqual(response.context['total_kamar'], expected)
+        self.assertEqual(response.context['total_harga'], expected * Decimal('1.10'))
+
+        self.room_type.base_price = Decimal('600000')
+        self.room_type.save()
+        # Kutipan langsung memakai base_price baru x pengali tersimpan, sebelum reprice berikutnya
+        self.assertEqual(stay_subtotals([self.room_type], check_in, check_in + timedelta(days=2))[self.room_type.pk],
+                         Decimal('600000') * sum(RoomRate.objects.filter(
+                             date__gte=check_in, date__lt=check_in + timedelta(days=2)
+                         ).values_list('multiplier', flat=True)))
+        self.assertIn('30 dari 30 malam', self.reprice())
+        self.assertEqual(RoomRate.objects.get(date=monday + timedelta(days=7)).price, Decimal('510000.00'))
+
+
+class AvailabilityCalendarTests(CatalogFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.hotel, room = self.make_hotel()
+        self.deluxe = room.room_type
+        self.suite = RoomType.objects.create(hotel=self.hotel, name='Suite', base_price=900000)
+        Room.objects.create(hotel=self.hotel, number='R1-2', room_type=self.deluxe)
+        Room.objects.create(hotel=self.hotel, number='S1', room_type=self.suite)
+        self.url = reverse('hotel_calendar', args=[self.hotel.id])
+
+    def test_calendar_matches_availability_and_is_cached_per_version(self):
+        today = date.today()
+        check_in = today + timedelta(days=3)
+        create_group_booking(self.user, self.hotel, check_in, check_in + timedelta(days=2), {self.suite.pk: 1},
+                             {'first_name': 'G', 'last_name': 'R'})
+        RoomRate.objects.create(room_type=self.deluxe, date=check_in, rooms=2, base_price=500000, multiplier=Decimal('0.90'),
+                                price=450000)
+
+        calendar = self.client.get(self.url, {'days': 10}).json()
+        self.assertEqual(calendar['start'], today.isoformat())
+        by_type = {rt['id']: rt for rt in calendar['room_types']}
+        for offset in range(10):
+            night = today + timedelta(days=offset)
+            free = availability([self.deluxe.pk, self.suite.pk], night, night + timedelta(days=1))
+            self.assertEqual(by_type[self.deluxe.pk]['free'][offset], free[self.deluxe.pk])
+            self.assertEqual(by_type[self.suite.pk]['free'][offset], free[self.suite.pk])
+        self.assertEqual(calendar['free'][3:6], [2, 2, 3])
+        self.assertEqual(calendar['price'][2:4], [500000, 450000])
+        suite_only = self.client.get(self.url, {'days': 10, 'room_type': self.suite.pk}).json()
+        self.assertEqual(suite_only['price'][2:6], [900000, None, None, 900000])
+
+        # Hit cache tidak menyentuh database sama sekali
+        with self.assertNumQueries(0):
+            self.client.get(self.url, {'days': 10})
+        Reservation.objects.create(
+            user=self.user, room=Room.objects.get(number='R1-2'), first_name='Tamu', last_name='Hotel',
+            check_in=today + timedelta(days=1), check_out=today + timedelta(days=2), status='PENDING',
+        )
+        calendar = self.client.get(self.url, {'days': 10}).json()
+        self.assertEqual(calendar['free'][1], 2)
+        self.assertEqual(self.client.get(self.url, {'days': 'x'}).status_code, 400)
+
+    def test_strip_on_detail_and_reservation_pages(self):
+        response = self.client.get(reverse('hotel_detail', args=[self.hotel.id]))
+        self.assertContains(response, f'data-url="{self.url}" data-select="calendar_room_type"')
+        self.assertContains(response, f'data-book-url="{reverse("reservation_form", args=[self.hotel.id])}"')
+        self.login()
+        response = self.client.get(reverse('reservation_form', args=[self.hotel.id]))
+        self.assertContains(response, 'data-select="room_select"')
+        self.assertContains(response, "select.addEventListener('change', load)")
+
+    def test_base_price_edit_applies_to_rated_nights(self):
+        check_in = date.today() + timedelta(days=3)
+        RoomRate.objects.create(room_type=self.deluxe, date=check_in, rooms=2, base_price=500000, multiplier=Decimal('0.90'),
+                                price=450000)
+        self.deluxe.base_price = Decimal('600000')
+        self.deluxe.save()
+        # Tanpa reprice: tarif tersimpan mengikuti base_price baru lewat pengalinya
+        deluxe = next(rt for rt in self.client.get(self.url, {'days': 10}).json()['room_types'] if rt['id'] == self.deluxe.pk)
+        self.assertEqual(deluxe['price'][2:4], [600000, 540000])
+
+
+class SimilarHotelsTests(CatalogFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.hotels, self.rooms = zip(*(self.make_hotel() for _ in range(4)))
+        self.other = User.objects.create_user('lain', 'lain@example.com', 'rahasia123')
+
+    def neighbours(self, hotel):
+        return list(HotelSimilarity.objects.filter(hotel=hotel).order_by('rank').values_list('similar_hotel', flat=True))
+
+    def test_co_booked_hotels_rank_first_and_rebuild_is_incremental(self):
+        first, second, third, fourth = self.hotels
+        self.make_reservation(self.rooms[0])
+        self.make_reservation(self.rooms[2])
+        # Pesanan batal tidak dihitung sebagai co-booking
+        self.make_reservation(self.rooms[3], status='CANCELLED')
+        self.assertEqual(build_similarities(), (4, 12))
+        self.assertEqual(self.neighbours(first), [third.pk, second.pk, fourth.pk])
+        self.assertNotIn(first.pk, self.neighbours(first))
+
+        # Tanpa pemesanan baru tidak ada yang dihitung ulang
+        self.assertEqual(build_similarities(), (0, 0))
+        Reservation.objects.create(
+            user=self.other, room=self.rooms[1], first_name='Tamu', last_name='Lain',
+            check_in=date.today(), check_out=date.today() + timedelta(days=1), status='PENDING',
+        )
+        Reservation.objects.create(
+            user=self.other, room=self.rooms[3], first_name='Tamu', last_name='Lain',
+            check_in=date.today(), check_out=date.today() + timedelta(days=1), status='PENDING',
+        )
+        self.assertEqual(build_similarities()[0], 2)
+        self.assertEqual(self.neighbours(second)[0], fourth.pk)
+        self.assertEqual(self.neighbours(first), [third.pk, second.pk, fourth.pk])
+
+    def test_detail_page_lists_similar_hotels(self):
+        Hotel.objects.filter(pk=self.hotels[3].pk).update(region='Bali', star_rating=2)
+        call_command('build_similar_hotels', '--full', '--top', '2', stdout=StringIO())
+        response = self.client.get(reverse('hotel_detail', args=[self.hotels[0].pk]))
+        self.assertEqual([hotel.pk for hotel in response.context['similar_hotels']],
+                         [self.hotels[1].pk, self.hotels[2].pk])
+        self.assertContains(response, 'Hotel Serupa')
+
+
+class CatalogImportTests(TempMediaMixin, CatalogFixtureMixin, TestCase):
+    def load(self, lines, name='katalog.jsonl'):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, name)
+        with open(path, 'w', newline='') as catalog:
+            catalog.writelines(f'{line}\n' for line in lines)
+        out, err = StringIO(), StringIO()
+        call_command('import_catalog', path, batch_size=3, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def chain(self, price=500000, available=True):
+        rooms = [{'number': f'A{n}', 'facilities': ['AC', 'Kolam'], 'is_available': available} for n in range(3)]
+        return [
+            json.dumps({
+                'name': 'Aston Bandung', 'location': 'Jl. Braga', 'region': 'Bandung', 'star_rating': 4,
+                'latitude': -6.9, 'longitude': 107.6, 'images': ['hotel_images/aston.jpg'],
+                'room_types': [
+                    {'name': 'Deluxe', 'base_price': price, 'rooms': rooms},
+                    {'name': 'Suite', 'base_price': 900000, 'rooms': [{'number': 'A9', 'facilities': ['AC']}]},
+                ],
+            }),
+            '{bukan json',
+            json.dumps({'name': 'Hotel Antah', 'location': 'X', 'region': 'Atlantis'}),
+            json.dumps({
+                'name': 'Aston Surabaya', 'location': 'Jl. Tunjungan', 'region': 'Surabaya',
+                'room_types': [{'name': 'Superior', 'base_price': 400000, 'rooms': [{'number': 'B1'}]}],
+            }),
+        ]
+
+    def test_jsonl_upserts_catalog_and_refreshes_derived_fields(self):
+        ac = Facility.objects.create(name='AC')
+        before = catalog_version()
+        out, err = self.load(self.chain())
+        self.assertIn('2 hotel baru', out)
+        self.assertIn('Baris 2', err)
+        self.assertIn('Atlantis', err)
+        self.assertNotEqual(catalog_version(), before)
+
+        hotel = Hotel.objects.get(name='Aston Bandung')
+        pool = Facility.objects.get(name='Kolam')
+        self.assertEqual(hotel.min_price, Decimal('500000'))
+        self.assertEqual(hotel.facility_mask, ac.mask | pool.mask)
+        self.assertEqual(hotel.cover_image.image.name, 'hotel_images/aston.jpg')
+        self.assertTrue(hotel.geohash)
+        room = Room.objects.get(number='A0')
+        self.assertEqual(set(room.facilities.all()), {ac, pool})
+        self.assertEqual(room.facility_mask, ac.mask | pool.mask)
+        deluxe = RoomType.objects.get(hotel=hotel, name='Deluxe')
+        self.assertEqual(availability([deluxe.pk], date.today(), date.today() + timedelta(days=1)), {deluxe.pk: 3})
+        self.assertEqual(AvailabilityChange.objects.get(kind='ROOM', room_type=deluxe).delta, 3)
+
+        # Impor ulang tidak menggandakan apa pun; perubahan harga & ketersediaan ikut diperbarui
+        out, _err = self.load(self.chain())
+        self.assertIn('0 kamar baru, 0 diperbarui', out)
+        self.assertEqual(Hotel.objects.count(), 2)
+        self.assertEqual(Room.objects.count(), 5)
+        self.assertEqual(HotelGallery.objects.filter(hotel=hotel).count(), 1)
+        self.assertEqual(Room.facilities.through.objects.count(), 7)
+        RoomTypeInventory.objects.create(room_type=deluxe, date=date.today(), total=3)
+        self.load(self.chain(price=450000, available=False))
+        hotel.refresh_from_db()
+        self.assertEqual(hotel.min_price, Decimal('450000'))
+        self.assertEqual(RoomTypeInventory.objects.get(room_type=deluxe).total, 0)
+        self.assertEqual(AvailabilityChange.objects.filter(kind='PRICE', room_type=deluxe).count(), 2)
+
+    def test_csv_rejects_room_numbers_owned_by_another_hotel(self):
+        _hotel, room = self.make_hotel()
+        out, err = self.load([
+            'name,location,region,room_type,base_price,room_number,facilities,images',
+            'Hotel Baru,Jl. Asia Afrika,Bandung,Standard,300000,N1,AC|TV,hotel_images/baru.jpg',
+            f'Hotel Baru,,,Standard,,{room.number},,',
+            'Hotel Baru,,,Standard,,N2,,',
+        ], name='katalog.csv')
+        hotel = Hotel.objects.get(name='Hotel Baru')
+        self.assertEqual(sorted(hotel.rooms.values_list('number', flat=True)), ['N1', 'N2'])
+        self.assertEqual(Room.objects.get(number=room.number).hotel_id, room.hotel_id)
+        self.assertEqual(set(Room.objects.get(number='N1').facilities.values_list('name', flat=True)), {'AC', 'TV'})
+        self.assertIn('1 kamar ditolak', out)
+        self.assertIn(room.number, err)
+
+    def test_rooms_without_facility_column_keep_their_facilities(self):
+        self.load(self.chain())
+        ac, pool = Facility.objects.get(name='AC'), Facility.objects.get(name='Kolam')
+        # Baris kamar tanpa kunci facilities hanya mengubah ketersediaan
+        self.load([json.dumps({
+            'name': 'Aston Bandung',
+            'room_types': [{'name': 'Deluxe', 'rooms': [{'number': 'A0', 'is_available': False}]}],
+        })])
+        room = Room.objects.get(number='A0')
+        self.assertFalse(room.is_available)
+        self.assertEqual(set(room.facilities.all()), {ac, pool})
+        self.assertEqual(room.facility_mask, ac.mask | pool.mask)
+
+    def test_gallery_rows_register_media_references(self):
+        # Path katalog menunjuk berkas yang sudah disalin ke MEDIA_ROOT apa adanya
+        os.makedirs(os.path.join(self.media_root, 'hotel_images'))
+        with open(os.path.join(self.media_root, 'hotel_images', 'aston.jpg'), 'wb') as f:
+            f.write(b'gambar aston')
+        self.load(self.chain())
+        image = HotelGallery.objects.get(hotel__name='Aston Bandung')
+        self.assertEqual(MediaBlob.objects.get(name='hotel_images/aston.jpg').refcount, 1)
+        self.assertEqual(image.content_hash, hashlib.sha256(b'gambar aston').hexdigest())
+        # Berkas yang belum diunggah tetap dimuat dengan hash kosong
+        self.load([json.dumps({'name': 'Aston Bandung', 'images': ['hotel_images/belum-ada.jpg']})])
+        self.assertEqual(HotelGallery.objects.get(image='hotel_images/belum-ada.jpg').content_hash, '')
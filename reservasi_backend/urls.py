@@ -6,9 +6,14 @@ urlpatterns = [
     path('hotels/', views.HotelListView.as_view(), name='hotel_list'),
     path('hotel/search/', views.HotelSearchView.as_view(), name='hotel_search'),
     path('hotel/<int:hotel_id>/', views.HotelDetailView.as_view(), name='hotel_detail'),
+    path('hotel/<int:hotel_id>/reviews/', views.HotelReviewsView.as_view(), name='hotel_reviews'),
+    path('hotel/<int:hotel_id>/calendar/', views.HotelCalendarView.as_view(), name='hotel_calendar'),
+    path('channel/availability/', views.AvailabilityFeedView.as_view(), name='availability_feed'),
     # Pastikan URL dengan parameter dinamis (hotel_id) didefinisikan sebelum URL statis
     path('reservation/<int:hotel_id>/', views.ReservationView.as_view(), name='reservation_form'),
+    path('reservation/<int:hotel_id>/group/', views.GroupBookingView.as_view(), name='group_booking'),
     path('reservation/', views.ReservationView.as_view(), name='reservation'),
+    path('booking/<int:booking_id>/payment/', views.BookingPaymentView.as_view(), name='booking_payment'),
     path('reservation/<int:reservation_id>/payment/', views.PaymentView.as_view(), name='payment'),
     path('reservation/<int:reservation_id>/detail/', views.ReservationDetailView.as_view(), name='reservation_detail'),
     path('reservation/<int:reservation_id>/cancel/', views.CancelReservationView.as_view(), name='cancel_reservation'),
@@ -1,37 +1,95 @@
 from django.views.generic import TemplateView, FormView, View, ListView
 from django.contrib.auth.views import LoginView
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404, JsonResponse
+from django.db import transaction
 from django.urls import reverse_lazy
 from django.contrib.auth.forms import AuthenticationForm
 from django.core.mail import EmailMultiAlternatives
 from django.contrib import messages
 from django.conf import settings
 from django.template.loader import render_to_string
-from .forms import CustomUserCreationForm, ReservationForm, PaymentForm, ReviewForm
-from .models import Hotel, HotelGallery, Room, Reservation, Payment, Review, UserProfile, Facility
-from django.db.models import Q
+from .geo import within_bbox, within_radius, distances_from, parse_bbox, parse_coordinate
+from .inventory import InventoryUnavailable, availability, room_counts, reserve, allocate_room
+from .booking import create_group_booking
+from .pricing import stay_subtotals
+from .waitlist import match_on_commit
+from .calendars import hotel_calendar, CALENDAR_DAYS, MAX_CALENDAR_DAYS
+from .changefeed import availability_feed, FEED_BATCH_SIZE, MAX_FEED_BATCH_SIZE
+from .reviews import review_page, review_summary
+from .similarity import similar_hotels
+from .search import (
+    normalize_filters, apply_filters, get_facets, hotel_detail_data, keyset_page, distance_page, SORT_OPTIONS,
+)
+from .forms import CustomUserCreationForm, ReservationForm, GroupBookingForm, PaymentForm, ReviewForm
+from .models import (
+    Hotel, HotelGallery, RoomType, Booking, Reservation, ArchivedReservation, Payment, Review, UserProfile,
+    WaitlistEntry,
+)
+from django.db.models import Q, Count, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
 from datetime import date, datetime
 from django.contrib.auth import authenticate
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.utils import timezone
 from decimal import Decimal
-from functools import reduce
+import hmac
+import math
 
 # Mixin untuk memeriksa login
 class AppLoginRequiredMixin(LoginRequiredMixin):
     login_url = reverse_lazy('login')
 
+# Jumlah ulasan per hotel sebagai subquery, bukan satu query per kartu
+def review_count_subquery():
+    counts = Review.objects.filter(hotel=OuterRef('pk')).order_by().values(
+        'hotel'
+    ).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+# Reservasi lama bisa sudah dipindah ke arsip dengan id yang sama
+def user_stay_or_404(user, reservation_id, related=(), **filters):
+    for model in (Reservation, ArchivedReservation):
+        stay = model.objects.select_related(*related).filter(pk=reservation_id, user=user, **filters).first()
+        if stay is not None:
+            return stay
+    raise Http404
+
+def card_hotels():
+    return Hotel.objects.select_related('cover_image').annotate(jumlah_ulasan=review_count_subquery())
+
+# Tipe kamar hotel beserta sisa kamarnya dari tabel inventori
+def room_type_options(hotel, check_in, check_out):
+    room_types = list(RoomType.objects.filter(hotel=hotel).order_by('base_price', 'pk'))
+    if check_in and check_out and check_out > check_in:
+        free = availability([rt.pk for rt in room_types], check_in, check_out)
+    else:
+        free = room_counts([rt.pk for rt in room_types])
+    for room_type in room_types:
+        room_type.free = free[room_type.pk]
+    return room_types
+
+def parse_dates(check_in, check_out):
+    try:
+        return (
+            datetime.strptime(check_in, "%Y-%m-%d").date(),
+            datetime.strptime(check_out, "%Y-%m-%d").date(),
+        )
+    except (ValueError, TypeError):
+        return None, None
+
 # Beranda publik
 class HomeView(TemplateView):
     template_name = 'beranda.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['hotels'] = Hotel.objects.all()[:3]
-        context['featured_hotel'] = Hotel.objects.first()
+        hotels = Hotel.objects.select_related('cover_image')
+        context['hotels'] = hotels[:3]
+        context['featured_hotel'] = hotels.first()
         context['gallery'] = HotelGallery.objects.filter(hotel=context['featured_hotel'])[:6] if context['featured_hotel'] else []
-        context['all_hotels'] = Hotel.objects.all()
-        context['luxury_hotels'] = Hotel.objects.filter(star_rating=5)
+        context['all_hotels'] = hotels
+        context['luxury_hotels'] = hotels.filter(star_rating=5)
         
         # Add unique regions for hotel region buttons
         regions = []
@@ -107,20 +165,15 @@ class HotelListView(TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        hotels = Hotel.objects.all().prefetch_related('room_types', 'gallery')
+        hotels = card_hotels()
         hotel_data = []
 
         for hotel in hotels:
-            gambar = hotel.gallery.first()
-            room_types = hotel.room_types.all()
-            harga_termurah = min([rt.base_price for rt in room_types], default=0)
-            jumlah_ulasan = Review.objects.filter(reservation__room__hotel=hotel).count()
-
             hotel_data.append({
                 'obj': hotel,
-                'image': gambar.image.url if gambar else None,
-                'harga_termurah': harga_termurah,
-                'jumlah_ulasan': jumlah_ulasan,
+                'image': hotel.cover_image.image.url if hotel.cover_image else None,
+                'harga_termurah': hotel.min_price or 0,
+                'jumlah_ulasan': hotel.jumlah_ulasan,
             })
 
         context['hotel_data'] = hotel_data
@@ -130,46 +183,79 @@ class HotelListView(TemplateView):
 # Pencarian hotel
 class HotelSearchView(View):
     template_name = 'hotel/hotel_search.html'
+    DEFAULT_RADIUS_KM = 10
+    MAX_RADIUS_KM = 500
 
     def get(self, request):
-        hotels = Hotel.objects.all().prefetch_related('room_types', 'gallery')
+        hotels = card_hotels()
         destination_id = request.GET.get('destination_id')
-        region_name = request.GET.get('region')
-        star_ratings = request.GET.getlist('star_rating')
+        filters = normalize_filters(request.GET)
+        sort = request.GET.get('sort', '')
+        cursor = request.GET.get('cursor')
 
         hotel_data = []
 
         if destination_id:
             hotel = Hotel.objects.filter(id=destination_id).first()
             if hotel and hotel.region:
-                hotels = hotels.filter(region=hotel.region)
-        elif region_name:
-            hotels = hotels.filter(region__name=region_name)
-
-        if star_ratings:
-            try:
-                star_ratings = [int(rating) for rating in star_ratings if rating]
-                if star_ratings:
-                    hotels = hotels.filter(reduce(lambda x, y: x | y, [Q(star_rating=rating) for rating in star_ratings]))
-            except ValueError:
-                pass
-
-        for hotel in hotels:
-            gambar = hotel.gallery.first()
-            room_types = hotel.room_types.all()
-            harga_termurah = min([rt.base_price for rt in room_types], default=0)
-            jumlah_ulasan = Review.objects.filter(reservation__room__hotel=hotel).count()
+                filters['region'] = [hotel.region]
+
+        # Pencarian sekitar lokasi: radius (lat, lng, radius) atau kotak peta (bbox)
+        # Nilai yang tidak valid, tak hingga atau di luar rentang diabaikan
+        distances = None
+        lat = parse_coordinate(request.GET.get('lat'), 90)
+        lng = parse_coordinate(request.GET.get('lng'), 180)
+        if lat is None or lng is None:
+            lat = lng = None
+        bbox = parse_bbox(request.GET.get('bbox'))
+        if bbox:
+            min_lat, min_lng, max_lat, max_lng = bbox
+            if lat is None:
+                lat, lng = (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
+            distances = distances_from(within_bbox(Hotel.objects.all(), *bbox), lat, lng)
+        elif lat is not None:
+            radius = parse_coordinate(request.GET.get('radius'), math.inf)
+            radius = self.DEFAULT_RADIUS_KM if radius is None else min(max(radius, 0), self.MAX_RADIUS_KM)
+            distances = within_radius(Hotel.objects.all(), lat, lng, radius)
+
+        hotels = apply_filters(hotels, filters)
+        if distances is not None:
+            hotels = hotels.filter(pk__in=list(distances))
+
+        if distances is not None and sort not in SORT_OPTIONS:
+            matched = set(hotels.values_list('pk', flat=True))
+            page_ids, next_cursor = distance_page({pk: d for pk, d in distances.items() if pk in matched}, cursor)
+            by_id = hotels.in_bulk(page_ids)
+            page = [by_id[pk] for pk in page_ids if pk in by_id]
+        else:
+            page, next_cursor = keyset_page(hotels, sort, cursor)
 
+        for hotel in page:
             hotel_data.append({
                 'obj': hotel,
-                'image': gambar.image.url if gambar else None,
-                'harga_termurah': harga_termurah,
-                'jumlah_ulasan': jumlah_ulasan,
+                'image': hotel.cover_image.image.url if hotel.cover_image else None,
+                'harga_termurah': hotel.min_price or 0,
+                'jumlah_ulasan': hotel.jumlah_ulasan,
+                'distance': distances.get(hotel.pk) if distances is not None else None,
             })
 
+        # Facet dihitung dari snapshot katalog dan di-cache per kunci filter
+        geo_key = '|'.join(request.GET.get(k, '') for k in ('lat', 'lng', 'radius', 'bbox')) if distances is not None else ''
+        facets = get_facets(filters, set(distances) if distances is not None else None, geo_key)
+
+        next_url = None
+        if next_cursor:
+            params = request.GET.copy()
+            params['cursor'] = next_cursor
+            next_url = f'?{params.urlencode()}'
+
         return render(request, self.template_name, {
             'hotel_data': hotel_data,
-            'all_hotels': Hotel.objects.all()
+            'all_hotels': Hotel.objects.all(),
+            'facets': facets,
+            'filters': filters,
+            'sort': sort,
+            'next_url': next_url,
         })
 
 # Detail hotel
@@ -178,49 +264,114 @@ class HotelDetailView(TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        hotel_id = self.kwargs['hotel_id']
-        hotel = get_object_or_404(Hotel, pk=hotel_id)
-
-        gallery = HotelGallery.objects.filter(hotel_id=hotel_id)
-        rooms = Room.objects.filter(hotel=hotel, is_available=True).select_related('room_type')
-        reviews = Review.objects.filter(reservation__room__hotel=hotel)
-
-        harga_list = [
-            r.room_type.base_price
-            for r in rooms
-            if r.room_type and r.room_type.base_price is not None
-        ]
-        harga_termurah = min(harga_list) if harga_list else 0
-
-        facilities = Facility.objects.filter(room__in=rooms).distinct()
+        data = hotel_detail_data(self.kwargs['hotel_id'])
+        if data is None:
+            raise Http404
+        hotel = data['hotel']
+        reviews, next_review_cursor = review_page(hotel.pk)
 
         check_in = self.request.GET.get('check_in')
         check_out = self.request.GET.get('check_out')
 
+        context.update(data)
         context.update({
-            'hotel': hotel,
-            'gallery': gallery,
-            'rooms': rooms,
-            'facilities': facilities,
             'reviews': reviews,
-            'harga_termurah': harga_termurah,
+            'review_summary': review_summary(hotel.pk),
+            'next_review_cursor': next_review_cursor,
+            'similar_hotels': similar_hotels(hotel.pk),
             'check_in': check_in,
             'check_out': check_out,
         })
 
         return context
 
+# Ulasan hotel berikutnya (fragment HTML atau JSON)
+class HotelReviewsView(View):
+    fragment_template_name = 'hotel/review_items.html'
+
+    def get(self, request, hotel_id):
+        reviews, next_cursor = review_page(hotel_id, request.GET.get('cursor'))
+        if request.GET.get('format') == 'html':
+            response = render(request, self.fragment_template_name, {'reviews': reviews})
+            response['X-Next-Cursor'] = next_cursor or ''
+            return response
+        return JsonResponse({
+            'reviews': [
+                {
+                    'id': review.id,
+                    'author': review.author,
+                    'rating': review.rating,
+                    'comment': review.comment or '',
+                    'created_at': review.created_at.isoformat(),
+                    'stayed_at': review.stay.check_in.isoformat(),
+                }
+                for review in reviews
+            ],
+            'next_cursor': next_cursor,
+        })
+
+# Kalender sisa kamar & harga termurah per malam untuk pemilih tanggal
+class HotelCalendarView(View):
+    def get(self, request, hotel_id):
+        try:
+            days = min(max(1, int(request.GET.get('days', CALENDAR_DAYS))), MAX_CALENDAR_DAYS)
+            room_type_id = int(request.GET['room_type']) if request.GET.get('room_type') else None
+        except ValueError:
+            return JsonResponse({'error': "Parameter days/room_type harus angka."}, status=400)
+        calendar = hotel_calendar(hotel_id, days)
+        if calendar is None:
+            raise Http404
+        if room_type_id is not None:
+            room_types = [rt for rt in calendar['room_types'] if rt['id'] == room_type_id]
+            if not room_types:
+                raise Http404
+            calendar = {
+                **calendar,
+                'free': room_types[0]['free'],
+                'price': [price if free else None for free, price in zip(room_types[0]['free'], room_types[0]['price'])],
+                'room_types': room_types,
+            }
+        return JsonResponse(calendar)
+
+# Feed perubahan ketersediaan untuk channel manager (token di header Authorization)
+class AvailabilityFeedView(View):
+    def get(self, request):
+        token = getattr(settings, 'CHANNEL_FEED_TOKEN', None)
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not token or not hmac.compare_digest(supplied, token):
+            return JsonResponse({'error': "Token channel tidak valid."}, status=403)
+        try:
+            cursor = max(0, int(request.GET.get('cursor', 0)))
+            limit = min(max(1, int(request.GET.get('limit', FEED_BATCH_SIZE))), MAX_FEED_BATCH_SIZE)
+        except ValueError:
+            return JsonResponse({'error': "Parameter cursor/limit harus angka."}, status=400)
+        return JsonResponse(availability_feed(cursor, limit))
+
 # Reservasi
 class ReservationView(AppLoginRequiredMixin, View):
     form_template_name = 'reservasi/reservasi.html'
     list_template_name = 'reservasi/list_reservasi.html'
     TAX_RATE = Decimal('0.10')
 
+    def quote(self, room_type, check_in, check_out):
+        # Harga dari tabel tarif per malam; harga_kamar = rata-rata per malam untuk ditampilkan
+        harga_kamar = Decimal(room_type.base_price) if room_type else Decimal(0)
+        if room_type is None or not (check_in and check_out and check_out > check_in):
+            return harga_kamar, 1, harga_kamar, Decimal(0), harga_kamar
+        durasi = (check_out - check_in).days
+        total_kamar = stay_subtotals([room_type], check_in, check_out)[room_type.pk]
+        pajak = total_kamar * self.TAX_RATE
+        return (total_kamar / durasi).quantize(Decimal('0.01')), durasi, total_kamar, pajak, total_kamar + pajak
+
+    def has_free_room(self, data):
+        # Daftar tunggu hanya untuk tipe kamar yang penuh; bila masih ada sisa, permintaan langsung dipesan
+        room_type = data['room_type']
+        return availability([room_type.pk], data['check_in'], data['check_out'])[room_type.pk] > 0
+
     def get(self, request, hotel_id=None):
         if hotel_id:
             # Tampilkan form reservasi
-            hotel = get_object_or_404(Hotel, pk=hotel_id)
-            rooms = Room.objects.filter(hotel=hotel, is_available=True).select_related('room_type')
+            hotel = get_object_or_404(Hotel.objects.select_related('cover_image'), pk=hotel_id)
             check_in = request.GET.get('check_in') 
             check_out = request.GET.get('check_out') 
             if not check_in or check_in.lower() == 'none':
@@ -228,32 +379,20 @@ class ReservationView(AppLoginRequiredMixin, View):
 
             if not check_out or check_out.lower() == 'none':
                 check_out = (date.today() + timezone.timedelta(days=1)).strftime('%Y-%m-%d')
-                
-            room_id = request.GET.get('room_id')
-            room = Room.objects.filter(pk=room_id).first() if room_id else rooms.first() if rooms.exists() else None
-
-            harga_kamar = Decimal(room.room_type.base_price) if room else Decimal(0)
-            durasi = 1
-            total_kamar = harga_kamar
-            pajak = Decimal(0)
-            total_harga = total_kamar
-
-            if check_in and check_out:
-                try:
-                    check_in_date = datetime.strptime(check_in, "%Y-%m-%d").date()
-                    check_out_date = datetime.strptime(check_out, "%Y-%m-%d").date()
-                    if check_out_date > check_in_date:
-                        durasi = (check_out_date - check_in_date).days
-                        total_kamar = harga_kamar * durasi
-                        pajak = total_kamar * self.TAX_RATE
-                        total_harga = total_kamar + pajak
-                except (ValueError, TypeError):
-                    pass
+
+            check_in_date, check_out_date = parse_dates(check_in, check_out)
+            room_types = room_type_options(hotel, check_in_date, check_out_date)
+            room_type_id = request.GET.get('room_type_id')
+            room_type = next((rt for rt in room_types if str(rt.pk) == room_type_id), None)
+            if room_type is None:
+                room_type = next((rt for rt in room_types if rt.free), room_types[0] if room_types else None)
+
+            harga_kamar, durasi, total_kamar, pajak, total_harga = self.quote(room_type, check_in_date, check_out_date)
 
             form = ReservationForm(
                 hotel_id=hotel_id,
                 initial={
-                    'room': room.id if room else None,
+                    'room_type': room_type.id if room_type else None,
                     'check_in': check_in,
                     'check_out': check_out,
                     'first_name': request.user.first_name or '',
@@ -266,8 +405,8 @@ class ReservationView(AppLoginRequiredMixin, View):
             return render(request, self.form_template_name, {
                 'form': form,
                 'hotel': hotel,
-                'rooms': rooms,
-                'room_obj': room,
+                'room_types': room_types,
+                'room_type_obj': room_type,
                 'harga_kamar': harga_kamar,
                 'durasi': durasi,
                 'total_kamar': total_kamar,
@@ -281,96 +420,159 @@ class ReservationView(AppLoginRequiredMixin, View):
             reservations = Reservation.objects.filter(
                 user=request.user,
                 status__in=['PENDING', 'PAID', 'CHECKED_IN']
-            ).order_by('-check_in')
+            ).select_related('room__hotel__cover_image', 'room__room_type').order_by('-check_in')
             return render(request, self.list_template_name, {
                 'reservations': reservations,
             })
 
     def post(self, request, hotel_id):
-        hotel = get_object_or_404(Hotel, pk=hotel_id)
-        rooms = Room.objects.filter(hotel=hotel, is_available=True).select_related('room_type')
+        hotel = get_object_or_404(Hotel.objects.select_related('cover_image'), pk=hotel_id)
         form = ReservationForm(request.POST, hotel_id=hotel_id)
 
-        room_id = request.POST.get('room')
-        room = Room.objects.filter(pk=room_id).first() if room_id else None
-        harga_kamar = Decimal(room.room_type.base_price) if room else Decimal(0)
-        durasi = 1
-        total_kamar = harga_kamar
-        pajak = Decimal(0)
-        total_harga = total_kamar
-
-        # ✅ DEFINISIKAN DULU
-        check_in_str = request.POST.get('check_in')
-        check_out_str = request.POST.get('check_out')
-        check_in = None
-        check_out = None
-
-        if check_in_str and check_out_str:
-            try:
-                check_in = datetime.strptime(check_in_str, "%Y-%m-%d").date()
-                check_out = datetime.strptime(check_out_str, "%Y-%m-%d").date()
-                if check_out > check_in:
-                    durasi = (check_out - check_in).days
-                    total_kamar = harga_kamar * durasi
-                    pajak = total_kamar * self.TAX_RATE
-                    total_harga = total_kamar + pajak
-            except (ValueError, TypeError):
-                pass
-
-        # ✅ SEKARANG BARU CEK form.is_valid()
+        check_in, check_out = parse_dates(request.POST.get('check_in'), request.POST.get('check_out'))
+        room_types = room_type_options(hotel, check_in, check_out)
+        room_type_id = request.POST.get('room_type')
+        room_type = next((rt for rt in room_types if str(rt.pk) == room_type_id), None)
+        harga_kamar, durasi, total_kamar, pajak, total_harga = self.quote(room_type, check_in, check_out)
+
+        waitlist = False
+        if form.is_valid() and request.POST.get('waitlist') and not self.has_free_room(form.cleaned_data):
+            # Tipe kamar penuh: simpan permintaan, hold ditawarkan saat ada pembatalan
+            data = form.cleaned_data
+            WaitlistEntry.objects.get_or_create(
+                user=request.user,
+                room_type=data['room_type'],
+                check_in=data['check_in'],
+                check_out=data['check_out'],
+                status='WAITING',
+                defaults={
+                    'hotel': hotel,
+                    **{field: data[field] for field in ('first_name', 'last_name', 'email', 'phone', 'special_request')},
+                },
+            )
+            messages.success(request, 'Anda masuk daftar tunggu. Kamar akan ditahan untuk Anda begitu ada yang kosong.')
+            return redirect('reservation')
         if form.is_valid():
             check_in = form.cleaned_data['check_in']
             check_out = form.cleaned_data['check_out']
-            if check_out > check_in:
-                durasi = (check_out - check_in).days
-                total_kamar = harga_kamar * durasi
-                pajak = total_kamar * self.TAX_RATE
-                total_harga = total_kamar + pajak
+            room_type = form.cleaned_data['room_type']
 
             reservation = form.save(commit=False)
             reservation.user = request.user
-            reservation.hotel = hotel
-            reservation.status = 'PENDING'  # atau status default kamu
+            reservation.status = 'PENDING'
             reservation.total_price = total_harga
-            reservation.save()
-
-            # 🔁 Redirect ke halaman pembayaran
-            return redirect('payment', reservation_id=reservation.id)  # Redirect ke halaman pembayaran
-
-        check_in_str = request.POST.get('check_in')
-        check_out_str = request.POST.get('check_out')
-        if check_in_str and check_out_str:
             try:
-                check_in_date = datetime.strptime(check_in_str, "%Y-%m-%d").date()
-                check_out_date = datetime.strptime(check_out_str, "%Y-%m-%d").date()
-                if check_out_date > check_in_date:
-                    durasi = (check_out_date - check_in_date).days
-                    total_kamar = harga_kamar * durasi
-                    pajak = total_kamar * self.TAX_RATE
-                    total_harga = total_kamar + pajak
-            except (ValueError, TypeError):
-                pass
+                with transaction.atomic():
+                    # Kurangi jatah semua malam sekaligus, lalu pilih nomor kamar yang kosong
+                    reserve(room_type.pk, check_in, check_out)
+                    reservation.room = allocate_room(room_type.pk, check_in, check_out)
+                    if reservation.room is None:
+                        raise InventoryUnavailable
+                    reservation._inventory_reserved = True
+                    reservation.save()
+            except InventoryUnavailable:
+                form.add_error('room_type', 'Tipe kamar ini sudah penuh untuk tanggal yang dipilih.')
+                waitlist = True
+            else:
+                # 🔁 Redirect ke halaman pembayaran
+                return redirect('payment', reservation_id=reservation.id)
 
         return render(request, self.form_template_name, {
             'form': form,
             'hotel': hotel,
-            'rooms': rooms,
-            'room_obj': room,
+            'room_types': room_types,
+            'room_type_obj': room_type,
             'harga_kamar': harga_kamar,
             'durasi': durasi,
             'total_kamar': total_kamar,
             'pajak': pajak,
             'total_harga': total_harga,
             'check_in': check_in,  
-            'check_out': check_out 
+            'check_out': check_out,
+            'waitlist': waitlist,
         })
 
+# Pemesanan grup: beberapa kamar dalam satu transaksi
+class GroupBookingView(AppLoginRequiredMixin, View):
+    template_name = 'reservasi/group_booking.html'
+
+    def get(self, request, hotel_id):
+        hotel = get_object_or_404(Hotel.objects.select_related('cover_image'), pk=hotel_id)
+        check_in = date.today() + timezone.timedelta(days=1)
+        check_out = check_in + timezone.timedelta(days=1)
+        form = GroupBookingForm(
+            room_types=room_type_options(hotel, check_in, check_out),
+            initial={
+                'check_in': check_in,
+                'check_out': check_out,
+                'first_name': request.user.first_name or '',
+                'last_name': request.user.last_name or '',
+                'email': request.user.email or '',
+            },
+        )
+        return render(request, self.template_name, {'form': form, 'hotel': hotel})
+
+    def post(self, request, hotel_id):
+        hotel = get_object_or_404(Hotel.objects.select_related('cover_image'), pk=hotel_id)
+        check_in, check_out = parse_dates(request.POST.get('check_in'), request.POST.get('check_out'))
+        form = GroupBookingForm(request.POST, room_types=room_type_options(hotel, check_in, check_out))
+        if form.is_valid():
+            data = form.cleaned_data
+            guest = {field: data[field] for field in ('first_name', 'last_name', 'email', 'phone', 'special_request')}
+            try:
+                booking = create_group_booking(
+                    request.user, hotel, data['check_in'], data['check_out'], data['quantities'], guest
+                )
+            except InventoryUnavailable as e:
+                room_type = e.args[0] if e.args else None
+                if room_type is not None:
+                    form.add_error(f'qty_{room_type.pk}', 'Jumlah kamar tersedia tidak mencukupi.')
+                else:
+                    form.add_error(None, 'Kamar tidak cukup untuk tanggal yang dipilih.')
+            else:
+                return redirect('booking_payment', booking_id=booking.id)
+        return render(request, self.template_name, {'form': form, 'hotel': hotel})
+
+# Pembayaran pemesanan grup
+class BookingPaymentView(AppLoginRequiredMixin, View):
+    template_name = 'payment/booking_payment.html'
+
+    def get_booking(self, request, booking_id):
+        return get_object_or_404(Booking.objects.select_related('hotel__cover_image'), pk=booking_id, user=request.user)
+
+    def render_page(self, request, booking, form):
+        reservations = booking.reservations.select_related('room', 'room_type').order_by('room_type__name', 'room__number')
+        return render(request, self.template_name, {
+            'form': form,
+            'booking': booking,
+            'reservations': reservations,
+        })
+
+    def get(self, request, booking_id):
+        return self.render_page(request, self.get_booking(request, booking_id), PaymentForm())
+
+    def post(self, request, booking_id):
+        booking = self.get_booking(request, booking_id)
+        form = PaymentForm(request.POST, request.FILES)
+        if form.is_valid():
+            payment = form.save(commit=False)
+            payment.booking = booking
+            payment.is_paid = False
+            payment.paid_at = None
+            payment.save()
+            messages.success(request, 'Pembayaran berhasil! Tunggu Reservasi Anda dikonfirmasi.')
+            return redirect('reservation')
+        return self.render_page(request, booking, form)
+
 # Pembayaran
 class PaymentView(AppLoginRequiredMixin, View):
     template_name = 'payment/payment.html'
 
     def get(self, request, reservation_id):
-        reservation = get_object_or_404(Reservation, pk=reservation_id, user=request.user)
+        reservation = get_object_or_404(
+            Reservation.objects.select_related('room__hotel__cover_image', 'room__room_type'),
+            pk=reservation_id, user=request.user
+        )
         form = PaymentForm()
         payment_details = {
             'bank_transfer': [
@@ -424,7 +626,9 @@ class ReservationDetailView(AppLoginRequiredMixin, View):
     template_name = 'reservasi/detail_reservasi.html'
 
     def get(self, request, reservation_id):
-        reservation = get_object_or_404(Reservation, pk=reservation_id, user=request.user)
+        reservation = user_stay_or_404(
+            request.user, reservation_id, related=('room__hotel__cover_image', 'room__room_type')
+        )
         return render(request, self.template_name, {
             'reservation': reservation,
         })
@@ -435,7 +639,10 @@ class CancelReservationView(AppLoginRequiredMixin, View):
         reservation = get_object_or_404(Reservation, pk=reservation_id, user=request.user)
         if reservation.status in ['PENDING', 'PAID']:
             reservation.status = 'CANCELLED'
-            reservation.save()
+            with transaction.atomic():
+                reservation.save()
+                # Jatah yang kembali langsung ditawarkan ke daftar tunggu
+                match_on_commit([(reservation.room_type_id, reservation.check_in, reservation.check_out)])
             messages.success(request, 'Reservasi berhasil dibatalkan.')
         else:
             messages.error(request, 'Reservasi tidak dapat dibatalkan.')
@@ -448,17 +655,22 @@ class ReservationHistoryView(AppLoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         today = date.today()
-        # Ambil semua reservasi yang sudah selesai atau dibatalkan
-        reservations = Reservation.objects.filter(
-            user=self.request.user,
-            status__in=['CHECKED_OUT', 'CANCELLED']
-        ).filter(
-            Q(status='CHECKED_OUT', check_out__lt=today) | Q(status='CANCELLED')
-        )
+        cancelled = []
+        checked_out = []
+        # Ambil semua reservasi yang sudah selesai atau dibatalkan, dari tabel aktif dan arsip
+        for model in (Reservation, ArchivedReservation):
+            reservations = model.objects.filter(
+                user=self.request.user,
+                status__in=['CHECKED_OUT', 'CANCELLED']
+            ).select_related('room__hotel__cover_image', 'room__room_type', 'review').filter(
+                Q(status='CHECKED_OUT', check_out__lt=today) | Q(status='CANCELLED')
+            )
+            cancelled += reservations.filter(status='CANCELLED')
+            checked_out += reservations.filter(status='CHECKED_OUT')
         # Urutkan: yang dibatalkan terbaru di atas, lalu yang selesai terbaru
-        cancelled = reservations.filter(status='CANCELLED').order_by('-created_at')
-        checked_out = reservations.filter(status='CHECKED_OUT').order_by('-check_out')
-        context['reservations'] = list(cancelled) + list(checked_out)
+        cancelled.sort(key=lambda reservation: reservation.created_at, reverse=True)
+        checked_out.sort(key=lambda reservation: reservation.check_out, reverse=True)
+        context['reservations'] = cancelled + checked_out
         return context
 
 # Ulasan
@@ -466,7 +678,7 @@ class ReviewView(AppLoginRequiredMixin, View):
     template_name = 'review/review.html'
 
     def get(self, request, reservation_id):
-        reservation = get_object_or_404(Reservation, pk=reservation_id, user=request.user, status='CHECKED_OUT')
+        reservation = user_stay_or_404(request.user, reservation_id, status='CHECKED_OUT')
         form = ReviewForm()
         return render(request, self.template_name, {
             'form': form,
@@ -474,11 +686,14 @@ class ReviewView(AppLoginRequiredMixin, View):
         })
 
     def post(self, request, reservation_id):
-        reservation = get_object_or_404(Reservation, pk=reservation_id, user=request.user, status='CHECKED_OUT')
+        reservation = user_stay_or_404(request.user, reservation_id, status='CHECKED_OUT')
         form = ReviewForm(request.POST)
         if form.is_valid():
             review = form.save(commit=False)
-            review.reservation = reservation
+            if isinstance(reservation, ArchivedReservation):
+                review.archived_reservation = reservation
+            else:
+                review.reservation = reservation
             review.save()
             return redirect('reservation_history')
         return render(request, self.template_name, {
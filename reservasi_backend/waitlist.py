@@ -0,0 +1,185 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .booking import stay_price
+from .inventory import InventoryUnavailable, allocate_room, release_many, reserve
+from .models import Reservation, WaitlistEntry
+from .pricing import stay_subtotals
+from .stats import record_status_change
+
+# ======================
+# Indeks Interval
+# ======================
+class IntervalIndex:
+    # Pohon interval statis: array diurutkan menurut awal, simpul = titik tengah rentang, dan
+    # max_end[simpul] = akhir terbesar di subpohonnya sehingga cabang yang tak mungkin beririsan dilewati
+    def __init__(self, items):
+        # items: (awal, akhir eksklusif, nilai)
+        items = sorted(items, key=lambda item: item[0])
+        self.starts = [item[0] for item in items]
+        self.ends = [item[1] for item in items]
+        self.values = [item[2] for item in items]
+        self.max_end = [None] * len(items)
+        self.build(0, len(items))
+
+    def __len__(self):
+        return len(self.values)
+
+    def build(self, lo, hi):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        best = self.ends[mid]
+        for child in (self.build(lo, mid), self.build(mid + 1, hi)):
+            if child is not None and child > best:
+                best = child
+        self.max_end[mid] = best
+        return best
+
+    def overlapping(self, start, end):
+        # Nilai yang intervalnya beririsan dengan [start, end), O(log n + k)
+        found = []
+        stack = [(0, len(self.values))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if self.max_end[mid] <= start:
+                continue
+            stack.append((lo, mid))
+            if self.starts[mid] < end:
+                if self.ends[mid] > start:
+                    found.append(self.values[mid])
+                stack.append((mid + 1, hi))
+        return found
+
+# ======================
+# Pencocokan Daftar Tunggu
+# ======================
+WAITLIST_HOLD_MINUTES = 60
+# Batas OR per query agar tidak melewati batas kedalaman ekspresi SQLite
+MATCH_QUERY_CHUNK = 200
+
+
+def freed_ranges(reservations):
+    # Dibaca sebelum status diubah: (room_type_id, check_in, check_out) yang jatahnya akan kembali
+    return list(
+        reservations.filter(room_type__isnull=False).values_list('room_type_id', 'check_in', 'check_out')
+    )
+
+
+def waiting_index(freed):
+    # Hanya entri yang beririsan dengan rentang gabungan malam yang dilepas per tipe kamar yang dimuat
+    hull = {}
+    for room_type_id, check_in, check_out in freed:
+        lo, hi = hull.get(room_type_id, (check_in, check_out))
+        hull[room_type_id] = (min(lo, check_in), max(hi, check_out))
+    items = {room_type_id: [] for room_type_id in hull}
+    room_type_ids = list(hull)
+    for i in range(0, len(room_type_ids), MATCH_QUERY_CHUNK):
+        query = Q()
+        for room_type_id in room_type_ids[i:i + MATCH_QUERY_CHUNK]:
+            lo, hi = hull[room_type_id]
+            query |= Q(room_type_id=room_type_id, check_in__lt=hi, check_out__gt=lo)
+        entries = WaitlistEntry.objects.filter(
+            query, status='WAITING', check_in__gte=timezone.localdate()
+        ).select_related('room_type')
+        for entry in entries:
+            items[entry.room_type_id].append((entry.check_in, entry.check_out, entry))
+    return {room_type_id: IntervalIndex(rows) for room_type_id, rows in items.items() if rows}
+
+
+def offer_hold(entry, expires_at):
+    # Kurangi jatah lewat UPDATE bersyarat yang sama dengan pemesanan biasa; None bila masih penuh
+    try:
+        with transaction.atomic():
+            reserve(entry.room_type_id, entry.check_in, entry.check_out)
+            room = allocate_room(entry.room_type_id, entry.check_in, entry.check_out)
+            if room is None:
+                raise InventoryUnavailable
+            reservation = Reservation(
+                user_id=entry.user_id,
+                room=room,
+                room_type_id=entry.room_type_id,
+                check_in=entry.check_in,
+                check_out=entry.check_out,
+                first_name=entry.first_name,
+                last_name=entry.last_name,
+                email=entry.email,
+                phone=entry.phone,
+                special_request=entry.special_request,
+                total_price=stay_price(
+                    stay_subtotals([entry.room_type], entry.check_in, entry.check_out)[entry.room_type_id]
+                ),
+                status='PENDING',
+            )
+            reservation._inventory_reserved = True
+            reservation.save()
+            # Entri yang sudah ditawarkan proses lain tidak ditawari dua kali
+            if not WaitlistEntry.objects.filter(pk=entry.pk, status='WAITING').update(
+                status='OFFERED', reservation=reservation, offer_expires_at=expires_at
+            ):
+                raise InventoryUnavailable
+    except InventoryUnavailable:
+        return None
+    return reservation
+
+
+def match_waitlist(freed):
+    # freed: [(room_type_id, check_in, check_out)] yang baru saja dilepas; mengembalikan entri yang ditawari hold
+    today = timezone.localdate()
+    freed = [
+        (room_type_id, max(check_in, today), check_out)
+        for room_type_id, check_in, check_out in freed
+        if room_type_id is not None and check_out > today
+    ]
+    if not freed:
+        return []
+    indexes = waiting_index(freed)
+    candidates = {}
+    for room_type_id, check_in, check_out in freed:
+        index = indexes.get(room_type_id)
+        if index is not None:
+            for entry in index.overlapping(check_in, check_out):
+                candidates[entry.pk] = entry
+
+    expires_at = timezone.now() + timedelta(
+        minutes=getattr(settings, 'WAITLIST_HOLD_MINUTES', WAITLIST_HOLD_MINUTES)
+    )
+    offered = []
+    # Yang mendaftar lebih dulu ditawari lebih dulu
+    for entry in sorted(candidates.values(), key=lambda entry: (entry.created_at, entry.pk)):
+        reservation = offer_hold(entry, expires_at)
+        if reservation is not None:
+            entry.status, entry.reservation, entry.offer_expires_at = 'OFFERED', reservation, expires_at
+            offered.append(entry)
+    return offered
+
+
+def match_on_commit(freed):
+    # Dicocokkan setelah pembatalan tersimpan agar jatah yang dilepas sudah terlihat
+    if freed:
+        transaction.on_commit(lambda: match_waitlist(freed))
+
+
+def expire_offers(now=None):
+    # Hold yang lewat batas dan belum dibayar dilepas lalu ditawarkan ke antrean berikutnya
+    now = now or timezone.now()
+    with transaction.atomic():
+        WaitlistEntry.objects.filter(status='WAITING', check_in__lt=timezone.localdate()).update(status='EXPIRED')
+        entries = WaitlistEntry.objects.filter(status='OFFERED', offer_expires_at__lte=now)
+        holds = Reservation.objects.filter(waitlist_entry__in=entries, status='PENDING', payment__isnull=True)
+        freed = freed_ranges(holds)
+        release_many(holds)
+        record_status_change(holds, 'CANCELLED')
+        holds.update(status='CANCELLED')
+        expired = entries.filter(Q(reservation__isnull=True) | Q(reservation__status='CANCELLED')).update(
+            status='EXPIRED'
+        )
+        # Sisanya sudah dibayar atau dikonfirmasi
+        booked = entries.update(status='BOOKED')
+    offered = match_waitlist(freed)
+    return expired, booked, len(offered)
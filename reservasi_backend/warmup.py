@@ -0,0 +1,112 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlencode
+from django.conf import settings
+from django.db import connections
+from django.db.models import Sum
+from django.http import QueryDict
+from django.utils import timezone
+from .models import DailyHotelStats, Facility, Hotel, HotelGallery, Review, Room, RoomType, RoomTypeInventory
+from .reviews import review_summary
+from .search import catalog_snapshot, get_facets, hotel_detail_data, normalize_filters
+
+# ======================
+# Pemanasan Cache
+# ======================
+WARMUP_WORKERS = 4
+WARMUP_TOP_HOTELS = 20
+POPULAR_DAYS = 30
+# Tabel yang dibaca hampir setiap halaman publik
+HOT_MODELS = (Hotel, HotelGallery, RoomType, Room, Facility, RoomTypeInventory, Review)
+
+
+def top_hotel_ids(limit):
+    # Hotel terlaris dari rollup harian, dilengkapi hotel berperingkat tertinggi
+    since = timezone.localdate() - timedelta(days=POPULAR_DAYS)
+    ids = list(
+        DailyHotelStats.objects.filter(date__gte=since).values('hotel_id').annotate(sold=Sum('rooms_sold'))
+        .order_by('-sold', 'hotel_id').values_list('hotel_id', flat=True)[:limit]
+    )
+    if len(ids) < limit:
+        ids += Hotel.objects.exclude(pk__in=ids).order_by('-average_rating', 'pk').values_list(
+            'pk', flat=True
+        )[:limit - len(ids)]
+    return ids
+
+
+def touch_table(model, using='default'):
+    # Baca semua halaman tabel & index-nya agar page cache OS sudah terisi sebelum trafik masuk
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor != 'sqlite':
+            cursor.execute(f'SELECT COUNT(*) FROM {table}')
+            return 1
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s", [model._meta.db_table])
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(f'SELECT COUNT(*) FROM {table} NOT INDEXED')
+        for index in indexes:
+            cursor.execute(f'SELECT COUNT(*) FROM {table} INDEXED BY {connection.ops.quote_name(index)}')
+    return 1 + len(indexes)
+
+
+def warm_hotel(hotel_id):
+    hotel_detail_data(hotel_id)
+    review_summary(hotel_id)
+
+
+def warmup_tasks(top_n):
+    # (label, fungsi) yang saling bebas sehingga bisa dijalankan paralel
+    tasks = [('facet semua hotel', lambda: get_facets(normalize_filters(QueryDict())))]
+    for region in catalog_snapshot()['regions']:
+        filters = normalize_filters(QueryDict(urlencode({'region': region})))
+        tasks.append((f'facet {region}', lambda filters=filters: get_facets(filters)))
+    for hotel_id in top_hotel_ids(top_n):
+        tasks.append((f'detail hotel {hotel_id}', lambda hotel_id=hotel_id: warm_hotel(hotel_id)))
+    for model in HOT_MODELS:
+        tasks.append((f'tabel {model._meta.db_table}', lambda model=model: touch_table(model)))
+    return tasks
+
+
+def run_task(label, task, threaded):
+    started = time.perf_counter()
+    error = None
+    try:
+        task()
+    except Exception as exc:
+        error = exc
+    finally:
+        # Koneksi database milik thread pool ditutup agar tidak tertinggal setelah pool selesai
+        if threaded:
+            connections.close_all()
+    return label, time.perf_counter() - started, error
+
+
+def warm_caches(workers=None, top_n=None):
+    # Hasil: ([(label, detik, error)], total detik)
+    workers = workers or getattr(settings, 'WARMUP_WORKERS', WARMUP_WORKERS)
+    top_n = getattr(settings, 'WARMUP_TOP_HOTELS', WARMUP_TOP_HOTELS) if top_n is None else top_n
+    started = time.perf_counter()
+    # Snapshot katalog dipakai semua facet, jadi dibangun dulu sekali
+    results = [run_task('snapshot katalog', catalog_snapshot, False)]
+    tasks = warmup_tasks(top_n)
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results += pool.map(lambda item: run_task(*item, True), tasks)
+    else:
+        results += [run_task(*item, False) for item in tasks]
+    return results, time.perf_counter() - started
+
+
+def warm_worker():
+    # Untuk hook setelah fork, mis. di gunicorn.conf.py:
+    #   def post_worker_init(worker):
+    #       from reservasi_backend.warmup import warm_worker
+    #       warm_worker()
+    # Snapshot katalog & cache LocMem bersifat per proses, jadi tiap worker memanaskan miliknya sendiri
+    connections.close_all()
+    try:
+        return warm_caches()
+    finally:
+        connections.close_all()